@@ -0,0 +1,437 @@
+import os
+import shutil
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from PySide6.QtCore import QObject, Signal
+
+from content_index import new_content_hasher
+from library_index import AUDIO_EXTENSIONS
+from media_cache import probe_media_info
+
+# Size of the blocks streamed from the source to the copy
+COPY_CHUNK_BYTES = 1024 * 1024
+
+# Minimum time between two progress signals of one copy
+PROGRESS_INTERVAL_S = 0.1
+
+
+class ImportCanceled(Exception):
+    """Raised inside a copy when it was canceled"""
+
+
+def copy_file_chunked(source, destination, cancel_event=None, progress=None, hasher=None,
+                      chunk_size=COPY_CHUNK_BYTES):
+    """
+    Copy a file block by block.
+
+    The data goes to ``destination + ".part"`` first and is only renamed to
+    the destination once complete, so an interrupted or canceled copy never
+    leaves a truncated audio file behind.
+
+    Args:
+        source: File to copy
+        destination: Path of the copy
+        cancel_event: threading.Event checked between blocks
+        progress: Called as progress(copied_bytes, total_bytes) after each block
+        hasher: hashlib object fed with the copied data, if given
+        chunk_size: Block size in bytes
+
+    Returns:
+        Number of bytes copied
+    """
+    total = os.path.getsize(source)
+    part_path = destination + ".part"
+    copied = 0
+    try:
+        with open(source, "rb") as src, open(part_path, "wb") as dst:
+            while True:
+                if cancel_event is not None and cancel_event.is_set():
+                    raise ImportCanceled(source)
+                chunk = src.read(chunk_size)
+                if not chunk:
+                    break
+                dst.write(chunk)
+                if hasher is not None:
+                    hasher.update(chunk)
+                copied += len(chunk)
+                if progress is not None:
+                    progress(copied, total)
+        shutil.copystat(source, part_path)
+        os.replace(part_path, destination)
+    except BaseException:
+        try:
+            os.remove(part_path)
+        except OSError:
+            pass
+        raise
+    return copied
+
+
+def iter_audio_files(root, skip_dirs=()):
+    """
+    Yield the paths of the audio files under root, walking it iteratively.
+
+    Args:
+        root: Folder to walk
+        skip_dirs: Folders not to descend into (e.g. the project folder)
+    """
+    skip = {os.path.realpath(path) for path in skip_dirs}
+    pending = [root]
+    while pending:
+        folder = pending.pop()
+        if os.path.realpath(folder) in skip:
+            continue
+        try:
+            entries = list(os.scandir(folder))
+        except OSError as e:
+            print(f"Error reading {folder}: {e}")
+            continue
+        for entry in entries:
+            if entry.is_dir(follow_symlinks=False):
+                pending.append(entry.path)
+            elif entry.name.lower().endswith(AUDIO_EXTENSIONS) and entry.is_file():
+                yield entry.path
+
+
+class FileImporter(QObject):
+    """
+    Copies audio files into the project folder on worker threads.
+
+    Each import runs on its own thread. It first asks the ContentIndex
+    whether the folder already holds the same content (claiming it
+    otherwise, see ContentIndex.claim()); if so, ``found``
+    reports the stored file and nothing is copied. Otherwise the file is
+    streamed in blocks to a free name in the folder (hashed on the way, so
+    the index learns its full hash for free). The signals are emitted from
+    the worker thread and, as with PlayerEvents, queued to the GUI thread
+    because this object lives there. Sources are the keys for progress,
+    cancellation and results.
+    """
+
+    progress = Signal(str, object, object)  # source, copied bytes, total bytes
+    finished = Signal(str, str, object, float)  # source, destination, bytes, seconds
+    found = Signal(str, str)  # source, identical file already in the folder
+    failed = Signal(str, str)  # source, error message
+    canceled = Signal(str)  # source
+
+    def __init__(self, content_index, parent=None):
+        super().__init__(parent)
+        self.content_index = content_index
+        self._jobs = {}  # source -> (thread, cancel event)
+        self.finished.connect(self._forget)
+        self.found.connect(self._forget)
+        self.failed.connect(self._forget)
+        self.canceled.connect(self._forget)
+
+    def is_importing(self, source=None):
+        """Whether a copy (of one source, or any) is in progress"""
+        if source is None:
+            return bool(self._jobs)
+        return source in self._jobs
+
+    def start(self, source):
+        """Start importing source into the folder. Returns False if already running"""
+        if source in self._jobs:
+            return False
+        cancel_event = threading.Event()
+        thread = threading.Thread(
+            target=self._run, args=(source, cancel_event),
+            name="audio-import", daemon=True
+        )
+        self._jobs[source] = (thread, cancel_event)
+        thread.start()
+        return True
+
+    def _run(self, source, cancel_event):
+        """Runs on the worker thread"""
+        index = self.content_index
+        try:
+            existing, _, claim = index.claim(source, cancel_event)
+        except Exception as e:
+            self.failed.emit(source, str(e))
+            return
+        if cancel_event.is_set():
+            index.release(claim)
+            self.canceled.emit(source)
+            return
+        if existing is not None:
+            self.found.emit(source, os.path.join(index.folder, existing))
+            return
+
+        name = index.reserve_name(os.path.basename(source))
+        destination = os.path.join(index.folder, name)
+        hasher = new_content_hasher()
+        started = time.perf_counter()
+        last_report = [0.0]
+
+        def report(copied, total):
+            now = time.perf_counter()
+            if now - last_report[0] >= PROGRESS_INTERVAL_S or copied == total:
+                last_report[0] = now
+                self.progress.emit(source, copied, total)
+
+        try:
+            copied = copy_file_chunked(source, destination, cancel_event, report, hasher)
+            index.add(name, hasher.hexdigest())
+        except ImportCanceled:
+            index.release_name(name)
+            self.canceled.emit(source)
+        except Exception as e:
+            index.release_name(name)
+            self.failed.emit(source, str(e))
+        else:
+            self.finished.emit(source, destination, copied, time.perf_counter() - started)
+        finally:
+            index.release(claim)
+
+    def _forget(self, source, *args):
+        self._jobs.pop(source, None)
+
+    def cancel(self, source=None):
+        """Cancel the copy of one source, or all copies"""
+        sources = list(self._jobs) if source is None else [source]
+        for key in sources:
+            job = self._jobs.pop(key, None)
+            if job is not None:
+                job[1].set()
+
+    def close(self, timeout=2.0):
+        """Cancel all copies and wait briefly for their threads to stop"""
+        jobs = list(self._jobs.values())
+        self.cancel()
+        for thread, _ in jobs:
+            thread.join(timeout)
+
+
+class FolderImporter(QObject):
+    """
+    Imports every audio file of a folder tree into the project folder.
+
+    A coordinator thread walks the tree and hands each file to a thread
+    pool, which looks the content up in the ContentIndex, copies new
+    content (at most ``max_copies`` copies at a time, so a network share or
+    disk is not flooded with parallel writes) and probes duration and tags
+    (with media from ``media_factory``, vlc.Media by default).
+    Only a bounded number of files is queued at once, so memory stays flat
+    on very large trees.
+
+    Results are delivered in batches through ``imported`` (a list of dicts
+    with source, stored, size, copied, info and error), at most every
+    PROGRESS_INTERVAL_S, together with a ``progress`` update; ``finished``
+    carries the totals and is always emitted, with the message of an error
+    that stopped the import (e.g. an unreadable project folder) in "error".
+    The signals are queued to the GUI thread like those of FileImporter.
+    """
+
+    progress = Signal(object)  # totals so far, see _totals()
+    imported = Signal(object)  # list of result dicts
+    finished = Signal(object)  # final totals
+
+    def __init__(self, content_index, max_workers=8, max_copies=2, media_factory=None, parent=None):
+        super().__init__(parent)
+        self.content_index = content_index
+        self.media_factory = media_factory
+        self.max_workers = max_workers
+        self.max_copies = max_copies
+        self._thread = None
+        self._cancel_event = None
+        self._lock = threading.Lock()
+
+    def is_running(self):
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self, root, skip_dirs=()):
+        """Start importing a folder tree. Returns False if an import is running"""
+        if self.is_running():
+            return False
+        self._cancel_event = threading.Event()
+        self._thread = threading.Thread(
+            target=self._run, args=(root, skip_dirs, self._cancel_event),
+            name="folder-import", daemon=True
+        )
+        self._thread.start()
+        return True
+
+    def cancel(self):
+        """Stop queueing files; files in progress still complete"""
+        if self._cancel_event is not None:
+            self._cancel_event.set()
+
+    def close(self, timeout=2.0):
+        """Cancel the import and wait briefly for it to stop"""
+        self.cancel()
+        if self._thread is not None:
+            self._thread.join(timeout)
+
+    def _run(self, root, skip_dirs, cancel_event):
+        """Coordinator thread: walk the tree and feed the pool"""
+        self._started = time.perf_counter()
+        self._last_report = 0.0
+        self._pending = []
+        self._counts = {"found": 0, "done": 0, "copied": 0, "duplicates": 0, "failed": 0,
+                        "skipped": 0, "bytes": 0, "copied_bytes": 0}
+        error = None
+        copy_slots = threading.BoundedSemaphore(self.max_copies)
+        queue_slots = threading.BoundedSemaphore(self.max_workers * 4)
+
+        def done(future, source):
+            queue_slots.release()
+            self._collect(future, source)
+
+        # finished must always come, or the import would look like it still runs
+        try:
+            self.content_index.rescan()
+            with ThreadPoolExecutor(self.max_workers, thread_name_prefix="folder-import") as pool:
+                for source in iter_audio_files(root, skip_dirs):
+                    if cancel_event.is_set():
+                        break
+                    queue_slots.acquire()
+                    with self._lock:
+                        self._counts["found"] += 1
+                    future = pool.submit(self._import_one, source, copy_slots, cancel_event)
+                    future.add_done_callback(lambda f, source=source: done(f, source))
+        except Exception as e:
+            print(f"Error importing {root}: {e}")
+            error = str(e)
+        finally:
+            self._report(force=True)
+            totals = self._totals()
+            totals["canceled"] = cancel_event.is_set()
+            totals["error"] = error
+            self.finished.emit(totals)
+
+    def _import_one(self, source, copy_slots, cancel_event):
+        """Pool thread: import one file. Returns its result dict"""
+        index = self.content_index
+        size = os.path.getsize(source)
+        result = {"source": source, "stored": None, "size": size, "copied": False,
+                  "info": None, "error": None}
+        if cancel_event.is_set():
+            result["error"] = "Canceled"
+            return result
+        # Identical files of the tree wait here for the first one's copy
+        existing, _, claim = index.claim(source, cancel_event, size)
+        if existing is not None:
+            result["stored"] = os.path.join(index.folder, existing)
+        else:
+            try:
+                with copy_slots:
+                    if cancel_event.is_set():
+                        result["error"] = "Canceled"
+                        return result
+                    name = index.reserve_name(os.path.basename(source))
+                    destination = os.path.join(index.folder, name)
+                    hasher = new_content_hasher()
+                    try:
+                        copy_file_chunked(source, destination, cancel_event, hasher=hasher)
+                        index.add(name, hasher.hexdigest())
+                    except BaseException:
+                        index.release_name(name)
+                        raise
+            finally:
+                index.release(claim)
+            result["stored"] = destination
+            result["copied"] = True
+        result["info"] = probe_media_info(result["stored"], media_factory=self.media_factory)
+        return result
+
+    def _collect(self, future, source):
+        """Pool thread: count a finished file and queue its result"""
+        try:
+            result = future.result()
+        except ImportCanceled:
+            result = {"source": source, "stored": None, "size": 0, "copied": False,
+                      "info": None, "error": "Canceled"}
+        except Exception as e:
+            result = {"source": source, "stored": None, "size": 0, "copied": False,
+                      "info": None, "error": str(e)}
+        with self._lock:
+            counts = self._counts
+            counts["done"] += 1
+            if result["error"] == "Canceled":
+                counts["skipped"] += 1
+            elif result["error"]:
+                counts["failed"] += 1
+            elif result["copied"]:
+                counts["copied"] += 1
+                counts["copied_bytes"] += result["size"]
+            else:
+                counts["duplicates"] += 1
+            counts["bytes"] += result["size"]
+            self._pending.append(result)
+        self._report()
+
+    def _totals(self):
+        with self._lock:
+            totals = dict(self._counts)
+        seconds = time.perf_counter() - self._started
+        totals["seconds"] = seconds
+        totals["files_per_s"] = totals["done"] / seconds if seconds > 0 else 0.0
+        totals["mb_per_s"] = totals["bytes"] / 1048576 / seconds if seconds > 0 else 0.0
+        return totals
+
+    def _report(self, force=False):
+        """Emit queued results and progress, at most every PROGRESS_INTERVAL_S"""
+        with self._lock:
+            now = time.perf_counter()
+            if not force and now - self._last_report < PROGRESS_INTERVAL_S:
+                return
+            self._last_report = now
+            results, self._pending = self._pending, []
+        if results:
+            self.imported.emit(results)
+        self.progress.emit(self._totals())
+
+
+class LibraryScanner(QObject):
+    """
+    Refreshes a LibraryIndex on a worker thread and writes it out.
+
+    ``refreshed`` delivers the changes on the GUI thread. A refresh asked
+    for while one runs is not started in parallel but once the running one
+    finished, so bursts of file system notifications cost at most two scans.
+    """
+
+    refreshed = Signal(object)  # changes dict from LibraryIndex.refresh()
+
+    def __init__(self, library, info_lookup=None, parent=None):
+        super().__init__(parent)
+        self.library = library
+        self.info_lookup = info_lookup
+        self._thread = None
+        self._again = None  # None, or the force flag of a queued refresh
+        self.refreshed.connect(self._done)
+
+    def refresh(self, force=False):
+        """Refresh the index in the background"""
+        if self._thread is not None:
+            self._again = force or bool(self._again)
+            return
+        self._thread = threading.Thread(
+            target=self._run, args=(force,), name="library-scan", daemon=True
+        )
+        self._thread.start()
+
+    def _run(self, force):
+        """Runs on the worker thread"""
+        try:
+            changes = self.library.refresh(force, self.info_lookup)
+            self.library.flush()
+        except Exception as e:
+            print(f"Error scanning library: {e}")
+            changes = {"added": [], "removed": [], "changed": []}
+        self.refreshed.emit(changes)
+
+    def _done(self, changes):
+        self._thread = None
+        if self._again is not None:
+            force, self._again = self._again, None
+            self.refresh(force)
+
+    def close(self, timeout=2.0):
+        """Wait briefly for a running refresh"""
+        self._again = None
+        if self._thread is not None:
+            self._thread.join(timeout)
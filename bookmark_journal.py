@@ -0,0 +1,195 @@
+import json
+import os
+import threading
+from collections import OrderedDict
+
+from bookmark_store import dedupe_bookmark_ids, normalize_bookmark, read_bookmarks_json, write_bookmarks_json
+
+# Compact the journal once it grows past this many bytes
+DEFAULT_COMPACT_THRESHOLD = 1024 * 1024
+
+
+class BookmarkJournal:
+    """
+    Append-only journal persistence for a ``BookmarkStore``.
+
+    The state on disk is a snapshot (a regular bookmarks.json array) plus a
+    JSON-lines journal with one record per add/edit/delete. Each change is
+    appended as soon as it happens, so the cost of a change no longer
+    depends on the size of the library. On load the snapshot is read and
+    the journal replayed on top of it; a torn last line left by a crash is
+    ignored.
+
+    Once the journal passes ``compact_threshold`` bytes it is sealed (renamed
+    to ``<journal>.old``) and a fresh journal is started. A background
+    thread then writes a new snapshot and atomically renames it into place
+    before deleting the sealed journal. Replaying a record twice gives the
+    same result, so a crash at any point of a compaction loses nothing.
+    """
+
+    def __init__(self, snapshot_path, journal_path=None, compact_threshold=DEFAULT_COMPACT_THRESHOLD,
+                 legacy_json_path=None):
+        """
+        Args:
+            snapshot_path: Snapshot file, in the bookmarks.json array format
+            journal_path: Journal file (defaults to snapshot_path + ".journal")
+            compact_threshold: Journal size in bytes that triggers compaction
+            legacy_json_path: bookmarks.json to import when no snapshot exists yet
+        """
+        self.snapshot_path = snapshot_path
+        self.journal_path = journal_path or snapshot_path + ".journal"
+        self.sealed_path = self.journal_path + ".old"
+        self.compact_threshold = compact_threshold
+        self.legacy_json_path = legacy_json_path
+        self.compaction_error = None
+        self._journal = None
+        self._journal_size = 0
+        self._compactor = None
+
+    def load(self):
+        """Read the snapshot and replay the journal(s) over it"""
+        self.wait_for_compaction()
+        bookmarks = OrderedDict()
+        if os.path.exists(self.snapshot_path):
+            snapshot = read_bookmarks_json(self.snapshot_path)
+        elif self.legacy_json_path and os.path.exists(self.legacy_json_path):
+            # First start in journal mode: take over the existing bookmarks.json
+            snapshot = read_bookmarks_json(self.legacy_json_path)
+            dedupe_bookmark_ids(snapshot)
+            write_bookmarks_json(self.snapshot_path, snapshot)
+        else:
+            snapshot = []
+        for bookmark in snapshot:
+            bookmarks[bookmark["id"]] = bookmark
+
+        # A sealed journal is left behind if a compaction was interrupted
+        for path in (self.sealed_path, self.journal_path):
+            if os.path.exists(path):
+                self._replay(path, bookmarks)
+
+        self._open_journal()
+        return list(bookmarks.values())
+
+    def _replay(self, path, bookmarks):
+        """Apply the records of one journal file to an id -> bookmark dict"""
+        with open(path, "r", encoding="utf-8") as f:
+            for line in f:
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    # Torn write at the end of the journal
+                    print(f"Ignoring damaged journal record in {path}")
+                    continue
+                op = record.get("op")
+                if op == "add":
+                    bookmark = normalize_bookmark(record["bookmark"])
+                    bookmarks[bookmark["id"]] = bookmark
+                elif op == "update":
+                    if record["id"] in bookmarks:
+                        bookmarks[record["id"]].update(record["changes"])
+                elif op == "remove":
+                    bookmarks.pop(record["id"], None)
+                elif op == "clear":
+                    bookmarks.clear()
+
+    def _open_journal(self):
+        if self._journal is not None:
+            self._journal.close()
+        # Terminate a torn last line, so it does not swallow the next record
+        if os.path.exists(self.journal_path) and os.path.getsize(self.journal_path) > 0:
+            with open(self.journal_path, "rb") as f:
+                f.seek(-1, os.SEEK_END)
+                torn = f.read(1) != b"\n"
+            if torn:
+                with open(self.journal_path, "a", encoding="utf-8") as f:
+                    f.write("\n")
+        self._journal = open(self.journal_path, "a", encoding="utf-8")
+        self._journal_size = self._journal.tell()
+
+    def _append(self, record):
+        """Append one record to the journal"""
+        line = json.dumps(record, ensure_ascii=False) + "\n"
+        self._journal.write(line)
+        # Hand the record to the OS right away; fsync happens in flush()
+        self._journal.flush()
+        self._journal_size += len(line.encode("utf-8"))
+
+    def record_add(self, bookmark):
+        self._append({"op": "add", "bookmark": bookmark})
+
+    def record_update(self, bookmark_id, changes):
+        self._append({"op": "update", "id": bookmark_id, "changes": changes})
+
+    def record_remove(self, bookmark_id):
+        self._append({"op": "remove", "id": bookmark_id})
+
+    def record_clear(self):
+        self._append({"op": "clear"})
+
+    def flush(self, store):
+        """
+        Make appended records durable and start a compaction if the journal
+        has grown past the threshold.
+
+        Returns:
+            True if a compaction was started
+        """
+        if self._journal is None:
+            return False
+        os.fsync(self._journal.fileno())
+        if self._journal_size >= self.compact_threshold and not self.compacting:
+            self.compact(store)
+            return True
+        return False
+
+    @property
+    def compacting(self):
+        return self._compactor is not None and self._compactor.is_alive()
+
+    def compact(self, store):
+        """Seal the current journal and write a new snapshot off the calling thread"""
+        if self.compacting:
+            return
+        if os.path.exists(self.sealed_path):
+            # A previous compaction failed: append the current journal to the
+            # sealed one, so the new snapshot covers both
+            self._journal.close()
+            with open(self.sealed_path, "a", encoding="utf-8") as sealed, \
+                    open(self.journal_path, "r", encoding="utf-8") as current:
+                for line in current:
+                    sealed.write(line)
+            os.remove(self.journal_path)
+        else:
+            self._journal.close()
+            os.replace(self.journal_path, self.sealed_path)
+        self._journal = None
+        self._open_journal()
+
+        # Copy the state as of the seal; later changes go to the new journal
+        bookmarks = [dict(bookmark) for bookmark in store.sorted_bookmarks()]
+        self.compaction_error = None
+        self._compactor = threading.Thread(
+            target=self._write_snapshot, args=(bookmarks,), name="bookmark-compactor", daemon=True
+        )
+        self._compactor.start()
+
+    def _write_snapshot(self, bookmarks):
+        """Runs on the compactor thread"""
+        try:
+            write_bookmarks_json(self.snapshot_path, bookmarks)
+            os.remove(self.sealed_path)
+        except Exception as e:
+            self.compaction_error = e
+            print(f"Error compacting bookmark journal: {e}")
+
+    def wait_for_compaction(self, timeout=None):
+        """Block until a running compaction has finished"""
+        if self._compactor is not None:
+            self._compactor.join(timeout)
+
+    def close(self):
+        """Wait for compaction and close the journal file"""
+        self.wait_for_compaction()
+        if self._journal is not None:
+            self._journal.close()
+            self._journal = None
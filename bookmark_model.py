@@ -0,0 +1,505 @@
+import threading
+from bisect import bisect_left
+from itertools import groupby
+from operator import itemgetter
+from queue import SimpleQueue
+
+from PySide6.QtCore import QAbstractListModel, QModelIndex, QObject, QPersistentModelIndex, QPoint, Qt, Signal
+from PySide6.QtWidgets import QAbstractItemView
+from PySide6.QtGui import QBrush, QColor
+
+from bookmark_search import BookmarkSearchIndex
+from bookmark_store import bookmark_sort_key
+
+# Role returning the bookmark id of a row (None for file headers)
+BookmarkIdRole = Qt.UserRole + 1
+
+# Shared brushes, so data() never allocates colors
+HEADER_BACKGROUND = QBrush(QColor(70, 70, 70))
+TYPE_FOREGROUNDS = {
+    "Start": QBrush(QColor(110, 240, 132)),  # Green for start
+    "End": QBrush(QColor(232, 117, 104)),  # Red for end
+}
+MISSING_FOREGROUND = QBrush(QColor(140, 140, 140))
+TYPE_ICONS = {
+    "Start": "▶️",
+    "End": "⏹️",
+}
+
+# Above this many runs of removed or inserted rows, new rows are swapped in
+# with one layout change rather than run by run
+MAX_ROW_RUNS = 100
+# Rows compared at once while skipping the unchanged parts of a diff
+DIFF_CHUNK = 256
+
+
+def format_bookmark_text(bookmark):
+    """Text shown for a bookmark row"""
+    time_sec = bookmark["time_ms"] // 1000
+    time_str = f"{time_sec // 60:02d}:{time_sec % 60:02d}"
+    bookmark_type = bookmark.get("type", "Regular")
+    icon_text = TYPE_ICONS.get(bookmark_type, "🔖")
+    return f"  {icon_text} {bookmark['name']} - {time_str} [{bookmark_type}]"
+
+
+def rows_with_headers(sort_keys):
+    """Row keys for sorted bookmark keys: a header before each file's group"""
+    keys = []
+    for filename, group in groupby(sort_keys, itemgetter(0)):
+        keys.append((filename,))
+        keys.extend(group)
+    return keys
+
+
+def diff_rows(old, new, max_runs=MAX_ROW_RUNS):
+    """
+    Row changes turning the sorted row keys old into new.
+
+    Returns:
+        (removals, insertions), or None if there are more than max_runs
+        runs: removals are (first, last) runs of rows of old, insertions
+        (row, keys) runs in the rows of new. Removing from the bottom up,
+        then inserting from the top down gives new.
+    """
+    removals = []
+    insertions = []
+    if old == new:
+        return removals, insertions
+    i = j = 0
+    while i < len(old) and j < len(new):
+        if old[i] == new[j]:
+            # Skip unchanged stretches a chunk at a time
+            while i + DIFF_CHUNK <= len(old) and old[i:i + DIFF_CHUNK] == new[j:j + DIFF_CHUNK]:
+                i += DIFF_CHUNK
+                j += DIFF_CHUNK
+            if i < len(old) and j < len(new) and old[i] == new[j]:
+                i += 1
+                j += 1
+            continue
+        if old[i] < new[j]:
+            first = i
+            while i < len(old) and old[i] < new[j]:
+                i += 1
+            removals.append((first, i - 1))
+        else:
+            first = j
+            while j < len(new) and new[j] < old[i]:
+                j += 1
+            insertions.append((first, new[first:j]))
+        if len(removals) + len(insertions) > max_runs:
+            return None
+    if i < len(old):
+        removals.append((i, len(old) - 1))
+    if j < len(new):
+        insertions.append((j, new[j:]))
+    return removals, insertions
+
+
+class BookmarkListModel(QAbstractListModel):
+    """
+    Flat list model of bookmarks grouped under file header rows.
+
+    The model only keeps one sort key per row: (filename,) for a header and
+    (filename, time_ms, id) for a bookmark. Headers sort just before their
+    bookmarks, so the position of any row is found by bisection. Text and
+    colors are produced lazily in data(), i.e. only for the rows the view
+    actually paints. Adding or removing a bookmark inserts or removes its
+    row (and header, if needed), an edit updates or moves one row, and
+    ``refresh()`` applies only the difference to the store. Since the model
+    is never reset after the first load, views keep their selection.
+
+    ``missing_file``, if set, is called with a bookmark's stored path and
+    tells whether its file is missing; such rows are grayed out.
+
+    ``set_filter()`` restricts the rows to a set of bookmark ids, e.g.
+    search results; the incremental updates then skip other bookmarks.
+    Changing the filter only removes and inserts the rows that differ, or
+    for scattered changes swaps all rows in one layout change; either way
+    the selection is kept.
+    """
+
+    def __init__(self, store, parent=None):
+        super().__init__(parent)
+        self.store = store
+        self.missing_file = None
+        self._filter_ids = None
+        self._keys = []
+        # Changes whenever the rows do, see row_snapshot()
+        self._revision = 0
+
+    def rowCount(self, parent=QModelIndex()):
+        if parent.isValid():
+            return 0
+        return len(self._keys)
+
+    def flags(self, index):
+        if not index.isValid():
+            return Qt.NoItemFlags
+        if len(self._keys[index.row()]) == 1:
+            # File headers can't be selected
+            return Qt.ItemIsEnabled
+        return Qt.ItemIsEnabled | Qt.ItemIsSelectable
+
+    def data(self, index, role=Qt.DisplayRole):
+        if not index.isValid():
+            return None
+        key = self._keys[index.row()]
+
+        if len(key) == 1:
+            if role == Qt.DisplayRole:
+                return f"📁 {key[0]}"
+            if role == Qt.BackgroundRole:
+                return HEADER_BACKGROUND
+            return None
+
+        if role == BookmarkIdRole:
+            return key[2]
+        if role not in (Qt.DisplayRole, Qt.ForegroundRole, Qt.UserRole):
+            return None
+        bookmark = self.store.get(key[2])
+        if bookmark is None:
+            # Removed from the store, row not updated yet
+            return None
+        missing = self.missing_file is not None and self.missing_file(bookmark["file"])
+        if role == Qt.DisplayRole:
+            text = format_bookmark_text(bookmark)
+            return text + "  ⚠ file missing" if missing else text
+        if role == Qt.ForegroundRole:
+            return MISSING_FOREGROUND if missing else TYPE_FOREGROUNDS.get(bookmark.get("type"))
+        return bookmark
+
+    def _store_keys(self):
+        """Row keys for the current store contents"""
+        bookmarks = self.store.sorted_bookmarks()
+        if self._filter_ids is not None:
+            bookmarks = [bookmark for bookmark in bookmarks if bookmark["id"] in self._filter_ids]
+        return rows_with_headers(bookmark_sort_key(bookmark) for bookmark in bookmarks)
+
+    def set_filter(self, ids, sort_keys=None):
+        """
+        Show only some bookmarks.
+
+        Args:
+            ids: Set of the bookmark ids to show, or None to show all
+            sort_keys: bookmark_sort_key() of the bookmarks to show, in
+                order, if already known (saves reading the store)
+        """
+        self._filter_ids = ids
+        self._set_rows(rows_with_headers(sort_keys) if sort_keys is not None else self._store_keys())
+
+    def row_snapshot(self):
+        """(revision, copy of the row keys), for diffing on another thread"""
+        return self._revision, list(self._keys)
+
+    def apply_filter(self, ids, rows, changes, revision):
+        """
+        Show only some bookmarks, with rows and changes computed from a
+        row_snapshot() elsewhere, e.g. by a BookmarkSearcher.
+
+        Args:
+            ids: Set of the bookmark ids to show, or None to show all
+            rows: Row keys to show, file headers included
+            changes: diff_rows() from the snapshot to rows, or None
+            revision: Revision of the snapshot; if the rows changed since,
+                the changes no longer apply and all rows are swapped
+        """
+        self._filter_ids = ids
+        if revision != self._revision:
+            changes = None
+        self._set_rows(rows, changes, diff=False)
+
+    def _set_rows(self, rows, changes=None, diff=True):
+        """Replace the rows, keeping the selection"""
+        if changes is None and diff:
+            changes = diff_rows(self._keys, rows)
+        if changes is None:
+            self._relayout(rows)
+            return
+        removals, insertions = changes
+        self._revision += 1
+        for first, last in reversed(removals):
+            self.beginRemoveRows(QModelIndex(), first, last)
+            del self._keys[first:last + 1]
+            self.endRemoveRows()
+        for row, keys in insertions:
+            self.beginInsertRows(QModelIndex(), row, row + len(keys) - 1)
+            self._keys[row:row] = keys
+            self.endInsertRows()
+
+    def _relayout(self, rows):
+        """Swap in all rows at once; persistent indexes follow their rows"""
+        self.layoutAboutToBeChanged.emit()
+        old_indexes = self.persistentIndexList()
+        new_rows = []
+        for index in old_indexes:
+            key = self._keys[index.row()]
+            row = bisect_left(rows, key)
+            new_rows.append(row if row < len(rows) and rows[row] == key else -1)
+        self._keys = rows
+        self._revision += 1
+        new_indexes = [self.index(row) if row >= 0 else QModelIndex() for row in new_rows]
+        self.changePersistentIndexList(old_indexes, new_indexes)
+        self.layoutChanged.emit()
+
+    def _filtered_out(self, bookmark_id):
+        return self._filter_ids is not None and bookmark_id not in self._filter_ids
+
+    def reload(self):
+        """Rebuild all rows from the store"""
+        self.beginResetModel()
+        self._keys = self._store_keys()
+        self._revision += 1
+        self.endResetModel()
+
+    def refresh(self):
+        """
+        Bring the rows in line with the store, emitting only the row
+        removals and insertions needed to get there.
+        """
+        self._set_rows(self._store_keys())
+        # Names and types may have changed without moving any row
+        if self._keys:
+            self.dataChanged.emit(self.index(0), self.index(len(self._keys) - 1))
+
+    def files_changed(self):
+        """Repaint all rows, e.g. after files went missing or came back"""
+        if self._keys:
+            self.dataChanged.emit(self.index(0), self.index(len(self._keys) - 1))
+
+    def row_for_id(self, bookmark_id):
+        """Return the row showing a bookmark, or -1"""
+        bookmark = self.store.get(bookmark_id)
+        if bookmark is None:
+            return -1
+        key = bookmark_sort_key(bookmark)
+        row = bisect_left(self._keys, key)
+        if row < len(self._keys) and self._keys[row] == key:
+            return row
+        return -1
+
+    def adjacent_bookmark_ids(self, row):
+        """
+        Return the ids of the bookmarks nearest to a row in the previous and
+        next file groups (the last one before and the first one after).
+        """
+        if not 0 <= row < len(self._keys):
+            return []
+        filename = self._keys[row][0]
+        ids = []
+        header = bisect_left(self._keys, (filename,))
+        if header > 0:
+            ids.append(self._keys[header - 1][2])
+        next_header = bisect_left(self._keys, (filename, float("inf")))
+        if next_header + 1 < len(self._keys):
+            ids.append(self._keys[next_header + 1][2])
+        return ids
+
+    def bookmark_added(self, bookmark_id):
+        """Insert the row of a bookmark that was added to the store"""
+        if self._filtered_out(bookmark_id):
+            return
+        self._insert_key(bookmark_sort_key(self.store.get(bookmark_id)))
+
+    def bookmark_changed(self, bookmark_id, old_key):
+        """
+        Update the row of an edited bookmark.
+
+        Args:
+            bookmark_id: Id of the edited bookmark
+            old_key: bookmark_sort_key() of the bookmark before the edit
+        """
+        if self._filtered_out(bookmark_id):
+            return
+        new_key = bookmark_sort_key(self.store.get(bookmark_id))
+        src = bisect_left(self._keys, old_key)
+        if src >= len(self._keys) or self._keys[src] != old_key:
+            self._insert_key(new_key)
+            return
+        if new_key[0] != old_key[0]:
+            # Moved to another file's group, headers may change as well
+            self._remove_key(old_key)
+            self._insert_key(new_key)
+            return
+
+        # Position among the other rows, then in pre-move coordinates
+        del self._keys[src]
+        pos = bisect_left(self._keys, new_key)
+        self._keys.insert(src, old_key)
+        dest = pos if pos < src else pos + 1
+        self._revision += 1
+        if dest in (src, src + 1):
+            # Same place: only the text changes
+            self._keys[src] = new_key
+            self.dataChanged.emit(self.index(src), self.index(src))
+            return
+        self.beginMoveRows(QModelIndex(), src, src, QModelIndex(), dest)
+        del self._keys[src]
+        self._keys.insert(pos, new_key)
+        self.endMoveRows()
+        self.dataChanged.emit(self.index(pos), self.index(pos))
+
+    def bookmark_removed(self, bookmark):
+        """Remove the row of a bookmark that was removed from the store"""
+        self._remove_key(bookmark_sort_key(bookmark))
+
+    def _insert_key(self, key):
+        self._revision += 1
+        row = bisect_left(self._keys, key)
+        if row > 0 and self._keys[row - 1][0] == key[0]:
+            # The file already has a header
+            self.beginInsertRows(QModelIndex(), row, row)
+            self._keys.insert(row, key)
+        else:
+            # First bookmark of this file: add the header too
+            self.beginInsertRows(QModelIndex(), row, row + 1)
+            self._keys[row:row] = [(key[0],), key]
+        self.endInsertRows()
+
+    def _remove_key(self, key):
+        row = bisect_left(self._keys, key)
+        if row >= len(self._keys) or self._keys[row] != key:
+            return
+        first = row
+        group_empty = (len(self._keys[row - 1]) == 1 and
+                       (row + 1 == len(self._keys) or self._keys[row + 1][0] != key[0]))
+        if group_empty:
+            # Last bookmark of this file: remove the header too
+            first = row - 1
+        self._revision += 1
+        self.beginRemoveRows(QModelIndex(), first, row)
+        del self._keys[first:row + 1]
+        self.endRemoveRows()
+
+
+class ScrollAnchor:
+    """
+    Context manager that keeps the top visible row of a view in place while
+    rows are inserted, removed or moved above it.
+    """
+
+    def __init__(self, view):
+        self.view = view
+        self.anchor = None
+
+    def __enter__(self):
+        index = self.view.indexAt(QPoint(1, 1))
+        self.anchor = QPersistentModelIndex(index) if index.isValid() else None
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        if self.anchor is not None and self.anchor.isValid():
+            self.view.scrollTo(self.view.model().index(self.anchor.row(), 0),
+                               QAbstractItemView.PositionAtTop)
+        return False
+
+
+class BookmarkSearcher(QObject):
+    """
+    Keeps a BookmarkSearchIndex on a worker thread and searches it there,
+    so neither building the index nor a broad search blocks the GUI thread.
+
+    ``build()``, ``update()`` and ``remove()`` change the index and
+    ``search()`` queues a search; all of them are handled in the order they
+    were made. A search that a newer one superseded before it started is
+    skipped. ``finished`` delivers a result dict on the GUI thread, with
+    the facet counts, the rows to show and their diff_rows() from the
+    row_snapshot() the search was made with (see
+    BookmarkListModel.apply_filter()). ``close()`` stops the thread;
+    nothing is emitted after it.
+    """
+
+    finished = Signal(object)
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self._tasks = SimpleQueue()
+        self._serial = 0  # of the latest search
+        self._closed = False
+        self._thread = threading.Thread(target=self._run, name="bookmark-search", daemon=True)
+        self._thread.start()
+
+    def build(self, bookmarks):
+        """Index all bookmarks, replacing the current contents"""
+        self._tasks.put(("build", bookmarks))
+
+    def update(self, bookmark):
+        """Re-index an added or edited bookmark"""
+        self._tasks.put(("update", bookmark))
+
+    def remove(self, bookmark_id):
+        self._tasks.put(("remove", bookmark_id))
+
+    def search(self, query, types, snapshot):
+        """
+        Search in the background.
+
+        Args:
+            query: Search text, see BookmarkSearchIndex.search()
+            types: Bookmark types to show
+            snapshot: BookmarkListModel.row_snapshot() to diff against
+
+        Returns:
+            Serial number of the search, also found in its result
+        """
+        self._serial += 1
+        self._tasks.put(("search", (self._serial, query, types, snapshot)))
+        return self._serial
+
+    def is_latest(self, result):
+        """Whether no search was queued after the one of result (and the searcher is open)"""
+        return result["serial"] == self._serial and not self._closed
+
+    def close(self, timeout=2.0):
+        """Stop the worker thread, waiting briefly for a search in progress"""
+        self._closed = True
+        self._tasks.put((None, None))
+        self._thread.join(timeout)
+
+    def _run(self):
+        """Runs on the worker thread"""
+        index = BookmarkSearchIndex()
+        all_rows = None  # rows of all bookmarks, until the index changes
+        while True:
+            task, argument = self._tasks.get()
+            if self._closed:
+                # Changes and searches queued before close() are dropped
+                return
+            try:
+                if task == "search":
+                    if argument[0] != self._serial:
+                        continue
+                    if all_rows is None:
+                        all_rows = rows_with_headers(index.all_keys())
+                    result = self._search(index, all_rows, *argument)
+                    if not self._closed:
+                        self.finished.emit(result)
+                    continue
+                all_rows = None
+                if task == "build":
+                    index.build(argument)
+                elif task == "update":
+                    index.update(argument)
+                else:
+                    index.remove(argument)
+            except Exception as e:
+                print(f"Error in bookmark search: {e}")
+
+    @staticmethod
+    def _search(index, all_rows, serial, query, types, snapshot):
+        ids = index.search(query)
+        if ids is not None and len(ids) == len(index):
+            # Everything matches
+            ids = None
+        counts = index.facet_counts(ids)
+        ids = index.of_types(ids, types)
+        # The model may keep the rows and change them, so never the cached list
+        rows = list(all_rows) if ids is None else rows_with_headers(index.sorted_keys(ids))
+        revision, old_rows = snapshot
+        return {
+            "serial": serial,
+            "ids": ids,
+            "counts": counts,
+            "rows": rows,
+            "changes": diff_rows(old_rows, rows),
+            "revision": revision,
+        }
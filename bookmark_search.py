@@ -0,0 +1,259 @@
+import re
+from bisect import bisect_left, bisect_right, insort
+
+from bookmark_store import BOOKMARK_TYPES, bookmark_sort_key
+
+# Shorter text-only queries are not searched, as nearly everything matches
+MIN_QUERY_LENGTH = 2
+
+# Words of names and file names
+TOKEN_RE = re.compile(r"\w+")
+
+# Query terms for ranges: "03:00-04:30" (position in the file) and
+# "2024-01-01..2024-02-01" (creation date)
+TIME_RANGE_RE = re.compile(r"^(\d{1,3}):(\d{2})(?:-(\d{1,3}):(\d{2}))?$")
+DATE_RANGE_RE = re.compile(r"^(\d{4}-\d{2}-\d{2})(?:\.\.(\d{4}-\d{2}-\d{2}))?$")
+
+
+def tokenize(text):
+    """Lowercase words of a text"""
+    return TOKEN_RE.findall(text.lower())
+
+
+def parse_query(query):
+    """
+    Split a search query into terms.
+
+    Returns:
+        List of ("text", word), ("time", start_ms, end_ms) and
+        ("date", first, last) terms; all of them have to match
+    """
+    terms = []
+    for part in query.split():
+        match = TIME_RANGE_RE.match(part)
+        if match:
+            start_ms = (int(match.group(1)) * 60 + int(match.group(2))) * 1000
+            if match.group(3) is not None:
+                end_ms = (int(match.group(3)) * 60 + int(match.group(4))) * 1000 + 999
+            else:
+                end_ms = start_ms + 999
+            terms.append(("time", start_ms, end_ms))
+            continue
+        match = DATE_RANGE_RE.match(part)
+        if match:
+            terms.append(("date", match.group(1), match.group(2) or match.group(1)))
+            continue
+        terms.extend(("text", word) for word in tokenize(part))
+    return terms
+
+
+class BookmarkSearchIndex:
+    """
+    In-memory search index over bookmarks.
+
+    Words of the name, file name and type are kept in an inverted index
+    (word -> ids) next to a sorted word list, so the words starting with a
+    typed prefix are one bisection away. Positions and creation dates are
+    kept as sorted (value, id) lists for range terms, and ids are grouped
+    by type for the facets. ``add()``, ``update()`` and ``remove()`` keep
+    everything current without rebuilding.
+
+    While typing, a query usually extends the previous one; a small previous
+    result is then narrowed down by checking each of its bookmarks, rather
+    than searched again from scratch.
+    """
+
+    def __init__(self):
+        self._ids_by_word = {}
+        self._words = []  # sorted keys of _ids_by_word
+        self._doc_words = {}  # id -> words of the bookmark
+        self._time = {}  # id -> time_ms
+        self._date = {}  # id -> timestamp
+        self._keys = {}  # id -> bookmark_sort_key()
+        self._type = {}  # id -> type
+        self._sorted_keys = []  # sorted values of _keys
+        self._by_time = []  # sorted (time_ms, id)
+        self._by_date = []  # sorted (timestamp, id)
+        self._by_type = {bookmark_type: set() for bookmark_type in BOOKMARK_TYPES}
+        self._last = None  # (terms, result) of the previous search
+
+    def __len__(self):
+        return len(self._keys)
+
+    def build(self, bookmarks):
+        """Index all bookmarks, replacing the current contents"""
+        self.__init__()
+        for bookmark in bookmarks:
+            self._add(bookmark)
+        # Sort once rather than inserting in order
+        self._words = sorted(self._ids_by_word)
+        self._sorted_keys = sorted(self._keys.values())
+        self._by_time = sorted((time_ms, bookmark_id) for bookmark_id, time_ms in self._time.items())
+        self._by_date = sorted((timestamp, bookmark_id) for bookmark_id, timestamp in self._date.items())
+
+    def add(self, bookmark):
+        """Index a new bookmark"""
+        for word in self._add(bookmark):
+            insort(self._words, word)
+        bookmark_id = bookmark["id"]
+        insort(self._sorted_keys, self._keys[bookmark_id])
+        insort(self._by_time, (self._time[bookmark_id], bookmark_id))
+        insort(self._by_date, (self._date[bookmark_id], bookmark_id))
+        self._last = None
+
+    def _add(self, bookmark):
+        """Index a bookmark except in the sorted lists. Returns its new words"""
+        bookmark_id = bookmark["id"]
+        bookmark_type = bookmark.get("type", "Regular")
+        words = set(tokenize(bookmark["name"]))
+        words.update(tokenize(bookmark["filename"]))
+        words.update(tokenize(bookmark_type))
+        self._doc_words[bookmark_id] = tuple(words)
+        new_words = []
+        for word in words:
+            ids = self._ids_by_word.get(word)
+            if ids is None:
+                ids = self._ids_by_word[word] = set()
+                new_words.append(word)
+            ids.add(bookmark_id)
+        self._time[bookmark_id] = bookmark["time_ms"]
+        self._date[bookmark_id] = bookmark.get("timestamp") or ""
+        self._keys[bookmark_id] = bookmark_sort_key(bookmark)
+        self._type[bookmark_id] = bookmark_type
+        self._by_type.setdefault(bookmark_type, set()).add(bookmark_id)
+        return new_words
+
+    def remove(self, bookmark_id):
+        """Drop a bookmark from the index"""
+        words = self._doc_words.pop(bookmark_id, None)
+        if words is None:
+            return
+        for word in words:
+            ids = self._ids_by_word[word]
+            ids.discard(bookmark_id)
+            if not ids:
+                del self._ids_by_word[word]
+                del self._words[bisect_left(self._words, word)]
+        time_item = (self._time.pop(bookmark_id), bookmark_id)
+        del self._by_time[bisect_left(self._by_time, time_item)]
+        date_item = (self._date.pop(bookmark_id), bookmark_id)
+        del self._by_date[bisect_left(self._by_date, date_item)]
+        key = self._keys.pop(bookmark_id)
+        del self._sorted_keys[bisect_left(self._sorted_keys, key)]
+        self._by_type[self._type.pop(bookmark_id)].discard(bookmark_id)
+        self._last = None
+
+    def update(self, bookmark):
+        """Re-index an edited bookmark"""
+        self.remove(bookmark["id"])
+        self.add(bookmark)
+
+    def clear(self):
+        self.__init__()
+
+    def _prefix_ids(self, prefix):
+        """Ids of the bookmarks with a word starting with prefix"""
+        start = bisect_left(self._words, prefix)
+        end = bisect_left(self._words, prefix + "\uffff", start)
+        if end - start == 1:
+            return self._ids_by_word[self._words[start]]
+        ids = set()
+        for word in self._words[start:end]:
+            ids.update(self._ids_by_word[word])
+        return ids
+
+    def _range_ids(self, sorted_items, low, high):
+        start = bisect_left(sorted_items, (low,))
+        end = bisect_right(sorted_items, (high, "\uffff"), start)
+        return {bookmark_id for _, bookmark_id in sorted_items[start:end]}
+
+    def _term_ids(self, term):
+        if term[0] == "text":
+            return self._prefix_ids(term[1])
+        if term[0] == "time":
+            return self._range_ids(self._by_time, term[1], term[2])
+        return self._range_ids(self._by_date, term[1], term[2] + "\uffff")
+
+    def _matches(self, bookmark_id, term):
+        if term[0] == "text":
+            return any(word.startswith(term[1]) for word in self._doc_words[bookmark_id])
+        if term[0] == "time":
+            return term[1] <= self._time[bookmark_id] <= term[2]
+        return term[1] <= self._date[bookmark_id][:10] <= term[2]
+
+    def search(self, query):
+        """
+        Find the bookmarks matching every term of a query.
+
+        Text terms match words by prefix; see parse_query() for ranges.
+
+        Returns:
+            Set of bookmark ids, or None for an empty or too short query
+            (no filtering)
+        """
+        terms = parse_query(query)
+        if not terms:
+            return None
+        if all(term[0] == "text" for term in terms) and len(query.strip()) < MIN_QUERY_LENGTH:
+            return None
+        last = self._last
+        if last is not None and len(last[1]) < 5000 and self._refines(last[0], terms):
+            # Narrow down the previous result
+            result = last[1]
+            for term in terms:
+                result = {bookmark_id for bookmark_id in result if self._matches(bookmark_id, term)}
+        else:
+            result = None
+            # Text terms by length, as longer prefixes match fewer bookmarks
+            for term in sorted(terms, key=lambda term: -len(term[1]) if term[0] == "text" else -100):
+                if result is None:
+                    result = set(self._term_ids(term))
+                elif len(result) < 1000:
+                    result = {bookmark_id for bookmark_id in result if self._matches(bookmark_id, term)}
+                else:
+                    result &= self._term_ids(term)
+                if not result:
+                    break
+        self._last = (terms, result)
+        return result
+
+    @staticmethod
+    def _refines(old_terms, new_terms):
+        """Whether every bookmark matching new_terms also matches old_terms"""
+        if len(new_terms) < len(old_terms):
+            return False
+        for old, new in zip(old_terms, new_terms):
+            if old == new:
+                continue
+            if old[0] == new[0] == "text" and new[1].startswith(old[1]):
+                continue
+            return False
+        return True
+
+    def facet_counts(self, ids=None):
+        """Number of bookmarks of each type, among ids or overall"""
+        if ids is None:
+            return {bookmark_type: len(type_ids) for bookmark_type, type_ids in self._by_type.items()}
+        return {bookmark_type: len(ids & type_ids) for bookmark_type, type_ids in self._by_type.items()}
+
+    def of_types(self, ids, types):
+        """Restrict ids (None meaning all bookmarks) to the given types"""
+        types = set(types)
+        if types >= set(self._by_type):
+            return ids
+        if ids is not None:
+            return {bookmark_id for bookmark_id in ids if self._type[bookmark_id] in types}
+        typed = set()
+        for bookmark_type in types:
+            typed |= self._by_type.get(bookmark_type, set())
+        return typed
+
+    def all_keys(self):
+        """bookmark_sort_key() of all bookmarks, in list order"""
+        return list(self._sorted_keys)
+
+    def sorted_keys(self, ids):
+        """bookmark_sort_key() of the given bookmarks, in list order"""
+        if len(ids) * 8 < len(self._sorted_keys):
+            return sorted(self._keys[bookmark_id] for bookmark_id in ids)
+        return [key for key in self._sorted_keys if key[2] in ids]
@@ -0,0 +1,218 @@
+from bisect import bisect_left
+
+
+def pair_segments(markers):
+    """
+    Pair the Start and End bookmarks of one file into segments.
+
+    Pairs nest like brackets: an End closes the most recent open Start, so
+    Start, Start, End, End gives an inner and an outer segment. Ends
+    without an open Start and Starts never closed are left unpaired.
+
+    Args:
+        markers: (time_ms, id, type) tuples of one file's Start and End
+            bookmarks, ordered by time
+
+    Returns:
+        List of (start_ms, end_ms, start_id, end_id) segments, ordered by
+        start
+    """
+    segments = []
+    open_starts = []
+    for time_ms, bookmark_id, bookmark_type in markers:
+        if bookmark_type == "Start":
+            open_starts.append((time_ms, bookmark_id))
+        elif bookmark_type == "End" and open_starts:
+            start_ms, start_id = open_starts.pop()
+            segments.append((start_ms, time_ms, start_id, bookmark_id))
+    segments.sort()
+    return segments
+
+
+class IntervalTree:
+    """
+    Static centered interval tree over (start_ms, end_ms, ...) segments.
+
+    Every node holds the segments containing its center point, sorted once
+    by start and once by end, so a query walks one root-to-leaf path and
+    only scans node lists as far as they match: O(log n + matches).
+    """
+
+    def __init__(self, segments):
+        self._root = self._build(sorted(segments))
+
+    @classmethod
+    def _build(cls, segments):
+        if not segments:
+            return None
+        center = segments[len(segments) // 2][0]
+        left = []
+        right = []
+        here = []
+        for segment in segments:
+            if segment[1] < center:
+                left.append(segment)
+            elif segment[0] > center:
+                right.append(segment)
+            else:
+                here.append(segment)
+        by_end = sorted(here, key=lambda segment: segment[1], reverse=True)
+        # (center, by start ascending, by end descending, left, right)
+        return (center, here, by_end, cls._build(left), cls._build(right))
+
+    def containing(self, time_ms):
+        """Segments with start_ms <= time_ms <= end_ms"""
+        return self.overlapping(time_ms, time_ms)
+
+    def overlapping(self, start_ms, end_ms):
+        """Segments sharing at least one instant with [start_ms, end_ms]"""
+        result = []
+        node = self._root
+        pending = []
+        while node is not None or pending:
+            if node is None:
+                node = pending.pop()
+            center, by_start, by_end, left, right = node
+            if end_ms < center:
+                for segment in by_start:
+                    if segment[0] > end_ms:
+                        break
+                    result.append(segment)
+                node = left
+            elif start_ms > center:
+                for segment in by_end:
+                    if segment[1] < start_ms:
+                        break
+                    result.append(segment)
+                node = right
+            else:
+                result.extend(by_start)
+                if right is not None:
+                    pending.append(right)
+                node = left
+        result.sort()
+        return result
+
+
+class SegmentIndex:
+    """
+    Start/End segments of all files, derived from the bookmarks.
+
+    Segments are paired per file (see pair_segments()) and kept per file as
+    a sorted list plus an IntervalTree, so "segments containing t" and
+    "segments overlapping [a, b]" are logarithmic. ``build()`` pairs every
+    file once; ``update()`` re-pairs only the files of changed bookmarks,
+    read back from the bookmark store.
+    """
+
+    def __init__(self):
+        self._segments = {}  # filename -> segments ordered by start
+        self._trees = {}  # filename -> IntervalTree
+        self._by_bookmark = {}  # Start or End bookmark id -> segment
+        self._file_of = {}  # Start or End bookmark id -> filename
+        self._ids_of_file = {}  # filename -> ids of its Start and End bookmarks
+
+    def __len__(self):
+        return sum(len(segments) for segments in self._segments.values())
+
+    def build(self, bookmarks):
+        """Pair all bookmarks, replacing the current contents"""
+        self.__init__()
+        markers = {}
+        for bookmark in bookmarks:
+            if bookmark.get("type") in ("Start", "End"):
+                markers.setdefault(bookmark["filename"], []).append(
+                    (bookmark["time_ms"], bookmark["id"], bookmark["type"])
+                )
+        for filename, file_markers in markers.items():
+            file_markers.sort()
+            self._set_file(filename, file_markers)
+
+    def update(self, bookmark_ids, store):
+        """
+        Re-pair the files of added, edited or removed bookmarks.
+
+        Args:
+            bookmark_ids: Ids of the changed bookmarks
+            store: Bookmark store to read the files' bookmarks from
+        """
+        filenames = set()
+        for bookmark_id in bookmark_ids:
+            old_filename = self._file_of.get(bookmark_id)
+            if old_filename is not None:
+                filenames.add(old_filename)
+            bookmark = store.get(bookmark_id)
+            if bookmark is not None and bookmark.get("type") in ("Start", "End"):
+                filenames.add(bookmark["filename"])
+        for filename in filenames:
+            markers = [(bookmark["time_ms"], bookmark["id"], bookmark["type"])
+                       for bookmark in store.bookmarks_for_file(filename)
+                       if bookmark.get("type") in ("Start", "End")]
+            self._set_file(filename, markers)
+
+    def clear(self):
+        self.__init__()
+
+    def _set_file(self, filename, markers):
+        # A bookmark moved to another file may already be registered there
+        # (update() re-pairs the files in no particular order), so only drop
+        # the entries that still belong to this file
+        for segment in self._segments.pop(filename, ()):
+            for bookmark_id in segment[2:4]:
+                if self._by_bookmark.get(bookmark_id) is segment:
+                    del self._by_bookmark[bookmark_id]
+        self._trees.pop(filename, None)
+        for bookmark_id in self._ids_of_file.pop(filename, ()):
+            if self._file_of.get(bookmark_id) == filename:
+                del self._file_of[bookmark_id]
+        if markers:
+            self._ids_of_file[filename] = {bookmark_id for _, bookmark_id, _ in markers}
+        for _, bookmark_id, _ in markers:
+            self._file_of[bookmark_id] = filename
+        segments = pair_segments(markers)
+        if not segments:
+            return
+        self._segments[filename] = segments
+        self._trees[filename] = IntervalTree(segments)
+        for segment in segments:
+            self._by_bookmark[segment[2]] = segment
+            self._by_bookmark[segment[3]] = segment
+
+    def segments_for_file(self, filename):
+        """(start_ms, end_ms, start_id, end_id) segments of a file, by start"""
+        return list(self._segments.get(filename, ()))
+
+    def all_segments(self):
+        """(filename, segment) pairs of all files, in list order"""
+        return [(filename, segment) for filename in sorted(self._segments)
+                for segment in self._segments[filename]]
+
+    def segment_of(self, bookmark_id):
+        """The segment a Start or End bookmark belongs to, or None"""
+        return self._by_bookmark.get(bookmark_id)
+
+    def containing(self, filename, time_ms):
+        """Segments of a file with start_ms <= time_ms <= end_ms"""
+        tree = self._trees.get(filename)
+        return tree.containing(time_ms) if tree else []
+
+    def overlapping(self, filename, start_ms, end_ms):
+        """Segments of a file sharing at least one instant with [start_ms, end_ms]"""
+        tree = self._trees.get(filename)
+        return tree.overlapping(start_ms, end_ms) if tree else []
+
+    def overlaps(self, filename):
+        """
+        Pairs of segments of a file that overlap each other.
+
+        Returns:
+            List of (segment, segment) pairs, the first starting first
+        """
+        segments = self._segments.get(filename, ())
+        starts = [segment[0] for segment in segments]
+        pairs = []
+        for position, segment in enumerate(segments):
+            # Later segments starting before this one ends overlap it
+            last = bisect_left(starts, segment[1] + 1, position + 1)
+            pairs.extend((segment, other) for other in segments[position + 1:last])
+        return pairs
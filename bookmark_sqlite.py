@@ -0,0 +1,264 @@
+import json
+import os
+import sqlite3
+import sys
+
+from bookmark_store import dedupe_bookmark_ids, normalize_bookmark, read_bookmarks_json, write_bookmarks_json
+
+# Columns of the bookmarks.json schema; anything else is kept in "extra"
+BOOKMARK_COLUMNS = ("id", "file", "filename", "time_ms", "name", "type", "timestamp")
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS bookmarks (
+    id TEXT PRIMARY KEY,
+    file TEXT NOT NULL,
+    filename TEXT NOT NULL,
+    time_ms INTEGER NOT NULL,
+    name TEXT NOT NULL,
+    type TEXT NOT NULL DEFAULT 'Regular',
+    timestamp TEXT,
+    extra TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_bookmarks_file_time ON bookmarks (filename, time_ms, id);
+CREATE INDEX IF NOT EXISTS idx_bookmarks_type ON bookmarks (type);
+"""
+
+SELECT_COLUMNS = "SELECT id, file, filename, time_ms, name, type, timestamp, extra FROM bookmarks"
+
+
+def _row_to_bookmark(row):
+    """Convert a bookmarks table row back to a bookmark dict"""
+    bookmark = {
+        "file": row[1],
+        "filename": row[2],
+        "time_ms": row[3],
+        "name": row[4],
+        "type": row[5],
+        "timestamp": row[6],
+        "id": row[0],
+    }
+    if row[7]:
+        bookmark.update(json.loads(row[7]))
+    return bookmark
+
+
+def _bookmark_to_row(bookmark):
+    """Convert a bookmark dict to a bookmarks table row"""
+    extra = {key: value for key, value in bookmark.items() if key not in BOOKMARK_COLUMNS}
+    return (
+        bookmark["id"],
+        bookmark["file"],
+        bookmark["filename"],
+        bookmark["time_ms"],
+        bookmark["name"],
+        bookmark.get("type", "Regular"),
+        bookmark.get("timestamp"),
+        json.dumps(extra, ensure_ascii=False) if extra else None,
+    )
+
+
+class SqliteBookmarkStore:
+    """
+    SQLite-backed bookmark store with the same operations as ``BookmarkStore``.
+
+    The database has a primary key on the bookmark id and indexes on
+    (filename, time_ms) and type, so lookups, per-file time range queries
+    and ordered listing are answered from the indexes instead of scanning
+    every bookmark. Changes run inside a transaction that ``flush()``
+    commits, so a burst of edits costs one commit.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.connection = None
+
+    def load(self):
+        """Open the database, creating the schema if needed"""
+        if self.connection is not None:
+            self.connection.close()
+        self.connection = sqlite3.connect(self.path)
+        self.connection.execute("PRAGMA journal_mode=WAL")
+        self.connection.execute("PRAGMA synchronous=NORMAL")
+        self.connection.executescript(SCHEMA)
+        self.connection.commit()
+
+    def flush(self):
+        """Commit pending changes. Returns True if anything was written"""
+        if not self.connection.in_transaction:
+            return False
+        self.connection.commit()
+        return True
+
+    def close(self):
+        """Commit pending changes and close the database"""
+        if self.connection is not None:
+            self.flush()
+            self.connection.close()
+            self.connection = None
+
+    def import_json(self, path):
+        """
+        Merge bookmarks from a bookmarks.json array file.
+
+        Bookmarks whose id is already in the store are skipped.
+
+        Returns:
+            Number of bookmarks added
+        """
+        bookmarks = read_bookmarks_json(path)
+        dedupe_bookmark_ids(bookmarks)
+        before = self.connection.total_changes
+        self.connection.executemany(
+            "INSERT OR IGNORE INTO bookmarks VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+            (_bookmark_to_row(bookmark) for bookmark in bookmarks)
+        )
+        return self.connection.total_changes - before
+
+    def export_json(self, path):
+        """Write all bookmarks to a bookmarks.json array file"""
+        write_bookmarks_json(path, self.sorted_bookmarks())
+
+    def __len__(self):
+        return self.connection.execute("SELECT COUNT(*) FROM bookmarks").fetchone()[0]
+
+    def __contains__(self, bookmark_id):
+        row = self.connection.execute("SELECT 1 FROM bookmarks WHERE id = ?", (bookmark_id,)).fetchone()
+        return row is not None
+
+    def get(self, bookmark_id):
+        """Return the bookmark with the given id, or None"""
+        row = self.connection.execute(SELECT_COLUMNS + " WHERE id = ?", (bookmark_id,)).fetchone()
+        return _row_to_bookmark(row) if row else None
+
+    def sorted_bookmarks(self):
+        """Return all bookmarks ordered by (filename, time_ms)"""
+        rows = self.connection.execute(SELECT_COLUMNS + " ORDER BY filename, time_ms, id")
+        return [_row_to_bookmark(row) for row in rows]
+
+    def bookmarks_for_file(self, filename):
+        """Return the bookmarks of one file, ordered by time"""
+        rows = self.connection.execute(
+            SELECT_COLUMNS + " WHERE filename = ? ORDER BY time_ms, id", (filename,)
+        )
+        return [_row_to_bookmark(row) for row in rows]
+
+    def bookmarks_in_range(self, filename, start_ms, end_ms):
+        """Return the bookmarks of one file with start_ms <= time_ms <= end_ms"""
+        rows = self.connection.execute(
+            SELECT_COLUMNS + " WHERE filename = ? AND time_ms BETWEEN ? AND ? ORDER BY time_ms, id",
+            (filename, start_ms, end_ms)
+        )
+        return [_row_to_bookmark(row) for row in rows]
+
+    def next_bookmark(self, filename, time_ms):
+        """Return the first bookmark of a file after time_ms, or None"""
+        row = self.connection.execute(
+            SELECT_COLUMNS + " WHERE filename = ? AND time_ms > ? ORDER BY time_ms, id LIMIT 1",
+            (filename, time_ms)
+        ).fetchone()
+        return _row_to_bookmark(row) if row else None
+
+    def previous_bookmark(self, filename, time_ms):
+        """Return the last bookmark of a file before time_ms, or None"""
+        row = self.connection.execute(
+            SELECT_COLUMNS + " WHERE filename = ? AND time_ms < ? ORDER BY time_ms DESC, id DESC LIMIT 1",
+            (filename, time_ms)
+        ).fetchone()
+        return _row_to_bookmark(row) if row else None
+
+    def bookmarks_of_type(self, bookmark_type):
+        """Return all bookmarks of one type, ordered by (filename, time_ms)"""
+        rows = self.connection.execute(
+            SELECT_COLUMNS + " WHERE type = ? ORDER BY filename, time_ms, id", (bookmark_type,)
+        )
+        return [_row_to_bookmark(row) for row in rows]
+
+    def index_of(self, bookmark_id):
+        """Return the position of a bookmark in sorted order"""
+        bookmark = self.get(bookmark_id)
+        if bookmark is None:
+            raise KeyError(bookmark_id)
+        row = self.connection.execute(
+            "SELECT COUNT(*) FROM bookmarks WHERE (filename, time_ms, id) < (?, ?, ?)",
+            (bookmark["filename"], bookmark["time_ms"], bookmark["id"])
+        ).fetchone()
+        return row[0]
+
+    def add(self, bookmark):
+        """
+        Add a new bookmark.
+
+        Args:
+            bookmark: Bookmark dict; an "id" is assigned if it has none
+
+        Returns:
+            The id of the added bookmark
+        """
+        bookmark = normalize_bookmark(dict(bookmark))
+        try:
+            self.connection.execute(
+                "INSERT INTO bookmarks VALUES (?, ?, ?, ?, ?, ?, ?, ?)", _bookmark_to_row(bookmark)
+            )
+        except sqlite3.IntegrityError:
+            raise KeyError(f"Duplicate bookmark id: {bookmark['id']}")
+        return bookmark["id"]
+
+    def update(self, bookmark_id, **changes):
+        """
+        Change fields of an existing bookmark.
+
+        Returns:
+            The updated bookmark dict
+        """
+        if "id" in changes:
+            raise ValueError("Bookmark ids cannot be changed")
+        bookmark = self.get(bookmark_id)
+        if bookmark is None:
+            raise KeyError(bookmark_id)
+        bookmark.update(changes)
+        row = _bookmark_to_row(bookmark)
+        self.connection.execute(
+            "UPDATE bookmarks SET file = ?, filename = ?, time_ms = ?, name = ?, type = ?, "
+            "timestamp = ?, extra = ? WHERE id = ?",
+            row[1:] + row[:1]
+        )
+        return bookmark
+
+    def remove(self, bookmark_id):
+        """Remove a bookmark and return it"""
+        bookmark = self.get(bookmark_id)
+        if bookmark is None:
+            raise KeyError(bookmark_id)
+        self.connection.execute("DELETE FROM bookmarks WHERE id = ?", (bookmark_id,))
+        return bookmark
+
+    def clear(self):
+        """Remove all bookmarks"""
+        self.connection.execute("DELETE FROM bookmarks")
+
+
+def migrate_json_to_sqlite(json_path, db_path):
+    """
+    One-shot migration of a bookmarks.json file into a SQLite database.
+
+    Bookmarks already present in the database (same id) are left alone, so
+    running the migration twice is harmless.
+
+    Returns:
+        Number of bookmarks migrated
+    """
+    store = SqliteBookmarkStore(db_path)
+    store.load()
+    try:
+        migrated = store.import_json(json_path) if os.path.exists(json_path) else 0
+    finally:
+        store.close()
+    return migrated
+
+
+if __name__ == "__main__":
+    if len(sys.argv) != 3:
+        print("Usage: python bookmark_sqlite.py <bookmarks.json> <bookmarks.db>")
+        sys.exit(1)
+    count = migrate_json_to_sqlite(sys.argv[1], sys.argv[2])
+    print(f"Migrated {count} bookmarks into {sys.argv[2]}")
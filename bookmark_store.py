@@ -0,0 +1,383 @@
+import json
+import os
+import threading
+import uuid
+from bisect import bisect_left, insort
+
+# Bookmark types understood by the player
+BOOKMARK_TYPES = ("Regular", "Start", "End")
+
+
+def new_bookmark_id():
+    """Generate a new stable bookmark id"""
+    return uuid.uuid4().hex
+
+
+def legacy_bookmark_id(bookmark):
+    """
+    Derive an id for a bookmark saved before ids existed.
+
+    The id is computed from the bookmark's content, so reading the same old
+    file twice (e.g. migrating it again) gives the same ids.
+    """
+    content = "\0".join(str(bookmark.get(field, "")) for field in ("file", "time_ms", "name", "type", "timestamp"))
+    return uuid.uuid5(uuid.NAMESPACE_URL, content).hex
+
+
+def bookmark_sort_key(bookmark):
+    """Key used to order bookmarks: by file, then by time (id breaks ties)"""
+    return (bookmark["filename"], bookmark["time_ms"], bookmark["id"])
+
+
+def normalize_bookmark(bookmark):
+    """
+    Fill in fields missing from older bookmark files.
+
+    Args:
+        bookmark: Bookmark dict as read from disk
+
+    Returns:
+        The same dict, with "id", "type" and "filename" guaranteed to be set
+    """
+    # Ensure all bookmarks have a type field (for backward compatibility)
+    if "type" not in bookmark:
+        bookmark["type"] = "Regular"
+    if "filename" not in bookmark:
+        bookmark["filename"] = os.path.basename(bookmark["file"])
+    if not bookmark.get("id"):
+        bookmark["id"] = new_bookmark_id()
+    return bookmark
+
+
+def read_bookmarks_json(path):
+    """Read a bookmarks.json array file and return the normalized bookmarks"""
+    with open(path, "r", encoding="utf-8") as f:
+        bookmarks = json.load(f)
+    for bookmark in bookmarks:
+        if not bookmark.get("id"):
+            bookmark["id"] = legacy_bookmark_id(bookmark)
+        normalize_bookmark(bookmark)
+    return bookmarks
+
+
+def dedupe_bookmark_ids(bookmarks):
+    """
+    Give bookmarks that share an id (e.g. hand-copied entries) one of their own.
+
+    The new id is derived from the shared one and the number of the copy,
+    so reading the same file twice (e.g. migrating it again) gives the
+    same ids.
+
+    Returns:
+        True if any id was changed
+    """
+    seen = set()
+    changed = False
+    for bookmark in bookmarks:
+        bookmark_id = bookmark["id"]
+        copy = 0
+        while bookmark_id in seen:
+            copy += 1
+            bookmark_id = uuid.uuid5(uuid.NAMESPACE_URL, f"{bookmark['id']}#{copy}").hex
+        if bookmark_id != bookmark["id"]:
+            bookmark["id"] = bookmark_id
+            changed = True
+        seen.add(bookmark_id)
+    return changed
+
+
+def write_bookmarks_json(path, bookmarks):
+    """
+    Write bookmarks as a JSON array, atomically.
+
+    One bookmark is written per line: each line goes through the C JSON
+    encoder (unlike ``json.dump(..., indent=2)``) and the file stays readable
+    and diffable. The data is written to a temporary file first and renamed
+    over the target, so a crash can never leave a truncated file behind.
+    """
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        f.write("[\n")
+        f.write(",\n".join("  " + json.dumps(bookmark, ensure_ascii=False) for bookmark in bookmarks))
+        f.write("\n]\n")
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, path)
+
+
+class JsonArrayPersistence:
+    """
+    Stores bookmarks in a single bookmarks.json array file.
+
+    Changes only mark the file dirty; ``flush()`` rewrites it in full, which
+    lets callers coalesce bursts of edits into a single write. With
+    ``background`` set, ``flush()`` only takes a snapshot of the store and a
+    writer thread rewrites the file, so the caller (the GUI thread) does not
+    wait for the disk; flushes made while a write runs are merged into one
+    more write of the latest snapshot. An error of a background write is raised by
+    the next ``flush()`` or by ``close()``.
+    """
+
+    def __init__(self, path, background=False):
+        self.path = path
+        self.background = background
+        self.dirty = False
+        self.write_error = None
+        self._writer = None
+        self._queued = None  # snapshot taken while a write was running
+        self._lock = threading.Lock()
+
+    def load(self):
+        """Return the bookmarks stored on disk"""
+        self.wait_for_writes()
+        self.dirty = False
+        if not os.path.exists(self.path):
+            return []
+        bookmarks = read_bookmarks_json(self.path)
+        self.dirty = dedupe_bookmark_ids(bookmarks)
+        return bookmarks
+
+    def record_add(self, bookmark):
+        self.dirty = True
+
+    def record_update(self, bookmark_id, changes):
+        self.dirty = True
+
+    def record_remove(self, bookmark_id):
+        self.dirty = True
+
+    def record_clear(self):
+        self.dirty = True
+
+    def flush(self, store):
+        """Rewrite the file (or start rewriting it) if anything changed. Returns True if so"""
+        error, self.write_error = self.write_error, None
+        written = self._flush(store) if self.dirty else False
+        if error is not None:
+            # The failed write was retried above, as it left the file dirty
+            raise error
+        return written
+
+    def _flush(self, store):
+        if not self.background:
+            write_bookmarks_json(self.path, store.sorted_bookmarks())
+            self.dirty = False
+            return True
+        # The state as of now; later changes mark the file dirty again
+        snapshot = store.snapshot()
+        self.dirty = False
+        with self._lock:
+            if self._writer is not None:
+                self._queued = snapshot
+                return True
+            self._writer = threading.Thread(
+                target=self._write, args=(snapshot,), name="bookmark-writer", daemon=True
+            )
+            self._writer.start()
+        return True
+
+    def _write(self, snapshot):
+        """Runs on the writer thread"""
+        while snapshot is not None:
+            try:
+                write_bookmarks_json(self.path, snapshot.sorted_bookmarks())
+            except Exception as e:
+                print(f"Error saving bookmarks: {e}")
+                self.write_error = e
+                self.dirty = True
+            with self._lock:
+                snapshot, self._queued = self._queued, None
+                if snapshot is None:
+                    self._writer = None
+
+    def wait_for_writes(self):
+        """Block until background writes have finished"""
+        writer = self._writer
+        if writer is not None:
+            writer.join()
+
+    def close(self):
+        """Wait for background writes, raising the error of a failed one"""
+        self.wait_for_writes()
+        if self.write_error is not None:
+            error, self.write_error = self.write_error, None
+            raise error
+
+
+class BookmarkStore:
+    """
+    Authoritative in-memory copy of all bookmarks.
+
+    Bookmarks are loaded once and indexed by their stable "id". A sorted key
+    list ordered by (filename, time_ms) is kept up to date on every change,
+    so listing never has to re-sort and positions are found by bisection.
+    Every change is reported to the persistence object (a
+    ``JsonArrayPersistence`` or a ``BookmarkJournal``), which decides when
+    and how it reaches the disk. Bookmark dicts are never changed in place
+    (``update()`` replaces them), so ``snapshot()`` only copies the indexes.
+    """
+
+    def __init__(self, persistence):
+        self.persistence = persistence
+        self._by_id = {}
+        self._order = []  # Sorted list of bookmark_sort_key() tuples
+
+    def load(self):
+        """
+        Load bookmarks from disk, replacing the in-memory contents.
+
+        The new contents are swapped in at the end, so readers on other
+        threads see either the old or the new bookmarks, never a mix.
+        """
+        bookmarks = self.persistence.load()
+        by_id = {bookmark["id"]: bookmark for bookmark in bookmarks}
+        order = sorted(bookmark_sort_key(b) for b in bookmarks)
+        self._by_id, self._order = by_id, order
+
+    def flush(self):
+        """Make pending changes durable. Returns True if anything was written"""
+        return self.persistence.flush(self)
+
+    def close(self):
+        """Flush pending changes and release the persistence files"""
+        self.flush()
+        self.persistence.close()
+
+    def import_json(self, path):
+        """
+        Merge bookmarks from a bookmarks.json array file.
+
+        Bookmarks whose id is already in the store are skipped.
+
+        Returns:
+            Number of bookmarks added
+        """
+        added = 0
+        for bookmark in read_bookmarks_json(path):
+            if bookmark["id"] not in self._by_id:
+                self.add(bookmark)
+                added += 1
+        return added
+
+    def snapshot(self):
+        """
+        Copy of the store as of now, which another thread can read while
+        this one keeps changing. It has no persistence and must not be
+        changed.
+        """
+        copy = BookmarkStore(None)
+        copy._by_id = dict(self._by_id)
+        copy._order = list(self._order)
+        return copy
+
+    def export_json(self, path):
+        """Write all bookmarks to a bookmarks.json array file"""
+        write_bookmarks_json(path, self.sorted_bookmarks())
+
+    def __len__(self):
+        return len(self._by_id)
+
+    def __contains__(self, bookmark_id):
+        return bookmark_id in self._by_id
+
+    def get(self, bookmark_id):
+        """Return the bookmark with the given id, or None"""
+        return self._by_id.get(bookmark_id)
+
+    def sorted_bookmarks(self):
+        """Return all bookmarks ordered by (filename, time_ms)"""
+        return [self._by_id[key[2]] for key in self._order]
+
+    def bookmarks_for_file(self, filename):
+        """Return the bookmarks of one file, ordered by time"""
+        start = bisect_left(self._order, (filename,))
+        result = []
+        for key in self._order[start:]:
+            if key[0] != filename:
+                break
+            result.append(self._by_id[key[2]])
+        return result
+
+    def bookmarks_in_range(self, filename, start_ms, end_ms):
+        """Return the bookmarks of one file with start_ms <= time_ms <= end_ms"""
+        lo = bisect_left(self._order, (filename, start_ms))
+        hi = bisect_left(self._order, (filename, end_ms + 1))
+        return [self._by_id[key[2]] for key in self._order[lo:hi]]
+
+    def next_bookmark(self, filename, time_ms):
+        """Return the first bookmark of a file after time_ms, or None"""
+        index = bisect_left(self._order, (filename, time_ms + 1))
+        if index < len(self._order) and self._order[index][0] == filename:
+            return self._by_id[self._order[index][2]]
+        return None
+
+    def previous_bookmark(self, filename, time_ms):
+        """Return the last bookmark of a file before time_ms, or None"""
+        index = bisect_left(self._order, (filename, time_ms)) - 1
+        if index >= 0 and self._order[index][0] == filename:
+            return self._by_id[self._order[index][2]]
+        return None
+
+    def bookmarks_of_type(self, bookmark_type):
+        """Return all bookmarks of one type, ordered by (filename, time_ms)"""
+        return [bookmark for bookmark in self.sorted_bookmarks() if bookmark["type"] == bookmark_type]
+
+    def index_of(self, bookmark_id):
+        """Return the position of a bookmark in sorted order"""
+        bookmark = self._by_id[bookmark_id]
+        return bisect_left(self._order, bookmark_sort_key(bookmark))
+
+    def add(self, bookmark):
+        """
+        Add a new bookmark.
+
+        Args:
+            bookmark: Bookmark dict; an "id" is assigned if it has none
+
+        Returns:
+            The id of the added bookmark
+        """
+        bookmark = normalize_bookmark(dict(bookmark))
+        if bookmark["id"] in self._by_id:
+            raise KeyError(f"Duplicate bookmark id: {bookmark['id']}")
+        self._by_id[bookmark["id"]] = bookmark
+        insort(self._order, bookmark_sort_key(bookmark))
+        self.persistence.record_add(bookmark)
+        return bookmark["id"]
+
+    def update(self, bookmark_id, **changes):
+        """
+        Change fields of an existing bookmark.
+
+        The bookmark dict is replaced by an updated copy, so bookmarks handed
+        out before (e.g. to a snapshot) keep their values.
+
+        Returns:
+            The updated bookmark dict
+        """
+        if "id" in changes:
+            raise ValueError("Bookmark ids cannot be changed")
+        old_bookmark = self._by_id[bookmark_id]
+        old_key = bookmark_sort_key(old_bookmark)
+        bookmark = dict(old_bookmark)
+        bookmark.update(changes)
+        self._by_id[bookmark_id] = bookmark
+        new_key = bookmark_sort_key(bookmark)
+        if new_key != old_key:
+            del self._order[bisect_left(self._order, old_key)]
+            insort(self._order, new_key)
+        self.persistence.record_update(bookmark_id, changes)
+        return bookmark
+
+    def remove(self, bookmark_id):
+        """Remove a bookmark and return it"""
+        bookmark = self._by_id.pop(bookmark_id)
+        del self._order[bisect_left(self._order, bookmark_sort_key(bookmark))]
+        self.persistence.record_remove(bookmark_id)
+        return bookmark
+
+    def clear(self):
+        """Remove all bookmarks"""
+        self._by_id = {}
+        self._order = []
+        self.persistence.record_clear()
@@ -0,0 +1,296 @@
+import hashlib
+import json
+import os
+import threading
+
+# Bytes hashed from each end of a file for the partial hash
+HASH_SAMPLE_BYTES = 64 * 1024
+
+# Block size for full hashes
+HASH_CHUNK_BYTES = 1024 * 1024
+
+
+def new_content_hasher():
+    """Hash object used for full content hashes"""
+    return hashlib.blake2b(digest_size=32)
+
+
+def partial_hash(path, size=None):
+    """
+    Cheap fingerprint of a file: its size plus the first and last
+    HASH_SAMPLE_BYTES. Files with different partial hashes differ; equal
+    partial hashes still need a full hash to confirm.
+    """
+    if size is None:
+        size = os.path.getsize(path)
+    h = hashlib.blake2b(digest_size=16)
+    h.update(str(size).encode("ascii"))
+    with open(path, "rb") as f:
+        h.update(f.read(HASH_SAMPLE_BYTES))
+        if size > HASH_SAMPLE_BYTES:
+            f.seek(max(HASH_SAMPLE_BYTES, size - HASH_SAMPLE_BYTES))
+            h.update(f.read(HASH_SAMPLE_BYTES))
+    return h.hexdigest()
+
+
+def full_hash(path, cancel_event=None):
+    """
+    Hash the whole content of a file, streaming it in blocks.
+
+    Returns:
+        The hex digest, or None if cancel_event was set meanwhile
+    """
+    h = new_content_hasher()
+    with open(path, "rb") as f:
+        while True:
+            if cancel_event is not None and cancel_event.is_set():
+                return None
+            chunk = f.read(HASH_CHUNK_BYTES)
+            if not chunk:
+                break
+            h.update(chunk)
+    return h.hexdigest()
+
+
+class ContentIndex:
+    """
+    Persistent index of the content hashes of the files in the audio folder.
+
+    Entries are keyed by file name and, like MediaInfoCache entries, only
+    trusted while the file's size and modification time match. Each entry
+    has a partial hash, computed on demand, and a full hash once one was
+    needed or the file was copied in (the copy computes it while streaming).
+
+    ``find()`` tells whether a file's content is already stored: only files
+    of the same size are candidates, their partial hashes rule out almost
+    all of them, and full hashes confirm the rest. ``rescan()`` lists the
+    folder by size; a lookup verifies the entries of the same-size files it
+    has not seen since (stat, and a partial hash if the file changed) and
+    then finds matches through a partial hash -> names map, so the cost of
+    one lookup does not grow with the number of files in the folder.
+    ``reserve_name()`` picks a free name for new content whose name is taken
+    by a different file.
+
+    The methods may be called from worker threads; a lock guards the
+    entries, while hashing itself runs outside of it. Importers use
+    ``claim()`` rather than ``find()``: it makes "look up, then store" of the
+    same content happen one import at a time, so parallel imports of
+    identical files store it only once.
+    """
+
+    def __init__(self, path, folder):
+        self.path = path
+        self.folder = folder
+        self._entries = {}
+        self._reserved = set()
+        self._unchecked = None  # size -> names not verified since rescan()
+        self._by_partial = {}  # partial hash -> names of verified entries
+        self._claims = {}  # partial hash -> threading.Event set when its import is done
+        self._lock = threading.Lock()
+        self.dirty = False
+
+    def load(self):
+        """Read the index file, if any"""
+        with self._lock:
+            self._entries = {}
+            self.dirty = False
+            if not os.path.exists(self.path):
+                return
+            try:
+                with open(self.path, "r", encoding="utf-8") as f:
+                    self._entries = json.load(f)
+            except Exception as e:
+                print(f"Error loading content index: {e}")
+
+    def flush(self):
+        """Write the index if it changed. Returns True if it was written"""
+        with self._lock:
+            if not self.dirty:
+                return False
+            data = json.dumps(self._entries, ensure_ascii=False)
+            self.dirty = False
+        tmp_path = self.path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            f.write(data)
+        os.replace(tmp_path, self.path)
+        return True
+
+    def _entry(self, name, st):
+        """Return the up to date entry of a stored file, creating it if needed"""
+        with self._lock:
+            entry = self._entries.get(name)
+            if entry and entry["size"] == st.st_size and entry["mtime_ns"] == st.st_mtime_ns:
+                return entry
+        entry = {
+            "size": st.st_size,
+            "mtime_ns": st.st_mtime_ns,
+            "partial": partial_hash(os.path.join(self.folder, name), st.st_size),
+            "full": None,
+        }
+        with self._lock:
+            self._entries[name] = entry
+            self.dirty = True
+        return entry
+
+    def rescan(self):
+        """List the folder again, picking up files added or changed outside of imports"""
+        by_size = {}
+        for dir_entry in os.scandir(self.folder):
+            if dir_entry.is_file() and not dir_entry.name.endswith(".part"):
+                by_size.setdefault(dir_entry.stat().st_size, set()).add(dir_entry.name)
+        with self._lock:
+            self._unchecked = by_size
+            self._by_partial = {}
+
+    def _verified(self, name, entry):
+        with self._lock:
+            self._by_partial.setdefault(entry["partial"], set()).add(name)
+
+    def _full_hash_of(self, name, entry, cancel_event=None):
+        if entry["full"] is None:
+            digest = full_hash(os.path.join(self.folder, name), cancel_event)
+            if digest is None:
+                return None
+            with self._lock:
+                entry["full"] = digest
+                self.dirty = True
+        return entry["full"]
+
+    def find(self, source, cancel_event=None, size=None, source_partial=None):
+        """
+        Look for a stored file with the same content as source.
+
+        Args:
+            source: File to look for
+            cancel_event: threading.Event that aborts full hashing
+            size: Size of source, if already known
+            source_partial: Partial hash of source, if already known
+
+        Returns:
+            (name of the stored file or None, full hash of source or None).
+            The full hash is only computed when a candidate needed it.
+        """
+        if size is None:
+            size = os.path.getsize(source)
+        if self._unchecked is None:
+            self.rescan()
+        # Names stay unchecked until verified, so a lookup of the same size
+        # on another thread meanwhile verifies them too instead of missing them
+        with self._lock:
+            unchecked = list(self._unchecked.get(size, ()))
+        for name in unchecked:
+            try:
+                st = os.stat(os.path.join(self.folder, name))
+            except OSError:
+                continue
+            self._verified(name, self._entry(name, st))
+        if unchecked:
+            with self._lock:
+                remaining = self._unchecked.get(size)
+                if remaining is not None:
+                    remaining.difference_update(unchecked)
+                    if not remaining:
+                        del self._unchecked[size]
+
+        if source_partial is None:
+            source_partial = partial_hash(source, size)
+        with self._lock:
+            candidates = sorted(self._by_partial.get(source_partial, ()))
+        source_full = None
+        for name in candidates:
+            entry = self._entries.get(name)
+            if entry is None or entry["partial"] != source_partial:
+                continue
+            if source_full is None:
+                source_full = full_hash(source, cancel_event)
+            stored_full = self._full_hash_of(name, entry, cancel_event)
+            if source_full is None or stored_full is None:
+                # Canceled
+                return None, None
+            if stored_full == source_full:
+                return name, source_full
+        return None, source_full
+
+    def claim(self, source, cancel_event=None, size=None):
+        """
+        Look for stored content like find(), claiming it if it is not stored.
+
+        While a claim is held, claims of content with the same partial hash
+        on other threads wait for ``release()`` and then look again, so they
+        find the file the holder stored instead of storing it a second time.
+
+        Args:
+            source: File to look for
+            cancel_event: threading.Event that aborts waiting and full hashing
+            size: Size of source, if already known
+
+        Returns:
+            (name of the stored file or None, full hash of source or None,
+            claim or None). A claim is returned when the content has to be
+            stored; pass it to release() once stored (or failed).
+        """
+        if size is None:
+            size = os.path.getsize(source)
+        source_partial = partial_hash(source, size)
+        while True:
+            with self._lock:
+                busy = self._claims.get(source_partial)
+                if busy is None:
+                    self._claims[source_partial] = threading.Event()
+                    break
+            while not busy.wait(0.1):
+                if cancel_event is not None and cancel_event.is_set():
+                    return None, None, None
+        try:
+            name, digest = self.find(source, cancel_event, size, source_partial)
+        except BaseException:
+            self.release(source_partial)
+            raise
+        if name is not None or (cancel_event is not None and cancel_event.is_set()):
+            self.release(source_partial)
+            return name, digest, None
+        return None, digest, source_partial
+
+    def release(self, claim):
+        """Give up a claim from claim(), waking the imports waiting for it"""
+        with self._lock:
+            done = self._claims.pop(claim, None)
+        if done is not None:
+            done.set()
+
+    def reserve_name(self, filename):
+        """
+        Return a file name for new content, unused in the folder and not
+        reserved by another import: the original name if possible, else
+        "name (2).ext", "name (3).ext"...
+        """
+        stem, ext = os.path.splitext(filename)
+        with self._lock:
+            name = filename
+            counter = 2
+            while name in self._reserved or os.path.exists(os.path.join(self.folder, name)):
+                name = f"{stem} ({counter}){ext}"
+                counter += 1
+            self._reserved.add(name)
+        return name
+
+    def release_name(self, name):
+        """Give up a name from reserve_name() that was not used"""
+        with self._lock:
+            self._reserved.discard(name)
+
+    def add(self, name, digest=None):
+        """Record a file just stored under name, with its full hash if known"""
+        path = os.path.join(self.folder, name)
+        st = os.stat(path)
+        entry = {
+            "size": st.st_size,
+            "mtime_ns": st.st_mtime_ns,
+            "partial": partial_hash(path, st.st_size),
+            "full": digest,
+        }
+        with self._lock:
+            self._reserved.discard(name)
+            self._entries[name] = entry
+            self._by_partial.setdefault(entry["partial"], set()).add(name)
+            self.dirty = True
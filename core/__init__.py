@@ -0,0 +1,35 @@
+"""
+Qt-free core of the bookmark player: bookmark storage and indexes,
+library resolution and playback control over an abstract player, so the
+logic can be run, tested and benchmarked without a GUI or audio device.
+"""
+
+from bookmark_journal import BookmarkJournal
+from bookmark_search import BookmarkSearchIndex
+from bookmark_segments import SegmentIndex
+from bookmark_sqlite import SqliteBookmarkStore
+from bookmark_store import BOOKMARK_TYPES, BookmarkStore, JsonArrayPersistence
+from library_index import LibraryIndex, repair_bookmark_paths
+from core.fake_player import FakeClock, FakePlayer
+from core.files import BookmarkFiles
+from core.playback import PlaybackController
+from core.player import Player
+from core.seek_scheduler import SeekScheduler
+
+__all__ = [
+    "BOOKMARK_TYPES",
+    "BookmarkFiles",
+    "BookmarkJournal",
+    "BookmarkSearchIndex",
+    "BookmarkStore",
+    "FakeClock",
+    "FakePlayer",
+    "JsonArrayPersistence",
+    "LibraryIndex",
+    "PlaybackController",
+    "Player",
+    "SeekScheduler",
+    "SegmentIndex",
+    "SqliteBookmarkStore",
+    "repair_bookmark_paths",
+]
@@ -0,0 +1,248 @@
+"""
+Latency benchmark of the core, runnable without a GUI or audio device:
+
+    python -m core.benchmark [--bookmarks N] [--jumps N] [--seeks N] [--drags N] [--saves N] [--json]
+
+Jumps and seeks run against a FakePlayer on a FakeClock, so their
+"simulated" latencies follow the fake's delays and are repeatable for a
+seed; the "call" figures are the real time spent in the core per request
+(path resolution and controller). Drags move a slider for a second, one
+position per frame, through a SeekScheduler; their latencies run from
+the release of the slider to audio at the final position. Saves are
+real: one edit plus flush per sample, for each storage backend, in a
+temporary directory.
+"""
+
+import argparse
+import json
+import math
+import os
+import random
+import shutil
+import sys
+import tempfile
+import time
+
+from bookmark_journal import BookmarkJournal
+from bookmark_sqlite import SqliteBookmarkStore
+from bookmark_store import BookmarkStore, JsonArrayPersistence, new_bookmark_id
+from library_index import LibraryIndex
+from core.fake_player import FakeClock, FakePlayer
+from core.files import BookmarkFiles
+from core.playback import PlaybackController
+from core.seek_scheduler import SeekScheduler
+
+
+def percentile(values, p):
+    """Nearest-rank percentile of a list of numbers (None if empty)"""
+    if not values:
+        return None
+    ordered = sorted(values)
+    rank = max(1, math.ceil(p / 100 * len(ordered)))
+    return ordered[rank - 1]
+
+
+def summarize(values):
+    """count, p50, p99 and max of latencies in ms"""
+    return {
+        "count": len(values),
+        "p50_ms": percentile(values, 50),
+        "p99_ms": percentile(values, 99),
+        "max_ms": max(values) if values else None,
+    }
+
+
+def make_bookmarks(count, filenames, rng):
+    """Synthetic bookmarks spread over the given files"""
+    bookmarks = []
+    for index in range(count):
+        filename = rng.choice(filenames)
+        bookmarks.append({
+            "id": new_bookmark_id(),
+            "file": filename,
+            "filename": filename,
+            "time_ms": rng.randrange(0, 300000),
+            "name": f"Bookmark {index}",
+            "type": rng.choice(("Regular", "Start", "End")),
+            "timestamp": "2024-01-01 12:00:00",
+        })
+    return bookmarks
+
+
+def make_library(root, file_count):
+    """
+    Audio folder under root with small placeholder files, indexed.
+
+    Returns:
+        (LibraryIndex, audio folder, file names)
+    """
+    folder = os.path.join(root, "audio_files")
+    os.makedirs(folder, exist_ok=True)
+    filenames = []
+    for index in range(file_count):
+        filename = f"track {index:04d}.mp3"
+        with open(os.path.join(folder, filename), "wb") as f:
+            f.write(os.urandom(256))
+        filenames.append(filename)
+    library = LibraryIndex(os.path.join(root, "library_index.json"), folder)
+    library.refresh()
+    return library, folder, filenames
+
+
+def bench_playback(bookmarks, files, jumps, seeks, seed):
+    """Jump and seek latencies against the fake player"""
+    rng = random.Random(seed)
+    clock = FakeClock()
+    player = FakePlayer(clock, seed=seed)
+    controller = PlaybackController(player, files, clock=clock.time)
+    jump_calls = []
+    for _ in range(jumps):
+        bookmark = rng.choice(bookmarks)
+        started = time.perf_counter()
+        controller.jump_to_bookmark(bookmark)
+        jump_calls.append((time.perf_counter() - started) * 1000)
+        clock.run_until(lambda: not controller.busy)
+        clock.advance(rng.uniform(0, 500))
+
+    seek_calls = []
+    for _ in range(seeks):
+        target_ms = rng.randrange(0, max(1, controller.length_ms))
+        started = time.perf_counter()
+        controller.seek(target_ms)
+        seek_calls.append((time.perf_counter() - started) * 1000)
+        clock.run_until(lambda: not controller.busy)
+        clock.advance(rng.uniform(0, 200))
+    return {
+        "jump_simulated": summarize(list(controller.jump_latencies_ms)),
+        "jump_call": summarize(jump_calls),
+        "seek_simulated": summarize(list(controller.seek_latencies_ms)),
+        "seek_call": summarize(seek_calls),
+    }
+
+
+class _SchedulerEvents:
+    """Player event handler feeding time events to a SeekScheduler"""
+
+    def __init__(self, scheduler):
+        self.scheduler = scheduler
+
+    def on_time_changed(self, ms):
+        self.scheduler.on_time_changed(ms)
+
+    def on_length_changed(self, ms):
+        pass
+
+    def on_end_reached(self):
+        pass
+
+
+def bench_drags(drags, seed, frame_ms=16, drag_ms=1000):
+    """Slider drags against the fake player, seeks coalesced by a SeekScheduler"""
+    rng = random.Random(seed)
+    clock = FakeClock()
+    player = FakePlayer(clock, seed=seed)
+    timer = []
+
+    def start_timer(ms):
+        stop_timer()
+        timer.append(clock.call_later(ms, scheduler.expire))
+
+    def stop_timer():
+        while timer:
+            clock.cancel(timer.pop())
+
+    scheduler = SeekScheduler(player.seek, clock=clock.time, start_timer=start_timer, stop_timer=stop_timer)
+    player.set_event_handler(_SchedulerEvents(scheduler))
+    player.open("track.mp3")
+    clock.advance(200)
+    release_latencies = []
+    for _ in range(drags):
+        position_ms = rng.randrange(0, player.length_ms())
+        for _ in range(drag_ms // frame_ms):
+            position_ms = min(max(0, position_ms + rng.randrange(-3000, 3000)), player.length_ms() - 1)
+            scheduler.request(position_ms)
+            clock.advance(frame_ms)
+        scheduler.seek_now(position_ms)
+        released = clock.time()
+        clock.run_until(lambda: not scheduler.busy)
+        release_latencies.append((clock.time() - released) * 1000)
+        clock.advance(rng.uniform(100, 500))
+    return {
+        "drag_release": summarize(release_latencies),
+        "drag_seek": summarize(list(scheduler.latencies_ms)),
+    }
+
+
+def bench_saves(bookmarks, folder, saves, seed):
+    """Edit-and-flush latency of each storage backend"""
+    rng = random.Random(seed)
+    json_path = os.path.join(folder, "bookmarks.json")
+    backends = {
+        "json": lambda: BookmarkStore(JsonArrayPersistence(json_path)),
+        "journal": lambda: BookmarkStore(BookmarkJournal(os.path.join(folder, "bookmarks.snapshot.json"))),
+        "sqlite": lambda: SqliteBookmarkStore(os.path.join(folder, "bookmarks.db")),
+    }
+    results = {}
+    for name, create in backends.items():
+        store = create()
+        store.load()
+        for bookmark in bookmarks:
+            store.add(dict(bookmark))
+        store.flush()
+        ids = [bookmark["id"] for bookmark in bookmarks]
+        latencies = []
+        for index in range(saves):
+            started = time.perf_counter()
+            store.update(rng.choice(ids), name=f"Edited {index}")
+            store.flush()
+            latencies.append((time.perf_counter() - started) * 1000)
+        store.close()
+        results[f"save_{name}"] = summarize(latencies)
+    return results
+
+
+def run(bookmark_count=10000, file_count=200, jumps=1000, seeks=1000, saves=200, seed=0, drags=100):
+    """Run all benchmarks and return {metric: summary}"""
+    rng = random.Random(seed)
+    folder = tempfile.mkdtemp(prefix="bookmark-bench-")
+    try:
+        library, audio_folder, filenames = make_library(folder, file_count)
+        bookmarks = make_bookmarks(bookmark_count, filenames, rng)
+        results = bench_playback(bookmarks, BookmarkFiles(library, audio_folder), jumps, seeks, seed)
+        results.update(bench_drags(drags, seed))
+        results.update(bench_saves(bookmarks, folder, saves, seed))
+    finally:
+        shutil.rmtree(folder, ignore_errors=True)
+    return results
+
+
+def format_results(results):
+    lines = [f"{'metric':<18}{'count':>7}{'p50 ms':>10}{'p99 ms':>10}{'max ms':>10}"]
+    for metric, summary in results.items():
+        values = [summary[key] for key in ("p50_ms", "p99_ms", "max_ms")]
+        cells = "".join(f"{value:>10.3f}" if value is not None else f"{'-':>10}" for value in values)
+        lines.append(f"{metric:<18}{summary['count']:>7}{cells}")
+    return "\n".join(lines)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Jump, seek and save latency of the bookmark core")
+    parser.add_argument("--bookmarks", type=int, default=10000, help="number of bookmarks")
+    parser.add_argument("--files", type=int, default=200, help="number of audio files")
+    parser.add_argument("--jumps", type=int, default=1000)
+    parser.add_argument("--seeks", type=int, default=1000)
+    parser.add_argument("--drags", type=int, default=100)
+    parser.add_argument("--saves", type=int, default=200)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--json", action="store_true", help="print the results as JSON")
+    args = parser.parse_args(argv)
+    results = run(args.bookmarks, args.files, args.jumps, args.seeks, args.saves, args.seed, args.drags)
+    if args.json:
+        print(json.dumps(results, indent=2))
+    else:
+        print(format_results(results))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,206 @@
+import heapq
+import random
+
+from core.player import Player
+
+
+class FakeClock:
+    """
+    Simulated clock with scheduled callbacks.
+
+    Nothing happens on its own: ``advance()`` moves the time forward and
+    runs the callbacks that fall due, in order. ``time()`` returns seconds
+    like time.perf_counter, so it can stand in for it.
+    """
+
+    def __init__(self):
+        self.now_ms = 0.0
+        self._queue = []  # heap of (due_ms, sequence, callback)
+        self._sequence = 0
+        self._canceled = set()
+
+    def time(self):
+        return self.now_ms / 1000
+
+    def call_later(self, delay_ms, callback):
+        """Run callback delay_ms from now. Returns a handle for cancel()"""
+        self._sequence += 1
+        heapq.heappush(self._queue, (self.now_ms + max(0.0, delay_ms), self._sequence, callback))
+        return self._sequence
+
+    def cancel(self, handle):
+        self._canceled.add(handle)
+
+    def advance(self, ms):
+        """Move the time forward by ms, running the callbacks due meanwhile"""
+        end_ms = self.now_ms + ms
+        while self._queue and self._queue[0][0] <= end_ms:
+            due_ms, sequence, callback = heapq.heappop(self._queue)
+            if sequence in self._canceled:
+                self._canceled.discard(sequence)
+                continue
+            self.now_ms = max(self.now_ms, due_ms)
+            callback()
+        self.now_ms = end_ms
+
+    def run_until(self, condition, timeout_ms=10000, step_ms=1):
+        """Advance in steps until condition() is true. Returns whether it became true"""
+        waited = 0
+        while not condition():
+            if waited >= timeout_ms:
+                return False
+            self.advance(step_ms)
+            waited += step_ms
+        return True
+
+
+class FakePlayer(Player):
+    """
+    Deterministic player for tests and benchmarks, needing no audio device.
+
+    Opening a file and seeking take a simulated delay, drawn uniformly from
+    a (min, max) range with a seeded random generator, so a run can be
+    repeated exactly. While playing, a time event is reported every
+    ``event_interval_ms`` like libvlc does, and the end of the file is
+    reported once its length is reached.
+
+    Args:
+        clock: FakeClock driving the player
+        load_delay_ms: (min, max) delay from open() to the first time event
+        seek_delay_ms: (min, max) delay from seek() to the time event at the target
+        event_interval_ms: Interval of the time events while playing
+        lengths: Dict of path -> length in ms; other files last default_length_ms
+        seed: Seed of the delay generator
+    """
+
+    def __init__(self, clock, load_delay_ms=(40, 120), seek_delay_ms=(5, 40), event_interval_ms=50,
+                 lengths=None, default_length_ms=300000, seed=0):
+        self.handler = None
+        self.clock = clock
+        self.load_delay_ms = load_delay_ms
+        self.seek_delay_ms = seek_delay_ms
+        self.event_interval_ms = event_interval_ms
+        self.lengths = lengths or {}
+        self.default_length_ms = default_length_ms
+        self.random = random.Random(seed)
+        self.path = None
+        self._length_ms = 0
+        self._position_ms = 0
+        self._position_at = 0.0  # clock time of _position_ms
+        self._playing = False
+        self._loading = False
+        self._seeking = False
+        self._play_after_seek = False
+        self._pending = []  # handles of scheduled callbacks
+
+    def _delay(self, delay_range):
+        return self.random.uniform(*delay_range)
+
+    def _schedule(self, delay_ms, callback):
+        self._pending.append(self.clock.call_later(delay_ms, callback))
+
+    def _cancel_pending(self):
+        for handle in self._pending:
+            self.clock.cancel(handle)
+        self._pending = []
+
+    def _emit(self, name, *args):
+        if self.handler is not None:
+            getattr(self.handler, name)(*args)
+
+    def _set_position(self, position_ms):
+        self._position_ms = position_ms
+        self._position_at = self.clock.now_ms
+
+    def open(self, path, start_ms=0):
+        self._cancel_pending()
+        self.path = path
+        self._playing = False
+        self._seeking = False
+        self._loading = True
+        self._length_ms = self.lengths.get(path, self.default_length_ms)
+        self._set_position(start_ms)
+        self._schedule(self._delay(self.load_delay_ms), self._loaded)
+
+    def _loaded(self):
+        self._loading = False
+        self._emit("on_length_changed", self._length_ms)
+        self._start_ticking()
+
+    def _start_ticking(self):
+        self._playing = True
+        self._set_position(self._position_ms)
+        self._emit("on_time_changed", int(self._position_ms))
+        self._schedule(self.event_interval_ms, self._tick)
+
+    def _tick(self):
+        if not self._playing:
+            return
+        position_ms = self.time_ms()
+        if position_ms >= self._length_ms:
+            self._playing = False
+            self._set_position(self._length_ms)
+            self._emit("on_end_reached")
+            return
+        self._set_position(position_ms)
+        self._emit("on_time_changed", int(position_ms))
+        self._schedule(self.event_interval_ms, self._tick)
+
+    def play(self):
+        if self._seeking:
+            self._play_after_seek = True
+            return
+        if self.path is None or self._playing or self._loading:
+            return
+        self._cancel_pending()
+        self._start_ticking()
+
+    def pause(self):
+        if self._seeking:
+            self._play_after_seek = False
+            return
+        if self._playing:
+            self._set_position(self.time_ms())
+        self._playing = False
+        self._cancel_pending()
+
+    def stop(self):
+        self._cancel_pending()
+        self._playing = False
+        self._loading = False
+        self._seeking = False
+        self._set_position(0)
+
+    def seek(self, time_ms):
+        if self.path is None:
+            return
+        if self._loading:
+            # Start there once loaded
+            self._set_position(time_ms)
+            return
+        if not self._seeking:
+            self._play_after_seek = self._playing
+        self._cancel_pending()
+        self._playing = False
+        self._seeking = True
+
+        def done():
+            self._seeking = False
+            self._set_position(min(max(0, time_ms), self._length_ms))
+            if self._play_after_seek:
+                self._start_ticking()
+            else:
+                self._emit("on_time_changed", int(self._position_ms))
+
+        self._schedule(self._delay(self.seek_delay_ms), done)
+
+    def is_playing(self):
+        return self._playing
+
+    def time_ms(self):
+        if not self._playing:
+            return self._position_ms
+        return min(self._length_ms, self._position_ms + self.clock.now_ms - self._position_at)
+
+    def length_ms(self):
+        return self._length_ms
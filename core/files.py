@@ -0,0 +1,53 @@
+import os
+
+
+class BookmarkFiles:
+    """
+    Maps bookmarks to audio files and back.
+
+    Bookmarks store the path of their file relative to the audio folder
+    when it is inside of it, absolute otherwise. Files are found through
+    the library index, including files that were moved or renamed inside
+    the folder (by fingerprint).
+    """
+
+    def __init__(self, library, audio_folder):
+        self.library = library
+        self.audio_folder = audio_folder
+
+    def resolve_stored_path(self, stored_path):
+        """
+        Resolve a stored path (could be relative or absolute) to a file path.
+
+        Returns:
+            The file found by the library, or else the stored path itself,
+            taken as relative to the audio folder unless it is absolute
+        """
+        resolved = self.library.resolve(stored_path)
+        if resolved:
+            return resolved
+        if os.path.isabs(stored_path):
+            return stored_path
+        return os.path.join(self.audio_folder, stored_path)
+
+    def file_of(self, bookmark):
+        """
+        Resolve the file of a bookmark.
+
+        Returns:
+            (file path, moved), where moved tells that the file was found by
+            fingerprint rather than at its stored path, so stored paths need
+            repairing (see library_index.repair_bookmark_paths())
+        """
+        path = self.library.resolve_bookmark(bookmark)
+        if path is None:
+            return self.resolve_stored_path(bookmark["file"]), False
+        return path, self.library.resolve(bookmark["file"]) is None
+
+    def stored_path(self, file_path):
+        """
+        Path of a file as stored in bookmarks: relative to the audio folder
+        for files inside it, absolute otherwise.
+        """
+        relative_path = self.library.relative_path(os.path.abspath(file_path))
+        return relative_path if relative_path is not None else file_path
@@ -0,0 +1,180 @@
+import os
+import threading
+import time
+from collections import deque
+
+# A time event within this distance after the target completes a jump or seek
+ARRIVAL_TOLERANCE_MS = 1000
+
+
+def seek_arrived(ms, target_ms, from_ms):
+    """
+    Whether a time event shows that a seek arrived at its target.
+
+    Time events of the playback before the seek keep coming in for a
+    while, so after a backward seek only a time before the position the
+    seek left from counts.
+
+    Args:
+        ms: Time of the event
+        target_ms: Target of the seek
+        from_ms: Time of the last event before the seek was issued, None
+            if unknown (e.g. a file just opened)
+    """
+    if not target_ms <= ms <= target_ms + ARRIVAL_TOLERANCE_MS:
+        return False
+    return from_ms is None or target_ms >= from_ms or ms < from_ms
+
+
+class PlaybackController:
+    """
+    Playback logic independent of any GUI: opening files at an offset,
+    jumping to bookmarks and seeking, on top of a core.player.Player.
+    The player application drives its libvlc player through it (with a
+    VlcPlayer), as do the benchmarks.
+
+    The controller follows the player through its events (it is the
+    player's event handler) and measures every jump and seek: the time from
+    the request until the first time event at the target, which is when
+    audio is playing from there. Latencies are kept in
+    ``jump_latencies_ms`` and ``seek_latencies_ms``.
+
+    Args:
+        player: The Player to drive
+        files: core.files.BookmarkFiles, needed by jump_to_bookmark()
+        clock: Callable returning seconds, time.perf_counter by default
+            (a FakeClock's time for simulated runs)
+    """
+
+    def __init__(self, player, files=None, clock=None):
+        self.player = player
+        self.files = files
+        self.clock = clock or time.perf_counter
+        self.current_path = None
+        self.position_ms = 0
+        self.length_ms = 0
+        self.ended = False
+        self.started = False  # whether the player was started since the file was loaded or stopped
+        self.jump_latencies_ms = deque(maxlen=1000)
+        self.seek_latencies_ms = deque(maxlen=1000)
+        self._pending = None  # (latencies, target_ms, started, from_ms) of the jump or seek in flight
+        self._event_ms = None  # time of the last time event of the current file
+        self._lock = threading.Lock()
+        player.set_event_handler(self)
+
+    @property
+    def busy(self):
+        """Whether a jump or seek has not arrived yet"""
+        return self._pending is not None
+
+    def open(self, path, start_ms=0):
+        """Load a file and play it from start_ms"""
+        with self._lock:
+            self.current_path = os.path.abspath(path)
+            self.position_ms = start_ms
+            self.length_ms = 0
+            self.ended = False
+            self.started = True
+            self._event_ms = None
+            self._pending = (self.jump_latencies_ms, start_ms, self.clock(), None)
+        self.player.open(path, start_ms)
+
+    def adopt(self, path, start_ms=0, started=False):
+        """
+        Follow a file the player was given without open(): loaded but not
+        started yet, or started at start_ms (e.g. a pre-rolled player swapped
+        in, whose arrival is then measured like a jump).
+        """
+        with self._lock:
+            self.current_path = os.path.abspath(path)
+            self.position_ms = start_ms
+            self.length_ms = 0
+            self.ended = False
+            self.started = started
+            self._event_ms = None
+            self._pending = (self.jump_latencies_ms, start_ms, self.clock(), None) if started else None
+
+    def jump(self, path, time_ms):
+        """
+        Play a file from time_ms, seeking if it is already playing or paused.
+
+        Returns:
+            True if the file was (re)opened at time_ms, False if it seeked
+        """
+        if not self.can_seek(path):
+            self.open(path, time_ms)
+            return True
+        with self._lock:
+            self.position_ms = time_ms
+            self._pending = (self.jump_latencies_ms, time_ms, self.clock(), self._event_ms)
+        self.player.seek(time_ms)
+        self.player.play()
+        return False
+
+    def can_seek(self, path):
+        """Whether jumping within path can seek, rather than reopen it"""
+        # A player that was not started (or was stopped) cannot seek yet
+        return self.current_path == os.path.abspath(path) and not self.ended and self.started
+
+    def jump_to_bookmark(self, bookmark):
+        """
+        Play a bookmark's file from the bookmark.
+
+        Returns:
+            The file path, and whether it was found by fingerprint (see
+            BookmarkFiles.file_of())
+        """
+        path, moved = self.files.file_of(bookmark)
+        self.jump(path, bookmark["time_ms"])
+        return path, moved
+
+    def seek(self, time_ms):
+        """Move within the current file"""
+        if self.current_path is None:
+            return
+        if self.length_ms > 0:
+            time_ms = min(time_ms, self.length_ms)
+        time_ms = max(0, time_ms)
+        with self._lock:
+            self.position_ms = time_ms
+            self._pending = (self.seek_latencies_ms, time_ms, self.clock(), self._event_ms)
+        self.player.seek(time_ms)
+
+    def seek_relative(self, offset_ms):
+        self.seek(self.position_ms + offset_ms)
+
+    def pause(self):
+        self.player.pause()
+
+    def play(self):
+        self.started = True
+        self.player.play()
+
+    def stop(self):
+        with self._lock:
+            self._pending = None
+            self._event_ms = None
+            self.position_ms = 0
+            self.started = False
+        self.player.stop()
+
+    # Player events
+
+    def on_time_changed(self, ms):
+        with self._lock:
+            self.position_ms = ms
+            self._event_ms = ms
+            if self._pending is not None:
+                latencies, target_ms, started, from_ms = self._pending
+                if seek_arrived(ms, target_ms, from_ms):
+                    latencies.append((self.clock() - started) * 1000)
+                    self._pending = None
+
+    def on_length_changed(self, ms):
+        if ms > 0:
+            self.length_ms = ms
+
+    def on_end_reached(self):
+        with self._lock:
+            self.ended = True
+            self.position_ms = self.length_ms
@@ -0,0 +1,40 @@
+class Player:
+    """
+    Audio player driven by the core. Times are in milliseconds.
+
+    Backends report playback through the handler set with
+    ``set_event_handler()``: an object with ``on_time_changed(ms)``,
+    ``on_length_changed(ms)`` and ``on_end_reached()`` methods, such as a
+    PlaybackController. Backends may call it from their own threads.
+    """
+
+    def set_event_handler(self, handler):
+        self.handler = handler
+
+    def open(self, path, start_ms=0):
+        """Load a file and start playing it at start_ms"""
+        raise NotImplementedError
+
+    def play(self):
+        raise NotImplementedError
+
+    def pause(self):
+        raise NotImplementedError
+
+    def stop(self):
+        raise NotImplementedError
+
+    def seek(self, time_ms):
+        """Move the playback position; playing or paused state is kept"""
+        raise NotImplementedError
+
+    def is_playing(self):
+        raise NotImplementedError
+
+    def time_ms(self):
+        """Current playback position"""
+        raise NotImplementedError
+
+    def length_ms(self):
+        """Length of the loaded file, 0 while unknown"""
+        raise NotImplementedError
@@ -0,0 +1,119 @@
+"""
+Seek-to-audio latency of libvlc for each caching profile:
+
+    python -m core.seek_benchmark FILE [FILE ...] [--profiles default,local,nfs]
+                                  [--seeks N] [--json] [player settings flags]
+
+For every profile, a libvlc instance is created with the settings the
+player would use (config file and flags, with the profile's caching
+values) and each file is opened and then seeked to random positions while
+playing. A latency is the time from the request until libvlc reports the
+playback clock at the target (see PlaybackController), so it includes the
+granularity of libvlc's time events. Unlike core.benchmark this needs
+libvlc and real files; run it against files on the share to tune for.
+"""
+
+import argparse
+import json
+import random
+import sys
+import time
+
+import vlc
+
+from core.benchmark import format_results, summarize
+from core.playback import PlaybackController
+from core.vlc_player import VlcPlayer
+from player_config import add_player_arguments, config_from_args
+
+
+def wait_until(condition, timeout_s):
+    """Poll condition() until it is true. Returns whether it became true"""
+    deadline = time.perf_counter() + timeout_s
+    while not condition():
+        if time.perf_counter() >= deadline:
+            return False
+        time.sleep(0.001)
+    return True
+
+
+def bench_profile(config, paths, seeks, seed, timeout_s=10.0, settle_s=0.3):
+    """
+    Open and seek latencies with one PlayerConfig.
+
+    Returns:
+        {"open": summary, "seek": summary, "timeouts": count}
+    """
+    instance = vlc.Instance(config.instance_args())
+    if instance is None:
+        raise RuntimeError(f"libvlc could not be initialized with {config.instance_args()}")
+    player = VlcPlayer(instance, config.media_options)
+    controller = PlaybackController(player)
+    rng = random.Random(seed)
+    timeouts = 0
+    try:
+        for path in paths:
+            controller.open(path)
+            if not wait_until(lambda: not controller.busy and controller.length_ms > 0, timeout_s):
+                timeouts += 1
+                continue
+            for _ in range(seeks):
+                target_ms = rng.randrange(0, max(1, controller.length_ms - 5000))
+                controller.seek(target_ms)
+                if not wait_until(lambda: not controller.busy, timeout_s):
+                    timeouts += 1
+                # Play a little from there, as a listener would
+                time.sleep(settle_s)
+    finally:
+        controller.stop()
+        player.media_player.release()
+        instance.release()
+    return {
+        "open": summarize(list(controller.jump_latencies_ms)),
+        "seek": summarize(list(controller.seek_latencies_ms)),
+        "timeouts": timeouts,
+    }
+
+
+def run(config, profiles, paths, seeks=50, seed=0):
+    """Run bench_profile() for every profile. Returns {profile: results}"""
+    results = {}
+    for profile in profiles:
+        profile_config = config.with_profile(profile)
+        results[profile] = bench_profile(profile_config, paths, seeks, seed)
+        results[profile]["settings"] = profile_config.describe()
+    return results
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Seek-to-audio latency of libvlc per caching profile")
+    parser.add_argument("files", nargs="+", help="audio files to seek in")
+    parser.add_argument("--profiles", help="comma-separated caching profiles (all by default)")
+    parser.add_argument("--seeks", type=int, default=50, help="seeks per file and profile")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--json", action="store_true", help="print the results as JSON")
+    add_player_arguments(parser)
+    args = parser.parse_args(argv)
+    try:
+        config = config_from_args(args)
+    except (OSError, ValueError) as e:
+        parser.error(f"player settings: {e}")
+    profiles = args.profiles.split(",") if args.profiles else list(config.profiles)
+    unknown = [profile for profile in profiles if profile not in config.profiles]
+    if unknown:
+        parser.error(f"unknown profiles: {', '.join(unknown)}")
+
+    results = run(config, profiles, args.files, args.seeks, args.seed)
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return 0
+    for profile, result in results.items():
+        print(f"{profile}: {result['settings']}" + (f" ({result['timeouts']} timeouts)" if result["timeouts"] else ""))
+    print(format_results({
+        f"{profile} {kind}": result[kind] for profile, result in results.items() for kind in ("open", "seek")
+    }))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
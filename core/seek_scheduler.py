@@ -0,0 +1,137 @@
+import time
+from collections import deque
+
+from core.playback import seek_arrived
+
+
+class SeekScheduler:
+    """
+    Coalesces seek requests so the player only ever works on one seek.
+
+    A request made while no seek is in flight is issued right away. While
+    one is in flight, later requests only replace the pending target
+    (latest wins; a replaced target counts as dropped), which is issued
+    once the seek in flight completes. A seek completes with the first
+    time event at its target that came after it was issued (see
+    core.playback.seek_arrived()), or after ``timeout_ms`` without one (libvlc
+    may send none while paused). ``seek_now()`` issues a final target
+    immediately, e.g. when the slider is released.
+
+    Timeouts need a timer from the owner: ``start_timer(ms)`` and
+    ``stop_timer()`` are called by the scheduler, and the owner calls
+    ``expire()`` when the timer fires (with a Qt single-shot QTimer,
+    ``start_timer=timer.start, stop_timer=timer.stop`` and timeout
+    connected to expire).
+
+    Args:
+        seek: Callable moving the player to a time in ms
+        clock: Callable returning seconds, time.perf_counter by default
+        start_timer: Callable starting the timeout timer, given ms
+        stop_timer: Callable stopping the timeout timer
+        timeout_ms: Time after which a seek without time event counts as done
+    """
+
+    def __init__(self, seek, clock=None, start_timer=None, stop_timer=None, timeout_ms=750):
+        self.seek = seek
+        self.clock = clock or time.perf_counter
+        self.start_timer = start_timer
+        self.stop_timer = stop_timer
+        self.timeout_ms = timeout_ms
+        self.latencies_ms = deque(maxlen=1000)  # request to arrival, of completed seeks
+        self.requested = 0
+        self.issued = 0
+        self.dropped = 0
+        self.completed = 0
+        self.timed_out = 0
+        self._in_flight = None  # (target_ms, requested at, issued at, from_ms)
+        self._position_ms = None  # time of the last time event
+        self._pending = None  # (target_ms, requested at)
+
+    @property
+    def busy(self):
+        """Whether a seek is in flight"""
+        return self._in_flight is not None
+
+    @property
+    def target_ms(self):
+        """Latest requested target, None when idle"""
+        if self._pending is not None:
+            return self._pending[0]
+        if self._in_flight is not None:
+            return self._in_flight[0]
+        return None
+
+    def request(self, time_ms):
+        """Seek to time_ms as soon as the seek in flight (if any) is done"""
+        self.requested += 1
+        now = self.clock()
+        if self._in_flight is None:
+            self._issue(time_ms, now)
+            return
+        if self._pending is not None:
+            self.dropped += 1
+        self._pending = (time_ms, now)
+
+    def seek_now(self, time_ms):
+        """Seek to time_ms right away, superseding the pending and in-flight targets"""
+        self.requested += 1
+        if self._pending is not None:
+            self.dropped += 1
+            self._pending = None
+        self._issue(time_ms, self.clock())
+
+    def cancel(self):
+        """Forget the pending and in-flight seeks, e.g. when another file is loaded"""
+        self._in_flight = None
+        self._pending = None
+        self._position_ms = None
+        if self.stop_timer is not None:
+            self.stop_timer()
+
+    def _issue(self, time_ms, requested_at):
+        self.issued += 1
+        self._in_flight = (time_ms, requested_at, self.clock(), self._position_ms)
+        if self.start_timer is not None:
+            self.start_timer(self.timeout_ms)
+        self.seek(time_ms)
+
+    def _next(self):
+        """The seek in flight is done: issue the pending one, if any"""
+        self._in_flight = None
+        if self._pending is not None:
+            time_ms, requested_at = self._pending
+            self._pending = None
+            self._issue(time_ms, requested_at)
+        elif self.stop_timer is not None:
+            self.stop_timer()
+
+    def on_time_changed(self, ms):
+        """Player time event: completes the seek in flight if it is at the target"""
+        self._position_ms = ms
+        if self._in_flight is None:
+            return
+        target_ms, requested_at, _, from_ms = self._in_flight
+        if seek_arrived(ms, target_ms, from_ms):
+            self.completed += 1
+            self.latencies_ms.append((self.clock() - requested_at) * 1000)
+            self._next()
+
+    def expire(self):
+        """The timeout timer fired: give up waiting for the seek in flight"""
+        if self._in_flight is None:
+            return
+        self.timed_out += 1
+        self._next()
+
+    def metrics(self):
+        """Counts of seeks requested, issued, dropped, completed and timed out, and latency p50/p99"""
+        latencies = sorted(self.latencies_ms)
+        return {
+            "requested": self.requested,
+            "issued": self.issued,
+            "dropped": self.dropped,
+            "completed": self.completed,
+            "timed_out": self.timed_out,
+            "p50_ms": latencies[len(latencies) // 2] if latencies else None,
+            "p99_ms": latencies[min(len(latencies) - 1, len(latencies) * 99 // 100)] if latencies else None,
+        }
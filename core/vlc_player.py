@@ -0,0 +1,88 @@
+import vlc
+
+from core.player import Player
+
+
+class VlcPlayer(Player):
+    """
+    Player backed by a libvlc media player.
+
+    Events are forwarded from libvlc's event thread as they arrive. A GUI
+    marshals them to its own thread instead: with ``events=False`` nothing
+    is attached, and the GUI calls the handler from its
+    playback_events.PlayerEvents signals. ``media_player`` may then be
+    replaced, e.g. when a pre-rolled player is swapped in.
+
+    Args:
+        instance: vlc.Instance creating the player and media (see
+            player_config.PlayerConfig.instance_args()); the default
+            instance if not given
+        media_options: Options added to every media
+        media_player: Existing vlc.MediaPlayer to drive instead
+        media_factory: Callable returning the media to open for (path,
+            start_ms), e.g. MediaPool.media_for; by default a new media with
+            a start-time option
+        events: Whether to attach to libvlc's events
+    """
+
+    def __init__(self, instance=None, media_options=(), media_player=None, media_factory=None, events=True):
+        self.handler = None
+        self.instance = instance
+        self.media_options = list(media_options)
+        self.media_factory = media_factory
+        if media_player is None:
+            media_player = instance.media_player_new() if instance is not None else vlc.MediaPlayer()
+        self.media_player = media_player
+        if not events:
+            return
+        event_manager = self.media_player.event_manager()
+        event_manager.event_attach(vlc.EventType.MediaPlayerTimeChanged, self._on_time_changed)
+        event_manager.event_attach(vlc.EventType.MediaPlayerLengthChanged, self._on_length_changed)
+        event_manager.event_attach(vlc.EventType.MediaPlayerEndReached, self._on_end_reached)
+
+    def _on_time_changed(self, event):
+        if self.handler is not None:
+            self.handler.on_time_changed(event.u.new_time)
+
+    def _on_length_changed(self, event):
+        if self.handler is not None:
+            self.handler.on_length_changed(event.u.new_length)
+
+    def _on_end_reached(self, event):
+        if self.handler is not None:
+            self.handler.on_end_reached()
+
+    def open(self, path, start_ms=0):
+        if self.media_factory is not None:
+            self.media_player.set_media(self.media_factory(path, start_ms or None))
+            self.media_player.play()
+            return
+        if self.instance is not None:
+            media = self.instance.media_new(path, *self.media_options)
+        else:
+            media = vlc.Media(path, *self.media_options)
+        if start_ms:
+            media.add_option(f":start-time={start_ms / 1000:.3f}")
+        self.media_player.set_media(media)
+        self.media_player.play()
+
+    def play(self):
+        self.media_player.play()
+
+    def pause(self):
+        self.media_player.set_pause(1)
+
+    def stop(self):
+        self.media_player.stop()
+
+    def seek(self, time_ms):
+        self.media_player.set_time(int(time_ms))
+
+    def is_playing(self):
+        return bool(self.media_player.is_playing())
+
+    def time_ms(self):
+        return max(0, self.media_player.get_time())
+
+    def length_ms(self):
+        return max(0, self.media_player.get_length())
@@ -0,0 +1,351 @@
+import json
+import os
+import threading
+
+from content_index import partial_hash
+
+# Extensions of the files that count as audio
+AUDIO_EXTENSIONS = (".mp3", ".wav", ".flac", ".ogg", ".m4a", ".aac", ".wma")
+
+
+class LibraryIndex:
+    """
+    Persistent index of the audio files in the audio folder.
+
+    For every audio file (keyed by its path relative to the folder) the
+    index keeps size, modification time, a partial content hash, and
+    duration and tags once known. For every directory it keeps the
+    modification time and the names of its files and subdirectories, so
+    ``refresh()`` only lists directories whose mtime changed: adding,
+    removing or renaming a file updates its directory's mtime. Rewriting a
+    file in place does not, so it is only noticed by ``refresh(force=True)``
+    (and by MediaInfoCache, which checks size and mtime on use).
+
+    With the index loaded, resolving a bookmark's file and telling whether
+    it is missing are dictionary lookups. Bookmarks carry the partial hash
+    of their file as "fingerprint"; when a file was moved or renamed inside
+    the folder, ``resolve_bookmark()`` finds it again by that hash.
+
+    ``refresh()`` is meant to run on a worker thread: it builds new tables
+    and swaps them in at the end, so lookups from the GUI thread always see
+    a consistent state.
+    """
+
+    def __init__(self, path, folder):
+        self.path = path
+        self.folder = folder
+        self.folder_abs = os.path.abspath(folder)
+        self._entries = {}  # relative path -> file entry
+        self._dirs = {}  # relative dir ("" for the folder) -> dir entry
+        self._by_filename = {}  # base name -> relative paths
+        self._by_hash = {}  # partial hash -> relative paths
+        self._external = {}  # absolute path outside the folder -> exists
+        self._lock = threading.Lock()
+        self.dirty = False
+
+    @property
+    def built(self):
+        """Whether the folder was indexed at least once"""
+        return bool(self._dirs)
+
+    def load(self):
+        """Read the index file, if any"""
+        self._entries = {}
+        self._dirs = {}
+        self.dirty = False
+        if os.path.exists(self.path):
+            try:
+                with open(self.path, "r", encoding="utf-8") as f:
+                    data = json.load(f)
+                self._entries = data["files"]
+                self._dirs = data["dirs"]
+            except Exception as e:
+                print(f"Error loading library index: {e}")
+        self._by_filename = self._filename_table(self._entries)
+        self._by_hash = self._hash_table(self._entries)
+
+    def flush(self):
+        """Write the index if it changed. Returns True if it was written"""
+        with self._lock:
+            if not self.dirty:
+                return False
+            data = json.dumps({"files": self._entries, "dirs": self._dirs}, ensure_ascii=False)
+            self.dirty = False
+        tmp_path = self.path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            f.write(data)
+        os.replace(tmp_path, self.path)
+        return True
+
+    @staticmethod
+    def _filename_table(entries):
+        by_filename = {}
+        for rel_path in entries:
+            by_filename.setdefault(os.path.basename(rel_path), []).append(rel_path)
+        return by_filename
+
+    @staticmethod
+    def _hash_table(entries):
+        by_hash = {}
+        for rel_path, entry in entries.items():
+            if entry["hash"]:
+                by_hash.setdefault(entry["hash"], []).append(rel_path)
+        return by_hash
+
+    def __len__(self):
+        return len(self._entries)
+
+    def __contains__(self, rel_path):
+        return rel_path in self._entries
+
+    def get(self, rel_path):
+        """Return the entry of a file, or None"""
+        return self._entries.get(rel_path)
+
+    def files(self):
+        """Return the relative paths of all indexed files"""
+        return list(self._entries)
+
+    def directories(self):
+        """Return the absolute paths of all indexed directories"""
+        return [os.path.join(self.folder_abs, rel_dir) if rel_dir else self.folder_abs
+                for rel_dir in self._dirs]
+
+    def refresh(self, force=False, info_lookup=None):
+        """
+        Bring the index in line with the folder.
+
+        Args:
+            force: List every directory and stat every file, even if the
+                directory mtimes did not change
+            info_lookup: Called as info_lookup(absolute path) for new and
+                changed files; may return a MediaInfoCache info dict
+
+        Returns:
+            Dict with the relative paths "added", "removed" and "changed"
+        """
+        old_entries = self._entries
+        old_dirs = self._dirs
+        entries = dict(old_entries)
+        dirs = {}
+        changes = {"added": [], "removed": [], "changed": []}
+
+        pending = [""]
+        while pending:
+            rel_dir = pending.pop()
+            abs_dir = os.path.join(self.folder_abs, rel_dir)
+            try:
+                mtime_ns = os.stat(abs_dir).st_mtime_ns
+            except OSError:
+                continue
+            old_dir = old_dirs.get(rel_dir)
+            if not force and old_dir and old_dir["mtime_ns"] == mtime_ns:
+                # Listing unchanged
+                dirs[rel_dir] = old_dir
+                pending.extend(os.path.join(rel_dir, name) for name in old_dir["subdirs"])
+                continue
+
+            subdirs = []
+            files = {}
+            try:
+                for dir_entry in os.scandir(abs_dir):
+                    if dir_entry.is_dir(follow_symlinks=False):
+                        subdirs.append(dir_entry.name)
+                    elif dir_entry.name.lower().endswith(AUDIO_EXTENSIONS) and dir_entry.is_file():
+                        files[dir_entry.name] = dir_entry.stat()
+            except OSError as e:
+                print(f"Error reading {abs_dir}: {e}")
+                continue
+
+            for name in (old_dir["files"] if old_dir else ()):
+                if name not in files:
+                    rel_path = os.path.join(rel_dir, name)
+                    if entries.pop(rel_path, None) is not None:
+                        changes["removed"].append(rel_path)
+            for name, st in files.items():
+                rel_path = os.path.join(rel_dir, name)
+                entry = entries.get(rel_path)
+                if entry and entry["size"] == st.st_size and entry["mtime_ns"] == st.st_mtime_ns:
+                    continue
+                changes["changed" if entry else "added"].append(rel_path)
+                entries[rel_path] = self._new_entry(rel_path, st, info_lookup)
+
+            dirs[rel_dir] = {"mtime_ns": mtime_ns, "subdirs": sorted(subdirs), "files": sorted(files)}
+            pending.extend(os.path.join(rel_dir, name) for name in subdirs)
+
+        # Directories that disappeared take their files with them
+        for rel_dir in old_dirs.keys() - dirs.keys():
+            for name in old_dirs[rel_dir]["files"]:
+                rel_path = os.path.join(rel_dir, name)
+                if entries.pop(rel_path, None) is not None:
+                    changes["removed"].append(rel_path)
+
+        by_filename = self._filename_table(entries)
+        by_hash = self._hash_table(entries)
+        with self._lock:
+            self._entries = entries
+            self._dirs = dirs
+            self._by_filename = by_filename
+            self._by_hash = by_hash
+            self._external = {}
+            if changes["added"] or changes["removed"] or changes["changed"] or dirs != old_dirs:
+                self.dirty = True
+        return changes
+
+    def _new_entry(self, rel_path, st, info_lookup):
+        abs_path = os.path.join(self.folder_abs, rel_path)
+        try:
+            digest = partial_hash(abs_path, st.st_size)
+        except OSError:
+            digest = None
+        entry = {"size": st.st_size, "mtime_ns": st.st_mtime_ns, "hash": digest,
+                 "duration_ms": None, "tags": {}}
+        info = info_lookup(abs_path) if info_lookup else None
+        if info:
+            entry["duration_ms"] = info["duration_ms"]
+            entry["tags"] = info["tags"]
+        return entry
+
+    def set_info(self, file_path, info):
+        """Record the duration and tags of an indexed file"""
+        rel_path = self.relative_path(file_path)
+        entry = self._entries.get(rel_path) if rel_path is not None else None
+        if entry is None:
+            return
+        with self._lock:
+            entry["duration_ms"] = info["duration_ms"]
+            entry["tags"] = info["tags"]
+            self.dirty = True
+
+    def relative_path(self, file_path):
+        """
+        Return the path of a file relative to the folder, or None if it is
+        outside of it. Relative paths are taken as relative to the folder,
+        like the "file" of a bookmark.
+        """
+        abs_path = os.path.normpath(os.path.join(self.folder_abs, file_path))
+        rel_path = os.path.relpath(abs_path, self.folder_abs)
+        if rel_path == os.pardir or rel_path.startswith(os.pardir + os.sep):
+            return None
+        return rel_path
+
+    def resolve(self, stored_path):
+        """
+        Return the absolute path of a bookmark's file, or None if it is missing.
+
+        Files in the folder are found by relative path, or else by base name
+        if exactly one indexed file has it. Files outside of the folder are
+        checked on disk once per refresh.
+        """
+        rel_path = self.relative_path(stored_path)
+        if rel_path is None:
+            exists = self._external.get(stored_path)
+            if exists is None:
+                exists = self._external[stored_path] = os.path.exists(stored_path)
+            return stored_path if exists else None
+        if not self.built:
+            abs_path = os.path.join(self.folder_abs, rel_path)
+            return abs_path if os.path.exists(abs_path) else None
+        if rel_path not in self._entries:
+            candidates = self._by_filename.get(os.path.basename(rel_path), ())
+            if len(candidates) != 1:
+                return None
+            rel_path = candidates[0]
+        return os.path.join(self.folder_abs, rel_path)
+
+    def fingerprint(self, file_path):
+        """
+        Return the content fingerprint (partial hash) of a file, from the
+        index for files in the folder, or None if it cannot be read.
+        """
+        rel_path = self.relative_path(file_path)
+        entry = self._entries.get(rel_path) if rel_path is not None else None
+        if entry is not None and entry["hash"]:
+            return entry["hash"]
+        path = os.path.join(self.folder_abs, file_path)
+        try:
+            return partial_hash(path)
+        except OSError:
+            return None
+
+    def find_fingerprint(self, fingerprint):
+        """Return the relative paths of the indexed files with a fingerprint"""
+        return list(self._by_hash.get(fingerprint, ()))
+
+    def resolve_bookmark(self, bookmark):
+        """
+        Return the absolute path of a bookmark's file, or None if it is
+        missing: by stored path first, then by fingerprint. A fingerprint
+        match that has the bookmark's file name is preferred.
+        """
+        resolved = self.resolve(bookmark["file"])
+        if resolved is not None or not bookmark.get("fingerprint"):
+            return resolved
+        candidates = self.find_fingerprint(bookmark["fingerprint"])
+        if not candidates:
+            return None
+        named = [rel_path for rel_path in candidates
+                 if os.path.basename(rel_path) == bookmark.get("filename")]
+        return os.path.join(self.folder_abs, (named or sorted(candidates))[0])
+
+    def is_missing(self, stored_path):
+        """Whether a bookmark's file cannot be found"""
+        return self.resolve(stored_path) is None
+
+    def missing_files(self, bookmarks):
+        """
+        Validate many bookmarks at once.
+
+        Returns:
+            Set of the stored paths ("file" values) that cannot be resolved
+        """
+        missing = set()
+        checked = set()
+        for bookmark in bookmarks:
+            stored_path = bookmark["file"]
+            if stored_path in checked:
+                continue
+            checked.add(stored_path)
+            if self.is_missing(stored_path):
+                missing.add(stored_path)
+        return missing
+
+
+def repair_bookmark_paths(bookmarks, library, stored_path):
+    """
+    Find the files of bookmarks whose stored path no longer resolves, by
+    fingerprint, and fill in fingerprints of bookmarks that have none.
+
+    Each missing stored path is looked up once, however many bookmarks
+    share it.
+
+    Args:
+        bookmarks: Bookmarks to check
+        library: LibraryIndex of the audio folder
+        stored_path: Callable turning an absolute path into the "file"
+            value bookmarks store
+
+    Returns:
+        List of (bookmark id, changes dict) for BookmarkStore.update()
+    """
+    updates = []
+    resolved = {}  # stored path -> absolute path or None
+    for bookmark in bookmarks:
+        file = bookmark["file"]
+        if file not in resolved:
+            resolved[file] = library.resolve(file)
+        path = resolved[file]
+        if path is None:
+            path = library.resolve_bookmark(bookmark)
+            if path is None:
+                continue
+            updates.append((bookmark["id"], {
+                "file": stored_path(path),
+                "filename": os.path.basename(path),
+            }))
+        elif not bookmark.get("fingerprint"):
+            rel_path = library.relative_path(path)
+            entry = library.get(rel_path) if rel_path is not None else None
+            if entry is not None and entry["hash"]:
+                updates.append((bookmark["id"], {"fingerprint": entry["hash"]}))
+    return updates
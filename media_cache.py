@@ -0,0 +1,156 @@
+import json
+import os
+import threading
+
+import vlc
+
+# Tags copied from libvlc metadata, by name stored in the cache
+MEDIA_TAGS = {
+    "title": vlc.Meta.Title,
+    "artist": vlc.Meta.Artist,
+    "album": vlc.Meta.Album,
+    "genre": vlc.Meta.Genre,
+    "date": vlc.Meta.Date,
+    "track_number": vlc.Meta.TrackNumber,
+}
+
+
+def fourcc_to_str(fourcc):
+    """Turn a libvlc fourcc codec id into its four letter name"""
+    return fourcc.to_bytes(4, "little").decode("ascii", "replace").strip()
+
+
+def media_info_from_vlc(media, file_size=0):
+    """
+    Collect duration, codec, bitrate and tags of a parsed vlc.Media.
+
+    Args:
+        media: vlc.Media whose parsing has finished
+        file_size: File size in bytes, used to estimate the bitrate when
+            the demuxer does not report one
+
+    Returns:
+        Info dict suitable for MediaInfoCache.put()
+    """
+    info = {
+        "duration_ms": max(0, media.get_duration()),
+        "codec": None,
+        "bitrate": 0,
+        "sample_rate": 0,
+        "channels": 0,
+        "tags": {},
+    }
+    for track in media.tracks_get() or ():
+        if track.type != vlc.TrackType.audio:
+            continue
+        info["codec"] = fourcc_to_str(track.codec)
+        info["bitrate"] = track.bitrate
+        audio = track.u.audio.contents
+        info["sample_rate"] = audio.rate
+        info["channels"] = audio.channels
+        break
+    if not info["bitrate"] and info["duration_ms"] > 0 and file_size:
+        info["bitrate"] = int(file_size * 8 * 1000 / info["duration_ms"])
+    for name, meta in MEDIA_TAGS.items():
+        value = media.get_meta(meta)
+        if value:
+            info["tags"][name] = value
+    return info
+
+
+def probe_media_info(path, timeout_ms=5000, media_factory=None):
+    """
+    Parse a file with libvlc and wait for the result, for use on worker
+    threads (the GUI uses MediaParser instead).
+
+    Args:
+        path: Audio file
+        timeout_ms: Parsing timeout
+        media_factory: Callable creating a vlc.Media from a path
+            (vlc.Media, of the default instance, if not given)
+
+    Returns:
+        Info dict as from media_info_from_vlc(), or None if parsing failed
+    """
+    media = (media_factory or vlc.Media)(path)
+    done = threading.Event()
+    event_manager = media.event_manager()
+    event_manager.event_attach(vlc.EventType.MediaParsedChanged, lambda event: done.set())
+    try:
+        media.parse_with_options(vlc.MediaParseFlag.fetch_local, timeout_ms)
+        done.wait(timeout_ms / 1000 + 1)
+        if media.get_parsed_status() != vlc.MediaParsedStatus.done:
+            return None
+        return media_info_from_vlc(media, os.path.getsize(path))
+    finally:
+        event_manager.event_detach(vlc.EventType.MediaParsedChanged)
+        media.release()
+
+
+class MediaInfoCache:
+    """
+    Persistent cache of media metadata (duration, codec, bitrate, tags).
+
+    Entries are keyed by absolute path and only returned while the file's
+    size and modification time still match, so a replaced file is parsed
+    again. Parsing a file with libvlc takes a while; with the cache, the
+    duration of any file that was opened before is known as soon as it is
+    loaded.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._entries = {}
+        self.dirty = False
+
+    def load(self):
+        """Read the cache file, if any"""
+        self._entries = {}
+        self.dirty = False
+        if not os.path.exists(self.path):
+            return
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                self._entries = json.load(f)
+        except Exception as e:
+            print(f"Error loading media cache: {e}")
+
+    def flush(self):
+        """Write the cache if it changed. Returns True if it was written"""
+        if not self.dirty:
+            return False
+        tmp_path = self.path + ".tmp"
+        data = json.dumps(self._entries, ensure_ascii=False)
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            f.write(data)
+        os.replace(tmp_path, self.path)
+        self.dirty = False
+        return True
+
+    @staticmethod
+    def _stat(file_path):
+        """Return (absolute path, size, mtime_ns), or None if the file is missing"""
+        abs_path = os.path.abspath(file_path)
+        try:
+            st = os.stat(abs_path)
+        except OSError:
+            return None
+        return abs_path, st.st_size, st.st_mtime_ns
+
+    def get(self, file_path):
+        """Return the cached info of a file, or None if unknown or out of date"""
+        stat = self._stat(file_path)
+        if stat is None:
+            return None
+        entry = self._entries.get(stat[0])
+        if entry and entry["size"] == stat[1] and entry["mtime_ns"] == stat[2]:
+            return entry["info"]
+        return None
+
+    def put(self, file_path, info):
+        """Store the info of a file, tied to its current size and mtime"""
+        stat = self._stat(file_path)
+        if stat is None:
+            return
+        self._entries[stat[0]] = {"size": stat[1], "mtime_ns": stat[2], "info": info}
+        self.dirty = True
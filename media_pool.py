@@ -0,0 +1,145 @@
+import os
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+import vlc
+
+# Rough in-memory size of a parsed vlc.Media (input item, metadata, tracks)
+MEDIA_OVERHEAD_BYTES = 256 * 1024
+
+
+class MediaPool:
+    """
+    LRU pool of pre-parsed vlc.Media objects.
+
+    ``prewarm()`` creates and parses the media of a file ahead of time and
+    reads the part of the file around the expected start position on a
+    worker thread, so the OS already has it cached when playback starts
+    (this matters most on network shares). ``media_for()`` then hands out
+    a duplicate of the parsed media, which keeps the parsed state but gets
+    its own start-time option.
+
+    The pool is bounded both by entry count and by an estimate of the
+    memory it holds (parsed media overhead plus pre-read bytes); the least
+    recently used entries are released first.
+    """
+
+    def __init__(self, max_items=8, max_bytes=64 * 1024 * 1024, warm_bytes=2 * 1024 * 1024,
+                 media_factory=vlc.Media):
+        """
+        Args:
+            max_items: Maximum number of pooled media
+            max_bytes: Maximum estimated memory held by the pool
+            warm_bytes: Bytes of each file read ahead around the start position
+            media_factory: Callable creating a vlc.Media from a path
+        """
+        self.max_items = max_items
+        self.max_bytes = max_bytes
+        self.warm_bytes = warm_bytes
+        self.media_factory = media_factory
+        self._entries = OrderedDict()  # path -> (media, cost)
+        self._bytes = 0
+        self._reader = ThreadPoolExecutor(max_workers=1, thread_name_prefix="media-prewarm")
+        self.hits = 0
+        self.misses = 0
+
+    def __contains__(self, path):
+        return os.path.abspath(path) in self._entries
+
+    def __len__(self):
+        return len(self._entries)
+
+    @property
+    def used_bytes(self):
+        return self._bytes
+
+    def prewarm(self, path, start_ms=0, duration_ms=0):
+        """
+        Parse a file's media and pre-read the data around start_ms.
+
+        Args:
+            path: Audio file
+            start_ms: Expected start position
+            duration_ms: Duration of the file if known, to locate start_ms in it
+        """
+        path = os.path.abspath(path)
+        if path in self._entries:
+            self._entries.move_to_end(path)
+            return
+        try:
+            size = os.path.getsize(path)
+        except OSError:
+            return
+        media = self.media_factory(path)
+        media.parse_with_options(vlc.MediaParseFlag.fetch_local, 5000)
+
+        warm = min(self.warm_bytes, size)
+        offset = 0
+        if duration_ms > 0 and start_ms > 0:
+            offset = min(max(0, size - warm), int(size * start_ms / duration_ms) - warm // 2)
+            offset = max(0, offset)
+        self._reader.submit(self._read_ahead, path, offset, warm)
+
+        cost = MEDIA_OVERHEAD_BYTES + warm
+        self._entries[path] = (media, cost)
+        self._bytes += cost
+        self._evict()
+
+    @staticmethod
+    def _read_ahead(path, offset, length):
+        """Runs on the worker thread: pull a byte range into the OS cache"""
+        try:
+            with open(path, "rb") as f:
+                if hasattr(os, "posix_fadvise"):
+                    os.posix_fadvise(f.fileno(), offset, length, os.POSIX_FADV_WILLNEED)
+                f.seek(offset)
+                remaining = length
+                while remaining > 0:
+                    chunk = f.read(min(remaining, 256 * 1024))
+                    if not chunk:
+                        break
+                    remaining -= len(chunk)
+        except OSError as e:
+            print(f"Error pre-reading {path}: {e}")
+
+    def media_for(self, path, start_ms=None, options=()):
+        """
+        Return a media for a file, from the pool if it was pre-warmed.
+
+        Args:
+            path: Audio file
+            start_ms: If given, the media starts playing at this offset
+            options: Extra media options, e.g. ":start-paused"
+        """
+        entry = self._entries.get(os.path.abspath(path))
+        if entry is not None:
+            self._entries.move_to_end(os.path.abspath(path))
+            media = entry[0].duplicate()
+            self.hits += 1
+        else:
+            media = self.media_factory(path)
+            self.misses += 1
+        if start_ms is not None:
+            media.add_option(f":start-time={start_ms / 1000:.3f}")
+        for option in options:
+            media.add_option(option)
+        return media
+
+    def _evict(self):
+        """Release least recently used entries while over the limits"""
+        while self._entries and (len(self._entries) > self.max_items or self._bytes > self.max_bytes):
+            _, (media, cost) = self._entries.popitem(last=False)
+            self._bytes -= cost
+            media.release()
+
+    def clear(self):
+        """Release all pooled media"""
+        for media, _ in self._entries.values():
+            media.release()
+        self._entries.clear()
+        self._bytes = 0
+
+    def close(self):
+        """Release all media and stop the read-ahead worker"""
+        self.clear()
+        self._reader.shutdown(wait=False, cancel_futures=True)
@@ -0,0 +1,77 @@
+import vlc
+from PySide6.QtCore import QObject, Signal
+
+
+class PlayerEvents(QObject):
+    """
+    Forwards libvlc media player events to the Qt thread as signals.
+
+    libvlc calls event callbacks on its own threads, where neither widgets
+    nor libvlc itself may be touched. The callbacks here only emit a
+    signal; because this object lives in the GUI thread, Qt queues every
+    emission to it, so connected slots always run on the GUI thread.
+    """
+
+    time_changed = Signal(int)
+    length_changed = Signal(int)
+    playing = Signal()
+    paused = Signal()
+    stopped = Signal()
+    end_reached = Signal()
+    error = Signal()
+
+    def __init__(self, player, parent=None):
+        super().__init__(parent)
+        self.event_manager = player.event_manager()
+        self._attached = []
+        self._attach(vlc.EventType.MediaPlayerTimeChanged, lambda event: self.time_changed.emit(event.u.new_time))
+        self._attach(vlc.EventType.MediaPlayerLengthChanged, lambda event: self.length_changed.emit(event.u.new_length))
+        self._attach(vlc.EventType.MediaPlayerPlaying, lambda event: self.playing.emit())
+        self._attach(vlc.EventType.MediaPlayerPaused, lambda event: self.paused.emit())
+        self._attach(vlc.EventType.MediaPlayerStopped, lambda event: self.stopped.emit())
+        self._attach(vlc.EventType.MediaPlayerEndReached, lambda event: self.end_reached.emit())
+        self._attach(vlc.EventType.MediaPlayerEncounteredError, lambda event: self.error.emit())
+
+    def _attach(self, event_type, callback):
+        self.event_manager.event_attach(event_type, callback)
+        self._attached.append(event_type)
+
+    def detach(self):
+        """Stop listening to the player"""
+        for event_type in self._attached:
+            self.event_manager.event_detach(event_type)
+        self._attached = []
+
+
+class MediaParser(QObject):
+    """
+    Parses vlc.Media objects in the background.
+
+    libvlc parses on its own thread and signals MediaParsedChanged; the
+    ``parsed`` signal then delivers (path, media) on the GUI thread, where
+    the metadata can be read without blocking.
+    """
+
+    parsed = Signal(str, object)
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self._pending = {}
+        self.parsed.connect(self._finish)
+
+    def parse(self, path, media, timeout_ms=5000):
+        """Start parsing a media (local files only, no network lookups)"""
+        if path in self._pending:
+            return
+        event_manager = media.event_manager()
+        event_manager.event_attach(
+            vlc.EventType.MediaParsedChanged, lambda event: self.parsed.emit(path, media)
+        )
+        self._pending[path] = media
+        # "local" is 0, so fetch_local alone means local parsing plus local art/tags
+        media.parse_with_options(vlc.MediaParseFlag.fetch_local, timeout_ms)
+
+    def _finish(self, path, media):
+        # Detach here rather than inside the libvlc callback
+        if self._pending.pop(path, None) is not None:
+            media.event_manager().event_detach(vlc.EventType.MediaParsedChanged)
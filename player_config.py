@@ -0,0 +1,179 @@
+import json
+import os
+
+DEFAULT_CONFIG_FILE = "player_config.json"
+
+# Audio only: no video output or X11 calls, no Lua scripts (playlist
+# parsers and meta fetchers for streaming sites), no subtitle lookup next
+# to the files, and no statistics
+AUDIO_ONLY_ARGS = ("--no-video", "--no-xlib", "--no-lua", "--no-sub-autodetect-file", "--no-stats", "--quiet")
+
+# Caching profiles: how much libvlc buffers ahead (ms) before playing, at
+# the start and after every seek. More caching rides out a slow file
+# server at the cost of seek latency; core.seek_benchmark measures it.
+DEFAULT_PROFILES = {
+    "default": {},
+    "local": {"file_caching_ms": 300},
+    "low-latency": {"file_caching_ms": 100},
+    "nfs": {"file_caching_ms": 1000, "network_caching_ms": 1500},
+}
+
+# Option setting the quality of each resampler module
+RESAMPLER_QUALITY_OPTIONS = {
+    "soxr": "--soxr-resampler-quality",
+    "speex_resampler": "--speex-resampler-quality",
+    "samplerate": "--src-converter-type",
+}
+
+# Bookmark storage backends: "json" rewrites bookmarks.json, "journal"
+# appends each change to a journal compacted in the background, "sqlite"
+# keeps bookmarks in an indexed SQLite database
+STORAGE_MODES = ("json", "journal", "sqlite")
+
+SETTINGS = ("file_caching_ms", "network_caching_ms", "aout", "resampler", "resampler_quality")
+
+
+class PlayerConfig:
+    """
+    Settings of the libvlc instance shared by the whole application, and
+    the bookmark storage backend (one of STORAGE_MODES).
+
+    A named caching profile gives the base values; settings given
+    explicitly (config file, then command line) override it. Unset values
+    leave libvlc's defaults alone. The config file is JSON, e.g.::
+
+        {
+          "profile": "nfs",
+          "file_caching_ms": 1200,
+          "aout": "pulse",
+          "storage": "journal",
+          "resampler": "soxr",
+          "resampler_quality": 3,
+          "media_options": [":clock-jitter=0"],
+          "profiles": {"slow-nas": {"file_caching_ms": 3000}}
+        }
+
+    Args:
+        profile: Name of the caching profile
+        profiles: Extra or replaced profiles, by name
+        vlc_args: Extra libvlc command line options
+        media_options: Options added to every media (":option=value")
+        storage: Bookmark storage backend
+        settings: Values of SETTINGS
+    """
+
+    def __init__(self, profile="default", profiles=None, vlc_args=(), media_options=(), storage="json",
+                 **settings):
+        unknown = set(settings) - set(SETTINGS)
+        if unknown:
+            raise ValueError(f"Unknown player settings: {', '.join(sorted(unknown))}")
+        self.profiles = dict(DEFAULT_PROFILES)
+        self.profiles.update(profiles or {})
+        if profile not in self.profiles:
+            raise ValueError(f"Unknown caching profile: {profile}")
+        self.profile = profile
+        if storage not in STORAGE_MODES:
+            raise ValueError(f"Unknown bookmark storage: {storage}")
+        self.storage = storage
+        self.vlc_args = list(vlc_args)
+        self.media_options = list(media_options)
+        self.settings = {name: value for name, value in settings.items() if value is not None}
+
+    @classmethod
+    def load(cls, path=DEFAULT_CONFIG_FILE):
+        """Read a config file; a missing file gives the defaults"""
+        if not os.path.exists(path):
+            return cls()
+        with open(path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+        if not isinstance(data, dict):
+            raise ValueError(f"{path}: expected a JSON object")
+        return cls(**data)
+
+    def with_profile(self, profile):
+        """Copy of this config using another caching profile"""
+        return PlayerConfig(profile, self.profiles, self.vlc_args, self.media_options, self.storage,
+                            **self.settings)
+
+    def update(self, profile=None, vlc_args=(), media_options=(), storage=None, **settings):
+        """Override settings (None values are ignored), e.g. from the command line"""
+        if profile is not None:
+            if profile not in self.profiles:
+                raise ValueError(f"Unknown caching profile: {profile}")
+            self.profile = profile
+        if storage is not None:
+            if storage not in STORAGE_MODES:
+                raise ValueError(f"Unknown bookmark storage: {storage}")
+            self.storage = storage
+        self.vlc_args.extend(vlc_args)
+        self.media_options.extend(media_options)
+        for name, value in settings.items():
+            if name not in SETTINGS:
+                raise ValueError(f"Unknown player setting: {name}")
+            if value is not None:
+                self.settings[name] = value
+
+    def effective(self):
+        """Settings in effect: the profile's, overridden by the explicit ones"""
+        values = dict(self.profiles[self.profile])
+        values.update(self.settings)
+        return values
+
+    def instance_args(self):
+        """libvlc command line options of the instance"""
+        values = self.effective()
+        args = list(AUDIO_ONLY_ARGS)
+        if values.get("file_caching_ms") is not None:
+            args.append(f"--file-caching={int(values['file_caching_ms'])}")
+        if values.get("network_caching_ms") is not None:
+            args.append(f"--network-caching={int(values['network_caching_ms'])}")
+        if values.get("aout"):
+            args.append(f"--aout={values['aout']}")
+        if values.get("resampler"):
+            args.append(f"--audio-resampler={values['resampler']}")
+            quality_option = RESAMPLER_QUALITY_OPTIONS.get(values["resampler"])
+            if quality_option and values.get("resampler_quality") is not None:
+                args.append(f"{quality_option}={int(values['resampler_quality'])}")
+        args.extend(self.vlc_args)
+        return args
+
+    def describe(self):
+        """One line summary, e.g. for the status bar"""
+        values = self.effective()
+        parts = [f"profile {self.profile}"]
+        parts.extend(f"{name}={values[name]}" for name in SETTINGS if values.get(name) is not None)
+        return ", ".join(parts)
+
+
+def add_player_arguments(parser):
+    """Add the command line flags of the player settings to an argparse parser"""
+    group = parser.add_argument_group("playback")
+    group.add_argument("--config", default=DEFAULT_CONFIG_FILE, help="player settings file (JSON)")
+    group.add_argument("--profile", help=f"caching profile ({', '.join(DEFAULT_PROFILES)} or from the config)")
+    group.add_argument("--file-caching", type=int, dest="file_caching_ms", metavar="MS",
+                       help="libvlc buffering for local and mounted files")
+    group.add_argument("--network-caching", type=int, dest="network_caching_ms", metavar="MS",
+                       help="libvlc buffering for network streams")
+    group.add_argument("--aout", help="audio output module, e.g. pulse, alsa, directsound")
+    group.add_argument("--resampler", help="audio resampler module, e.g. soxr, speex_resampler")
+    group.add_argument("--resampler-quality", type=int, dest="resampler_quality")
+    group.add_argument("--vlc-arg", action="append", default=[], dest="vlc_args", metavar="ARG",
+                       help="extra libvlc option, as --vlc-arg=--option (repeatable)")
+    group.add_argument("--media-option", action="append", default=[], dest="media_options", metavar="OPTION",
+                       help="option added to every media, e.g. :file-caching=2000 (repeatable)")
+
+
+def add_storage_argument(parser):
+    """Add the --storage flag, selecting the bookmark storage backend, to an argparse parser"""
+    parser.add_argument("--storage", choices=STORAGE_MODES,
+                        help="bookmark storage backend (json by default, or from the config)")
+
+
+def config_from_args(args):
+    """PlayerConfig from the config file named in parsed arguments, overridden by the flags"""
+    config = PlayerConfig.load(args.config)
+    config.update(
+        profile=args.profile, vlc_args=args.vlc_args, media_options=args.media_options,
+        storage=getattr(args, "storage", None), **{name: getattr(args, name) for name in SETTINGS}
+    )
+    return config
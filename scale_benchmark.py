@@ -0,0 +1,328 @@
+"""
+Scale benchmark of bookmark storage, sorting and list population:
+
+    python scale_benchmark.py [--sizes 1000,10000,100000,1000000]
+                              [--backends json,journal,sqlite] [--ops N]
+                              [--output results.json] [--compare old.json]
+
+For every size a synthetic bookmarks.json with the real schema is written,
+then each backend is measured in a fresh child process, so load times are
+cold (nothing cached in the interpreter) and the peak memory reported is
+that of the run alone:
+
+- load: reading the library into the store
+- group: sorting into the rows of the list, file headers included
+- list_reset / list_layout: resetting the list model under a shown view
+  (offscreen Qt platform), and until the batched layout is done
+- add / edit / delete: one change plus flush and the list row update,
+  ``--ops`` times each (p50/p99)
+- peak_rss_mb: peak resident memory of the child process
+
+``--output`` writes the results as JSON, along with the Python version,
+platform and git revision; ``--compare`` prints the ratio of every metric
+to a previous results file.
+"""
+
+import argparse
+import json
+import os
+import platform
+import random
+import resource
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+
+from bookmark_store import bookmark_sort_key, new_bookmark_id, write_bookmarks_json
+from core.benchmark import summarize
+
+DEFAULT_SIZES = (1000, 10000, 100000, 1000000)
+BACKENDS = ("json", "journal", "sqlite")
+BOOKMARKS_PER_FILE = 25
+# Ratio to a previous run above which a metric is flagged
+REGRESSION_RATIO = 1.2
+
+
+def library_filenames(size):
+    """File names of a synthetic library of size bookmarks"""
+    return [f"Artist {index % 97}/track {index:06d}.mp3" for index in range(max(1, size // BOOKMARKS_PER_FILE))]
+
+
+def make_library_json(path, size, seed=0):
+    """
+    Write a bookmarks.json of size synthetic bookmarks, spread over files
+    with BOOKMARKS_PER_FILE bookmarks on average.
+    """
+    rng = random.Random(seed)
+    filenames = library_filenames(size)
+    bookmarks = []
+    for index in range(size):
+        filename = rng.choice(filenames)
+        bookmarks.append({
+            "id": new_bookmark_id(),
+            "file": filename,
+            "filename": os.path.basename(filename),
+            "time_ms": rng.randrange(0, 600000),
+            "name": f"Bookmark {index}",
+            "type": rng.choice(("Regular", "Regular", "Start", "End")),
+            "timestamp": "2024-01-01 12:00:00",
+        })
+    bookmarks.sort(key=bookmark_sort_key)
+    write_bookmarks_json(path, bookmarks)
+
+
+def peak_rss_mb():
+    # ru_maxrss is in kilobytes on Linux, bytes on macOS
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+
+
+def create_store(backend, folder, json_path):
+    """Store of a backend reading the library at json_path (setup, not timed)"""
+    from bookmark_journal import BookmarkJournal
+    from bookmark_sqlite import SqliteBookmarkStore, migrate_json_to_sqlite
+    from bookmark_store import BookmarkStore, JsonArrayPersistence
+
+    if backend == "json":
+        # As the main window uses it: the file is rewritten by a writer thread
+        return BookmarkStore(JsonArrayPersistence(json_path, background=True))
+    if backend == "journal":
+        # The journal's snapshot has the same format as bookmarks.json
+        snapshot_path = os.path.join(folder, "bookmarks.snapshot.json")
+        shutil.copyfile(json_path, snapshot_path)
+        return BookmarkStore(BookmarkJournal(snapshot_path))
+    db_path = os.path.join(folder, "bookmarks.db")
+    migrate_json_to_sqlite(json_path, db_path)
+    return SqliteBookmarkStore(db_path)
+
+
+def wait_for_layout(app, view, timeout=600):
+    """Process events until the view's scroll range stops growing"""
+    scroll_bar = view.verticalScrollBar()
+    deadline = time.perf_counter() + timeout
+    last, stable = -1, 0
+    while stable < 3 and time.perf_counter() < deadline:
+        app.processEvents()
+        maximum = scroll_bar.maximum()
+        stable = stable + 1 if maximum == last else 0
+        last = maximum
+
+
+def run_child(backend, folder, json_path, filenames, ops, seed):
+    """Measure one backend on one library, in this process. Returns {metric: value}"""
+    os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+    from PySide6.QtWidgets import QAbstractItemView, QApplication, QListView
+    from bookmark_model import BookmarkListModel, rows_with_headers
+
+    results = {}
+    store = create_store(backend, folder, json_path)
+
+    started = time.perf_counter()
+    store.load()
+    results["load_s"] = time.perf_counter() - started
+
+    started = time.perf_counter()
+    keys = rows_with_headers(bookmark_sort_key(b) for b in store.sorted_bookmarks())
+    results["group_s"] = time.perf_counter() - started
+    results["rows"] = len(keys)
+    del keys
+
+    # The list as the main window sets it up
+    app = QApplication.instance() or QApplication([])
+    model = BookmarkListModel(store)
+    view = QListView()
+    view.setModel(model)
+    view.setUniformItemSizes(True)
+    view.setLayoutMode(QListView.Batched)
+    view.setBatchSize(200)
+    view.setEditTriggers(QAbstractItemView.NoEditTriggers)
+    view.resize(400, 600)
+    view.show()
+    app.processEvents()
+
+    started = time.perf_counter()
+    model.reload()
+    app.processEvents()
+    view.viewport().grab()
+    results["list_reset_s"] = time.perf_counter() - started
+    wait_for_layout(app, view)
+    results["list_layout_s"] = time.perf_counter() - started
+
+    rng = random.Random(seed)
+    added, edited, deleted = [], [], []
+    for index in range(ops):
+        filename = rng.choice(filenames)
+        bookmark = {
+            "id": new_bookmark_id(),
+            "file": filename,
+            "filename": os.path.basename(filename),
+            "time_ms": rng.randrange(0, 600000),
+            "name": f"Added {index}",
+            "type": "Regular",
+            "timestamp": "2024-01-02 12:00:00",
+        }
+        started = time.perf_counter()
+        store.add(bookmark)
+        store.flush()
+        model.bookmark_added(bookmark["id"])
+        added.append((time.perf_counter() - started) * 1000)
+
+        started = time.perf_counter()
+        old_key = bookmark_sort_key(store.get(bookmark["id"]))
+        store.update(bookmark["id"], name=f"Edited {index}", time_ms=rng.randrange(0, 600000))
+        store.flush()
+        model.bookmark_changed(bookmark["id"], old_key)
+        edited.append((time.perf_counter() - started) * 1000)
+
+        started = time.perf_counter()
+        removed = store.get(bookmark["id"])
+        store.remove(bookmark["id"])
+        store.flush()
+        model.bookmark_removed(removed)
+        deleted.append((time.perf_counter() - started) * 1000)
+        app.processEvents()
+    results["add"] = summarize(added)
+    results["edit"] = summarize(edited)
+    results["delete"] = summarize(deleted)
+
+    view.close()
+    store.close()
+    results["peak_rss_mb"] = peak_rss_mb()
+    return results
+
+
+def git_revision():
+    try:
+        output = subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                                cwd=os.path.dirname(os.path.abspath(__file__)), timeout=10)
+    except (OSError, subprocess.SubprocessError):
+        return None
+    return output.stdout.strip() or None
+
+
+def run(sizes=DEFAULT_SIZES, backends=BACKENDS, ops=20, seed=0, log=None):
+    """
+    Run the benchmark for every size and backend, each in a child process.
+
+    Returns:
+        {"meta": {...}, "results": [{"size", "backend", "file_mb", metrics...}]}
+    """
+    report = {
+        "meta": {
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "revision": git_revision(),
+            "date": time.strftime("%Y-%m-%d %H:%M:%S"),
+            "ops": ops,
+            "seed": seed,
+        },
+        "results": [],
+    }
+    for size in sizes:
+        folder = tempfile.mkdtemp(prefix="bookmark-scale-")
+        try:
+            json_path = os.path.join(folder, "library.json")
+            make_library_json(json_path, size, seed)
+            file_mb = os.path.getsize(json_path) / (1024 * 1024)
+            for backend in backends:
+                if log:
+                    log(f"{size} bookmarks, {backend}...")
+                child_folder = os.path.join(folder, backend)
+                os.makedirs(child_folder)
+                command = [sys.executable, os.path.abspath(__file__), "--child", backend,
+                           "--folder", child_folder, "--library", json_path, "--size", str(size), "--ops", str(ops),
+                           "--seed", str(seed)]
+                output = subprocess.run(command, capture_output=True, text=True, check=True)
+                entry = {"size": size, "backend": backend, "file_mb": file_mb}
+                entry.update(json.loads(output.stdout.strip().splitlines()[-1]))
+                report["results"].append(entry)
+        finally:
+            shutil.rmtree(folder, ignore_errors=True)
+    return report
+
+
+def flatten(entry):
+    """{metric: number} of a result entry, p50/p99 of the round-trips inlined"""
+    metrics = {}
+    for name, value in entry.items():
+        if name in ("size", "backend"):
+            continue
+        if isinstance(value, dict):
+            metrics[f"{name}_p50_ms"] = value["p50_ms"]
+            metrics[f"{name}_p99_ms"] = value["p99_ms"]
+        else:
+            metrics[name] = value
+    return metrics
+
+
+def format_report(report):
+    columns = ("load_s", "group_s", "list_reset_s", "list_layout_s", "add_p50_ms", "edit_p50_ms",
+               "delete_p50_ms", "delete_p99_ms", "peak_rss_mb")
+    lines = [f"{'size':>9} {'backend':<8}" + "".join(f"{column:>15}" for column in columns)]
+    for entry in report["results"]:
+        metrics = flatten(entry)
+        cells = "".join(f"{metrics.get(column, 0) or 0:>15.3f}" for column in columns)
+        lines.append(f"{entry['size']:>9} {entry['backend']:<8}{cells}")
+    return "\n".join(lines)
+
+
+def format_comparison(report, previous):
+    """Ratio new/old of every metric present in both reports"""
+    old_entries = {(entry["size"], entry["backend"]): flatten(entry) for entry in previous["results"]}
+    lines = [f"Compared to {previous['meta'].get('revision') or 'previous run'} "
+             f"({previous['meta'].get('date', '?')}):"]
+    for entry in report["results"]:
+        old = old_entries.get((entry["size"], entry["backend"]))
+        if old is None:
+            continue
+        for metric, value in flatten(entry).items():
+            if metric in ("rows", "file_mb") or not old.get(metric) or value is None:
+                continue
+            ratio = value / old[metric]
+            flag = "  REGRESSION" if ratio > REGRESSION_RATIO else ""
+            lines.append(f"{entry['size']:>9} {entry['backend']:<8}{metric:<16}"
+                         f"{old[metric]:>12.3f} -> {value:>12.3f}  x{ratio:.2f}{flag}")
+    return "\n".join(lines)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Bookmark storage, sorting and list population at scale")
+    parser.add_argument("--sizes", default=",".join(str(size) for size in DEFAULT_SIZES),
+                        help="comma-separated numbers of bookmarks")
+    parser.add_argument("--backends", default=",".join(BACKENDS), help="comma-separated storage backends")
+    parser.add_argument("--ops", type=int, default=20, help="add/edit/delete round-trips per run")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", help="write the results to this JSON file")
+    parser.add_argument("--compare", help="previous results file to compare with")
+    parser.add_argument("--child", choices=BACKENDS, help=argparse.SUPPRESS)
+    parser.add_argument("--folder", help=argparse.SUPPRESS)
+    parser.add_argument("--library", help=argparse.SUPPRESS)
+    parser.add_argument("--size", type=int, help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+
+    if args.child:
+        filenames = library_filenames(args.size)
+        results = run_child(args.child, args.folder, args.library, filenames, args.ops, args.seed)
+        print(json.dumps(results))
+        return 0
+
+    sizes = [int(size) for size in args.sizes.split(",")]
+    backends = [backend for backend in args.backends.split(",") if backend]
+    unknown = set(backends) - set(BACKENDS)
+    if unknown:
+        parser.error(f"unknown backends: {', '.join(sorted(unknown))}")
+    report = run(sizes, backends, args.ops, args.seed, log=lambda message: print(message, file=sys.stderr))
+    print(format_report(report))
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as f:
+            print(format_comparison(report, json.load(f)))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,39 +1,247 @@
+import argparse
 import sys
 import os
-import json
+import time
+from collections import deque
+from startup import BookmarkLoader, StartupTrace
+
+# Started before the heavy imports, so they show up in the trace
+startup_trace = StartupTrace(
+    enabled="--trace-startup" in sys.argv or bool(os.environ.get("MUSIC_BOOKMARK_TRACE_STARTUP")),
+    expected=("bookmarks", "libvlc")
+)
+
 import vlc
-from PySide6.QtWidgets import *
-from PySide6.QtCore import *
-from PySide6.QtGui import *
+from PySide6.QtWidgets import (
+    QAbstractItemView, QApplication, QCheckBox, QComboBox, QDialog, QFileDialog, QFrame, QGroupBox,
+    QHBoxLayout, QLabel, QLineEdit, QListView, QMainWindow, QMessageBox, QProgressBar, QPushButton,
+    QSlider, QSpinBox, QVBoxLayout, QWidget
+)
+from PySide6.QtCore import QDateTime, QFileSystemWatcher, QTimer, Qt
+from PySide6.QtGui import QAction
+from bookmark_store import BOOKMARK_TYPES, BookmarkStore, JsonArrayPersistence, bookmark_sort_key
+from bookmark_journal import BookmarkJournal
+from bookmark_sqlite import SqliteBookmarkStore, migrate_json_to_sqlite
+from bookmark_model import BookmarkIdRole, BookmarkListModel, BookmarkSearcher, ScrollAnchor
+from bookmark_segments import SegmentIndex
+from playback_events import MediaParser, PlayerEvents
+from media_cache import MediaInfoCache, media_info_from_vlc
+from media_pool import MediaPool
+from audio_import import FileImporter, FolderImporter, LibraryScanner
+from content_index import ContentIndex
+from library_index import AUDIO_EXTENSIONS, LibraryIndex, repair_bookmark_paths
+from waveform import PeakCache, WaveformLoader
+from core.files import BookmarkFiles
+from core.playback import PlaybackController
+from core.seek_scheduler import SeekScheduler
+from core.vlc_player import VlcPlayer
+from player_config import PlayerConfig, add_player_arguments, add_storage_argument, config_from_args
+from vlc_runtime import VlcRuntime
+from waveform_view import WaveformView
+
+startup_trace.mark("imports")
 
 class EnhancedAudioPlayer(QMainWindow):
-    def __init__(self):
+    def __init__(self, player_config=None):
+        """
+        Args:
+            player_config: PlayerConfig of libvlc; read from
+                player_config.json if not given
+        """
         super().__init__()
         
-        # Add seek throttling variables
-        self.last_seek_time = 0
-        self.seek_throttle_ms = 100  # Minimum 100ms between seeks
-        self.pending_seek = None
-        
-        # Initialize VLC player
-        self.player = vlc.MediaPlayer()
+        # One libvlc instance, configured by the player settings, starts in
+        # the background once the window is up; the players are created
+        # when it is ready, or on first use if sooner
+        if player_config is None:
+            try:
+                player_config = PlayerConfig.load()
+            except (OSError, ValueError) as e:
+                print(f"Error loading player settings: {e}")
+                player_config = PlayerConfig()
+        self.player_config = player_config
+        self.vlc_runtime = VlcRuntime(player_config, parent=self)
+        self.vlc_runtime.ready.connect(self.on_vlc_ready)
+        self.vlc_runtime.failed.connect(self.on_vlc_failed)
+        self.player = None
+        self.player_events = None
+        # Opening, jumping and seeking go through the core's playback
+        # controller, driving self.player (created with the players)
+        self.playback = None
         self.bookmarks_file = "bookmarks.json"
         self.current_file = ""
         
+        # Bookmark storage backend, from the player settings ("storage" in
+        # player_config.json or --storage, see player_config.STORAGE_MODES)
+        self.bookmark_storage_mode = player_config.storage
+        self.bookmarks_snapshot_file = "bookmarks.snapshot.json"
+        self.bookmarks_db_file = "bookmarks.db"
+        
+        # Bookmark store, loaded on a worker thread once the window is up.
+        # Saving never waits for the disk on the GUI thread: bookmarks.json
+        # is rewritten by a writer thread, the journal only appends and
+        # SQLite updates single rows
+        self.bookmark_store = self.create_bookmark_store()
+        self.bookmarks_loaded = False
+        self._background_loading_started = False
+        self.bookmark_loader = BookmarkLoader(self)
+        self.bookmark_loader.loaded.connect(self.on_bookmarks_loaded)
+        self.bookmark_loader.failed.connect(self.on_bookmarks_load_failed)
+        
         # Folder inside your project
         self.audio_folder = "audio_files"  
         
         # Ensure the folder exists
         if not os.path.exists(self.audio_folder):
             os.makedirs(self.audio_folder)
-
-        # Set initial volume
-        self.player.audio_set_volume(50)
         
+        # Playback position, kept up to date by libvlc events
+        self.current_time_ms = 0
+        self.media_length_ms = 0
+        
+        # Bookmark jumps: start of the jump in progress and recent
+        # jump-to-audio latencies
+        self.jump_started = None
+        self.jump_description = ""
+        self.jump_latencies_ms = deque(maxlen=100)
+        # Whether the player's media was opened with :start-time (and maybe
+        # :start-paused), which libvlc applies again on every later play()
+        self.media_has_start_options = False
+        
+        # Previous bookmark skips bookmarks this close behind the position,
+        # so pressing it repeatedly keeps going back
+        self.previous_bookmark_grace_ms = 500
+        
+        # A-B loop over a Start/End pair: (absolute path, start_ms, end_ms)
+        # while looping. Segment ends (of the loop or of the playlist below)
+        # are detected from libvlc time events; once one arrives within
+        # segment_lookahead_ms of the end, a precise timer takes over for
+        # the rest. loop_overshoot_ms records how far past the end each wrap
+        # happened, estimated from the last time event.
+        self.loop_segment = None
+        self.segment_lookahead_ms = 300
+        self.loop_overshoot_ms = deque(maxlen=100)
+        self._segment_jump_at = 0
+        self._last_time_event = None  # (time_ms, perf_counter()) of the last time event
+        
+        # Segment playlist: entries played back to back. The next entry is
+        # pre-rolled (paused) in the standby player and swapped in at the end
+        # of the current one. playlist_gaps_ms records the silence at each
+        # handoff, measured from the handoff to the new player's first time
+        # event; handoffs are started early by the recent median gap (up to
+        # playlist_max_lead_ms) to keep it under playlist_gap_target_ms.
+        self.playlist = []
+        self.playlist_position = -1
+        self.playlist_gaps_ms = deque(maxlen=100)
+        self.playlist_gap_target_ms = 50
+        self.playlist_max_lead_ms = 100
+        self._playlist_handoff_lead = None  # lead used by the handoff in progress
+        self._handoff_latencies_ms = deque(maxlen=9)
+        
+        # Pre-parsed media of the files around the selected bookmark, and a
+        # second player pre-rolled (paused) at the selected bookmark
+        self.media_pool = MediaPool(max_items=8, max_bytes=64 * 1024 * 1024, media_factory=self.vlc_runtime.media)
+        self.use_standby_player = True
+        self.standby_player = None
+        self.standby_target = None
+        
+        # Durations, codecs and tags of files opened before
+        self.media_cache = MediaInfoCache("media_cache.json")
+        self.media_cache.load()
+        
+        # Index of the files in the audio folder, refreshed in the background
+        self.library = LibraryIndex("library_index.json", self.audio_folder)
+        self.library.load()
+        self.bookmark_files = BookmarkFiles(self.library, self.audio_folder)
+        
+        # Start/End segments, paired on first use and kept current by
+        # bookmarks_changed()
+        self._segment_index = None
+        
+        # Waveform peaks, decoded once per file content and cached on disk
+        self.waveform_loader = WaveformLoader(PeakCache("waveform_cache"))
+        self.waveform_loader.ready.connect(self.on_waveform_ready)
+        self.waveform_loader.failed.connect(self.on_waveform_failed)
+        
+        # Last values written to the time labels and slider
+        self._displayed_seconds = None
+        self._displayed_total_seconds = None
+        self._displayed_progress = None
+        
+        startup_trace.mark("state and caches")
         self.init_ui()
         self.create_actions()
         self.create_menu()
-        self.load_bookmarks()
+        self.set_bookmarks_enabled(False)
+        self.statusBar().showMessage("Loading bookmarks...")
+        startup_trace.mark("window")
+        
+    def showEvent(self, event):
+        """Start the background work once the window is first shown"""
+        super().showEvent(event)
+        if not self._background_loading_started:
+            self._background_loading_started = True
+            QTimer.singleShot(0, self.start_background_loading)
+            
+    def start_background_loading(self):
+        """Runs once the window has been painted: load bookmarks and start libvlc"""
+        startup_trace.mark("window shown")
+        # SQLite connections can only be used by the thread that opened
+        # them; opening the database is quick anyway
+        self.bookmark_loader.load(self.bookmark_store, background=self.bookmark_storage_mode != "sqlite")
+        self.vlc_runtime.start()
+        
+    def on_bookmarks_loaded(self, load_ms=None):
+        """The bookmark store is loaded: fill the list and enable bookmark actions"""
+        self.bookmarks_loaded = True
+        self.bookmark_model.reload()
+        self.bookmarks_changed()
+        self.set_bookmarks_enabled(True)
+        self.statusBar().showMessage(f"Loaded {len(self.bookmark_store)} bookmarks", 3000)
+        self.library_scanner.refresh()
+        startup_trace.event("bookmarks", load_ms)
+        
+    def on_bookmarks_load_failed(self, message):
+        print(f"Error loading bookmarks: {message}")
+        self.on_bookmarks_loaded()
+        
+    def set_bookmarks_enabled(self, enabled):
+        """Enable or disable everything that reads or changes bookmarks"""
+        self.bookmarks_group.setEnabled(enabled)
+        for action in self.bookmark_actions:
+            action.setEnabled(enabled)
+            
+    def on_vlc_ready(self):
+        self.ensure_player()
+        startup_trace.event("libvlc", self.vlc_runtime.startup_ms)
+        
+    def on_vlc_failed(self, message):
+        QMessageBox.critical(self, "Error", f"Could not start libvlc, audio cannot be played:\n{message}")
+        startup_trace.event("libvlc")
+        
+    def ensure_player(self):
+        """
+        Create the players if they do not exist yet, waiting for libvlc if
+        it is still starting.
+        
+        Raises:
+            RuntimeError: libvlc failed to start
+        """
+        if self.player is not None:
+            return
+        self.player = self.vlc_runtime.media_player()
+        if self.use_standby_player:
+            self.standby_player = self.vlc_runtime.media_player()
+        self.player.audio_set_volume(self.volume_slider.value())
+        self.playback = PlaybackController(
+            VlcPlayer(media_player=self.player, media_factory=self.media_pool.media_for, events=False)
+        )
+        # Position and state changes come from libvlc events
+        self.connect_player_events()
+        
+    def has_media(self):
+        """Whether a player exists and has a media loaded"""
+        return self.player is not None and self.player.get_media() is not None
         
     def init_ui(self):
         """Initialize the user interface"""
@@ -71,10 +279,16 @@ class EnhancedAudioPlayer(QMainWindow):
         self.total_time_label.setAlignment(Qt.AlignCenter)
         self.total_time_label.setMinimumWidth(60)
         
+        # Waveform overview with bookmark markers
+        self.waveform_view = WaveformView()
+        self.waveform_view.seek_requested.connect(self.seek_to_time)
+        progress_layout.addWidget(self.waveform_view)
+        
         # Progress slider
         self.progress_slider = QSlider(Qt.Horizontal)
         self.progress_slider.setRange(0, 1000)
         self.progress_slider.sliderMoved.connect(self.seek_audio)
+        self.progress_slider.sliderReleased.connect(self.finish_slider_seek)
         self.progress_slider.setEnabled(False)
         
         time_layout.addWidget(self.current_time_label)
@@ -124,11 +338,43 @@ class EnhancedAudioPlayer(QMainWindow):
         bookmarks_group = QGroupBox("Bookmarks")
         bookmarks_layout = QVBoxLayout(bookmarks_group)
         
-        # Bookmarks list
-        self.bookmarks_list = QListWidget()
-        self.bookmarks_list.itemDoubleClicked.connect(self.play_from_bookmark)
+        # Search box and type filters. The index is built and searched on a
+        # worker thread, and typing searches once it pauses
+        self.searcher = BookmarkSearcher(self)
+        self.searcher.finished.connect(self.on_search_finished)
+        self.search_timer = QTimer(self)
+        self.search_timer.setSingleShot(True)
+        self.search_timer.setInterval(100)
+        self.search_timer.timeout.connect(self.apply_search)
+        search_layout = QHBoxLayout()
+        self.search_edit = QLineEdit()
+        self.search_edit.setPlaceholderText("Search name, file, type, 03:00-04:00, 2024-01-01..2024-01-31")
+        self.search_edit.setClearButtonEnabled(True)
+        self.search_edit.textChanged.connect(self.search_timer.start)
+        search_layout.addWidget(self.search_edit, 1)
+        self.type_filters = {}
+        for bookmark_type in BOOKMARK_TYPES:
+            checkbox = QCheckBox(bookmark_type)
+            checkbox.setChecked(True)
+            checkbox.toggled.connect(self.apply_search)
+            search_layout.addWidget(checkbox)
+            self.type_filters[bookmark_type] = checkbox
+        bookmarks_layout.addLayout(search_layout)
+        
+        # Bookmarks list (rows are produced lazily by the model)
+        self.bookmark_model = BookmarkListModel(self.bookmark_store, self)
+        self.bookmark_model.missing_file = self.library.is_missing
+        self.bookmarks_list = QListView()
+        self.bookmarks_list.setModel(self.bookmark_model)
+        self.bookmarks_list.setUniformItemSizes(True)
+        # Lay rows out in batches, so inserting a row into a long list does
+        # not block the event loop while every row is positioned again
+        self.bookmarks_list.setLayoutMode(QListView.Batched)
+        self.bookmarks_list.setBatchSize(200)
+        self.bookmarks_list.setEditTriggers(QAbstractItemView.NoEditTriggers)
+        self.bookmarks_list.doubleClicked.connect(self.play_from_bookmark)
         bookmarks_layout.addWidget(self.bookmarks_list)
-        self.bookmarks_list.itemSelectionChanged.connect(self.update_bookmark_buttons_state)
+        self.bookmarks_list.selectionModel().selectionChanged.connect(self.update_bookmark_buttons_state)
         
         # Bookmark management buttons
         bookmark_buttons_layout = QHBoxLayout()
@@ -150,14 +396,90 @@ class EnhancedAudioPlayer(QMainWindow):
         bookmarks_layout.addLayout(bookmark_buttons_layout)
         
         main_layout.addWidget(bookmarks_group, 1)
+        self.bookmarks_group = bookmarks_group
         
         # ===== Status bar =====
         self.statusBar().showMessage("Ready")
         
-        # Timer to update time and progress
-        self.timer = QTimer()
-        self.timer.timeout.connect(self.update_time)
-        self.timer.start(100)  # Update every 100ms
+        # Coalesce bookmark writes: a burst of changes results in one save
+        self.save_timer = QTimer(self)
+        self.save_timer.setSingleShot(True)
+        self.save_timer.setInterval(500)
+        self.save_timer.timeout.connect(self.save_bookmarks)
+        
+        # Seeks are coalesced: one in flight at a time, the latest request
+        # waiting for it to arrive (or time out, see SeekScheduler)
+        self.seek_timeout_timer = QTimer(self)
+        self.seek_timeout_timer.setSingleShot(True)
+        self.seek_scheduler = SeekScheduler(
+            self.issue_seek, start_timer=self.seek_timeout_timer.start, stop_timer=self.seek_timeout_timer.stop
+        )
+        self.seek_timeout_timer.timeout.connect(self.seek_scheduler.expire)
+        
+        # Ends loop iterations and playlist segments between two time events
+        self.segment_end_timer = QTimer(self)
+        self.segment_end_timer.setSingleShot(True)
+        self.segment_end_timer.setTimerType(Qt.PreciseTimer)
+        self.segment_end_timer.timeout.connect(self.on_segment_end)
+        
+        # Pre-warm media shortly after the bookmark selection settles
+        self.prewarm_timer = QTimer(self)
+        self.prewarm_timer.setSingleShot(True)
+        self.prewarm_timer.setInterval(150)
+        self.prewarm_timer.timeout.connect(self.prewarm_around_selection)
+        self.bookmarks_list.selectionModel().currentChanged.connect(self.prewarm_timer.start)
+        
+        # Copies into the project folder, with progress in the status bar
+        self.content_index = ContentIndex("content_index.json", self.audio_folder)
+        self.content_index.load()
+        self.importer = FileImporter(self.content_index, self)
+        self.importer.progress.connect(self.on_import_progress)
+        self.importer.finished.connect(self.on_import_finished)
+        self.importer.found.connect(self.on_import_found)
+        self.importer.failed.connect(self.on_import_failed)
+        self.folder_importer = FolderImporter(self.content_index, media_factory=self.vlc_runtime.media, parent=self)
+        self.folder_importer.progress.connect(self.on_folder_import_progress)
+        self.folder_importer.imported.connect(self.on_folder_imported)
+        self.folder_importer.finished.connect(self.on_folder_import_finished)
+        self.folder_import_active = False
+        self.import_progress = QProgressBar()
+        self.import_progress.setRange(0, 100)
+        self.import_progress.setMaximumWidth(150)
+        self.import_progress.hide()
+        self.cancel_import_btn = QPushButton("Cancel Copy")
+        self.cancel_import_btn.clicked.connect(self.cancel_import)
+        self.cancel_import_btn.hide()
+        self.statusBar().addPermanentWidget(self.import_progress)
+        self.statusBar().addPermanentWidget(self.cancel_import_btn)
+        
+        # Library refreshes, triggered by changes in the audio folder
+        self.library_scanner = LibraryScanner(self.library, self.media_cache.get, self)
+        self.library_scanner.refreshed.connect(self.on_library_refreshed)
+        self.library_timer = QTimer(self)
+        self.library_timer.setSingleShot(True)
+        self.library_timer.setInterval(500)
+        self.library_timer.timeout.connect(self.library_scanner.refresh)
+        self.folder_watcher = QFileSystemWatcher(self)
+        self.folder_watcher.directoryChanged.connect(self.library_timer.start)
+        
+        # Metadata of files missing from the media cache is parsed in the background
+        self.media_parser = MediaParser(self)
+        self.media_parser.parsed.connect(self.on_media_parsed)
+        
+    def connect_player_events(self):
+        """Listen to the events of the current player, and make the playback controller drive it"""
+        self.playback.player.media_player = self.player
+        self.player_events = PlayerEvents(self.player, self)
+        # The controller follows the player first, on the GUI thread
+        self.player_events.time_changed.connect(self.playback.on_time_changed)
+        self.player_events.length_changed.connect(self.playback.on_length_changed)
+        self.player_events.end_reached.connect(self.playback.on_end_reached)
+        self.player_events.time_changed.connect(self.on_time_changed)
+        self.player_events.length_changed.connect(self.on_length_changed)
+        self.player_events.playing.connect(self.on_playing)
+        self.player_events.paused.connect(self.on_paused)
+        self.player_events.stopped.connect(self.on_stopped)
+        self.player_events.end_reached.connect(self.on_end_reached)
         
     def create_actions(self):
         """Create keyboard shortcuts"""
@@ -197,6 +519,29 @@ class EnhancedAudioPlayer(QMainWindow):
         self.seek_backward_action.triggered.connect(lambda: self.seek_relative(-5000))
         self.addAction(self.seek_backward_action)
         
+        # Next/previous bookmark of the current file with Ctrl+Right/Left
+        self.next_bookmark_action = QAction("Next Bookmark", self)
+        self.next_bookmark_action.setShortcut("Ctrl+Right")
+        self.next_bookmark_action.triggered.connect(lambda: self.jump_to_adjacent_bookmark(True))
+        self.addAction(self.next_bookmark_action)
+        
+        self.previous_bookmark_action = QAction("Previous Bookmark", self)
+        self.previous_bookmark_action.setShortcut("Ctrl+Left")
+        self.previous_bookmark_action.triggered.connect(lambda: self.jump_to_adjacent_bookmark(False))
+        self.addAction(self.previous_bookmark_action)
+        
+        # Loop the selected Start/End segment with L
+        self.loop_action = QAction("Loop Selected Segment", self)
+        self.loop_action.setShortcut("L")
+        self.loop_action.triggered.connect(self.toggle_loop)
+        self.addAction(self.loop_action)
+        
+        # Play the segments in the list back to back with Ctrl+L
+        self.playlist_action = QAction("Play Segments", self)
+        self.playlist_action.setShortcut("Ctrl+L")
+        self.playlist_action.triggered.connect(self.toggle_playlist)
+        self.addAction(self.playlist_action)
+        
     def create_menu(self):
         """Create menu bar"""
         menubar = self.menuBar()
@@ -209,6 +554,20 @@ class EnhancedAudioPlayer(QMainWindow):
         open_action.triggered.connect(self.select_file)
         file_menu.addAction(open_action)
         
+        import_folder_action = QAction("Import Folder...", self)
+        import_folder_action.triggered.connect(self.import_folder)
+        file_menu.addAction(import_folder_action)
+        
+        file_menu.addSeparator()
+        
+        import_bookmarks_action = QAction("Import Bookmarks...", self)
+        import_bookmarks_action.triggered.connect(self.import_bookmarks)
+        file_menu.addAction(import_bookmarks_action)
+        
+        export_bookmarks_action = QAction("Export Bookmarks...", self)
+        export_bookmarks_action.triggered.connect(self.export_bookmarks)
+        file_menu.addAction(export_bookmarks_action)
+        
         file_menu.addSeparator()
         
         exit_action = QAction("Exit", self)
@@ -230,17 +589,31 @@ class EnhancedAudioPlayer(QMainWindow):
         edit_bookmark_action.triggered.connect(self.edit_selected_bookmark)
         bookmarks_menu.addAction(edit_bookmark_action)
 
+        bookmarks_menu.addSeparator()
+        bookmarks_menu.addAction(self.next_bookmark_action)
+        bookmarks_menu.addAction(self.previous_bookmark_action)
+        bookmarks_menu.addAction(self.loop_action)
+        bookmarks_menu.addAction(self.playlist_action)
+        bookmarks_menu.addSeparator()
+
         clear_bookmarks_action = QAction("Clear All Bookmarks", self)
         clear_bookmarks_action.triggered.connect(self.clear_bookmarks)
         bookmarks_menu.addAction(clear_bookmarks_action)
         
+        # Disabled while the bookmarks are loading
+        self.bookmark_actions = [
+            self.bookmark_action, self.edit_action, self.next_bookmark_action, self.previous_bookmark_action,
+            self.loop_action, self.playlist_action, import_bookmarks_action, export_bookmarks_action,
+            add_bookmark_action, edit_bookmark_action, clear_bookmarks_action,
+        ]
+        
     def select_file(self):
         """Open file dialog to select audio file"""
         file_path, _ = QFileDialog.getOpenFileName(
             self,
             "Select Audio File",
             self.audio_folder,
-            "Audio Files (*.mp3 *.wav *.flac *.ogg *.m4a *.aac *.wma);;All Files (*.*)"
+            "Audio Files (" + " ".join("*" + ext for ext in AUDIO_EXTENSIONS) + ");;All Files (*.*)"
         )
         
         if file_path:
@@ -256,21 +629,81 @@ class EnhancedAudioPlayer(QMainWindow):
         Returns:
             Absolute file path
         """
-        # If it's an absolute path, use it directly
-        if os.path.isabs(stored_path):
-            return stored_path
+        return self.bookmark_files.resolve_stored_path(stored_path)
         
-        # Otherwise, assume it's relative to the audio folder
-        return os.path.join(self.audio_folder, stored_path)
+    def bookmark_file_path(self, bookmark):
+        """
+        Resolve the file of a bookmark, finding moved or renamed files by
+        fingerprint. Finding one repairs the paths of all bookmarks.
+        """
+        path, moved = self.bookmark_files.file_of(bookmark)
+        if moved:
+            self.repair_bookmarks()
+        return path
+        
+    def repair_bookmarks(self):
+        """
+        Point bookmarks of moved or renamed files at their new paths, and
+        fill in missing fingerprints, in one pass over all bookmarks.
+        
+        Returns:
+            Number of bookmarks whose path was repaired
+        """
+        updates = repair_bookmark_paths(
+            self.bookmark_store.sorted_bookmarks(), self.library, self.stored_bookmark_path
+        )
+        if not updates:
+            return 0
+        with ScrollAnchor(self.bookmarks_list):
+            for bookmark_id, changes in updates:
+                self.bookmark_store.update(bookmark_id, **changes)
+            self.bookmark_model.refresh()
+        self.schedule_bookmark_save()
+        self.bookmarks_changed([bookmark_id for bookmark_id, _ in updates])
+        repaired = sum(1 for _, changes in updates if "file" in changes)
+        if repaired:
+            self.statusBar().showMessage(f"Repaired the file paths of {repaired} bookmark(s)", 5000)
+        return repaired
+        
+    def stored_bookmark_path(self, file_path):
+        """
+        Path of a file as stored in bookmarks: relative to the audio folder
+        for files inside it, absolute otherwise.
+        """
+        return self.bookmark_files.stored_path(file_path)
+        
+    def on_library_refreshed(self, changes):
+        """Watch the indexed directories and flag bookmarks of missing files"""
+        directories = set(self.library.directories())
+        watched = set(self.folder_watcher.directories())
+        if watched - directories:
+            self.folder_watcher.removePaths(list(watched - directories))
+        if directories - watched:
+            self.folder_watcher.addPaths(list(directories - watched))
+        
+        self.repair_bookmarks()
+        self.bookmark_model.files_changed()
+        missing = self.library.missing_files(self.bookmark_store.sorted_bookmarks())
+        if missing:
+            self.statusBar().showMessage(f"{len(missing)} bookmarked file(s) not found", 5000)
+            
+    def load_audio_file(self, file_path, start_ms=None):
+        """
+        Load and prepare audio file for playback, and copy it to project folder if needed.
+        
+        Args:
+            file_path: File to load
+            start_ms: If given, the file starts playing at this offset
             
-    def load_audio_file(self, file_path):
-        """Load and prepare audio file for playback, and copy it to project folder if needed"""
+        Returns:
+            True if the file was loaded
+        """
         try:
             # Resolve path if it might be relative
             if not os.path.isabs(file_path):
                 # Try to find it in the audio folder
-                potential_path = os.path.join(self.audio_folder, file_path)
-                if os.path.exists(potential_path):
+                potential_path = self.library.resolve(file_path)
+                if potential_path:
                     file_path = potential_path
                 elif os.path.exists(file_path):
                     # It's a relative path from current directory
@@ -291,83 +724,25 @@ class EnhancedAudioPlayer(QMainWindow):
                 self.current_file = file_path
                 self.statusBar().showMessage(f"Loaded from project folder: {filename}", 3000)
             else:
-                # Copy file to project audio folder
-                destination_path = os.path.join(self.audio_folder, filename)
-                
-                # Check if file already exists in destination
-                if os.path.exists(destination_path):
-                    # Ask user what to do
-                    reply = QMessageBox.question(
-                        self,
-                        "File Exists",
-                        f"'{filename}' already exists in the project folder.\n\n"
-                        f"Would you like to:\n"
-                        f"• Use existing file (Recommended)\n"
-                        f"• Overwrite with new file\n"
-                        f"• Cancel",
-                        QMessageBox.Yes | QMessageBox.No | QMessageBox.Cancel
-                    )
-                    
-                    if reply == QMessageBox.Cancel:
-                        return  # User canceled
-                    elif reply == QMessageBox.Yes:
-                        # Use existing file in project folder
-                        self.current_file = destination_path
-                        self.statusBar().showMessage(f"Using existing file in project folder: {filename}", 3000)
-                    else:  # QMessageBox.No - Overwrite
-                        try:
-                            import shutil
-                            shutil.copy2(file_path, destination_path)
-                            self.current_file = destination_path
-                            self.statusBar().showMessage(f"Overwritten in project folder: {filename}", 3000)
-                        except Exception as copy_error:
-                            QMessageBox.warning(
-                                self, 
-                                "Copy Failed", 
-                                f"Could not overwrite file:\n{str(copy_error)}\n"
-                                f"Will use original file location instead."
-                            )
-                            self.current_file = file_path
-                else:
-                    # Copy the file (new file)
-                    try:
-                        import shutil
-                        shutil.copy2(file_path, destination_path)
-                        self.current_file = destination_path
-                        self.statusBar().showMessage(f"Copied to project folder: {filename}", 3000)
-                    except Exception as copy_error:
-                        QMessageBox.warning(
-                            self, 
-                            "Copy Failed", 
-                            f"Could not copy file to project folder:\n{str(copy_error)}\n"
-                            f"Will use original file location instead."
-                        )
-                        # Use original file path if copy fails
-                        self.current_file = file_path
-            
-            self.file_label.setText(filename)
-            
-            # Load media
-            media = vlc.Media(self.current_file)
-            self.player.set_media(media)
-            
-            # Enable controls
-            self.play_pause_btn.setEnabled(True)
-            self.play_pause_btn.setText("▶ Play")
-            self.stop_btn.setEnabled(True)
-            self.bookmark_btn.setEnabled(True)
-            self.progress_slider.setEnabled(True)
-            
-            # Reset display
-            self.current_time_label.setText("00:00")
-            self.total_time_label.setText("00:00")
-            self.progress_slider.setValue(0)
-            
-            # Update status
-            self.statusBar().showMessage(f"Loaded: {filename}", 3000)
+                # Import the file into the project folder in the background
+                # (or find the identical file already there) and play from
+                # the original meanwhile
+                self.current_file = file_path
+                self.start_import(file_path)
             
-            # Get total duration after a short delay
-            QTimer.singleShot(100, self.update_total_time)
+            # Load media; with start_ms, the demuxer starts at the offset
+            # rather than seeking once playback has begun
+            self.ensure_player()
+            if start_ms is None:
+                media = self.media_pool.media_for(self.current_file)
+                self.player.set_media(media)
+                self.playback.adopt(self.current_file)
+            else:
+                self.playback.open(self.current_file, start_ms)
+                media = self.player.get_media()
+            self.media_has_start_options = start_ms is not None
+            self.show_loaded_file(media)
+            return True
             
         except FileNotFoundError as e:
             QMessageBox.warning(self, "File Not Found", str(e))
@@ -375,133 +750,674 @@ class EnhancedAudioPlayer(QMainWindow):
         except Exception as e:
             QMessageBox.critical(self, "Error", f"Failed to load file:\n{str(e)}")
             self.reset_player()
+        return False
+        
+    def show_loaded_file(self, media):
+        """Update the controls for the media of current_file that was just loaded"""
+        filename = os.path.basename(self.current_file)
+        self.file_label.setText(filename)
+        
+        # Enable controls
+        self.play_pause_btn.setEnabled(True)
+        self.play_pause_btn.setText("▶ Play")
+        self.stop_btn.setEnabled(True)
+        self.bookmark_btn.setEnabled(True)
+        self.progress_slider.setEnabled(True)
+        
+        # Reset display; the duration is known right away for cached files
+        self.seek_scheduler.cancel()
+        self.current_time_ms = 0
+        self.media_length_ms = 0
+        info = self.media_cache.get(self.current_file)
+        if info and info["duration_ms"] > 0:
+            self.media_length_ms = info["duration_ms"]
+        else:
+            self.media_parser.parse(self.current_file, media)
+        self.update_position_display()
+        self.update_total_time()
+        
+        if self.loop_segment is not None and self.loop_segment[0] != os.path.abspath(self.current_file):
+            self.stop_loop()
+        if self.playlist and self.playlist[self.playlist_position]["path"] != os.path.abspath(self.current_file):
+            self.stop_playlist()
+        
+        # Waveform, from the peak cache or decoded in the background
+        self.waveform_view.clear()
+        self.waveform_view.set_duration(self.media_length_ms)
+        self.update_waveform_markers()
+        self.waveform_loader.load(self.current_file, self.library.fingerprint(self.current_file))
+        
+        # Update status
+        self.statusBar().showMessage(f"Loaded: {filename}", 3000)
+            
+    def start_import(self, source):
+        """Start importing a file into the project folder in the background"""
+        if self.importer.start(source):
+            self.import_progress.setValue(0)
+            self.import_progress.show()
+            self.cancel_import_btn.show()
+            self.statusBar().showMessage(f"Copying {os.path.basename(source)} to project folder...")
+            
+    def import_folder(self):
+        """Import all audio files of a folder tree into the project folder"""
+        if self.folder_import_active:
+            QMessageBox.information(self, "Import Running", "A folder import is already running.")
+            return
+        folder = QFileDialog.getExistingDirectory(self, "Import Folder")
+        if not folder:
+            return
+        if self.folder_importer.start(folder, skip_dirs=(self.audio_folder,)):
+            self.folder_import_active = True
+            self.import_progress.setValue(0)
+            self.import_progress.show()
+            self.cancel_import_btn.show()
+            self.statusBar().showMessage(f"Importing {folder}...")
+            
+    def on_folder_import_progress(self, totals):
+        """Show files done and throughput of the folder import"""
+        if not self.folder_import_active:
+            return
+        if totals["found"]:
+            self.import_progress.setValue(totals["done"] * 100 // totals["found"])
+        self.statusBar().showMessage(
+            f"Importing folder: {totals['done']} of {totals['found']} files, "
+            f"{totals['files_per_s']:.0f} files/s, {totals['mb_per_s']:.1f} MB/s"
+        )
+        
+    def on_folder_imported(self, results):
+        """Take in a batch of imported files"""
+        for result in results:
+            if result["info"] is not None:
+                self.media_cache.put(result["stored"], result["info"])
+                self.library.set_info(result["stored"], result["info"])
+            elif result["error"] and result["error"] != "Canceled":
+                print(f"Error importing {result['source']}: {result['error']}")
+                
+    def on_folder_import_finished(self, totals):
+        """Report the totals of a folder import"""
+        self.folder_import_active = False
+        self.end_import_progress()
+        try:
+            self.content_index.flush()
+        except Exception as e:
+            print(f"Error saving content index: {e}")
+        try:
+            self.media_cache.flush()
+        except Exception as e:
+            print(f"Error saving media cache: {e}")
+        if totals["error"]:
+            QMessageBox.warning(self, "Import Failed", f"Folder import stopped:\n{totals['error']}")
+        state = "canceled" if totals["canceled"] else "failed" if totals["error"] else "done"
+        self.statusBar().showMessage(
+            f"Folder import {state}: {totals['done']} files ({totals['copied']} copied, "
+            f"{totals['duplicates']} already present, {totals['failed']} failed) in "
+            f"{totals['seconds']:.1f} s, {totals['files_per_s']:.0f} files/s, "
+            f"{totals['mb_per_s']:.1f} MB/s", 10000
+        )
+        
+    def cancel_import(self):
+        """Cancel the running copies and folder import"""
+        self.importer.cancel()
+        if self.folder_import_active:
+            self.folder_importer.cancel()
+            self.statusBar().showMessage("Canceling folder import...")
+            return
+        self.end_import_progress()
+        self.statusBar().showMessage("Copy canceled, playing from the original location", 3000)
+        
+    def end_import_progress(self):
+        """Hide the copy progress once no copy is running"""
+        if not self.importer.is_importing() and not self.folder_import_active:
+            self.import_progress.hide()
+            self.cancel_import_btn.hide()
             
+    def on_import_progress(self, source, copied, total):
+        """Show how far a background copy got"""
+        if not self.importer.is_importing(source):
+            return
+        self.import_progress.setValue(int(copied * 100 / total) if total else 100)
+        self.statusBar().showMessage(
+            f"Copying {os.path.basename(source)}: {copied / 1048576:.1f} of {total / 1048576:.1f} MB"
+        )
+        
+    def on_import_finished(self, source, destination, size, seconds):
+        """Switch to the project copy of a file once its copy completed"""
+        self.end_import_progress()
+        throughput = size / 1048576 / seconds if seconds > 0 else 0
+        self.statusBar().showMessage(
+            f"Copied {os.path.basename(source)} to project folder as {os.path.basename(destination)} "
+            f"({size / 1048576:.1f} MB in {seconds:.2f} s, {throughput:.1f} MB/s)", 5000
+        )
+        self.switch_to_project_copy(source, destination)
+        
+    def on_import_found(self, source, existing):
+        """Switch to the identical file already in the project folder"""
+        self.end_import_progress()
+        self.statusBar().showMessage(
+            f"{os.path.basename(source)} is already in the project folder as {os.path.basename(existing)}", 5000
+        )
+        self.switch_to_project_copy(source, existing)
+        
+    def switch_to_project_copy(self, source, destination):
+        """Use the project folder copy of a file that was played from elsewhere"""
+        try:
+            self.content_index.flush()
+        except Exception as e:
+            print(f"Error saving content index: {e}")
+        
+        # Bookmarks added while the import ran point at the original; the
+        # copy is stored relative to the audio folder, as add_bookmark does
+        for bookmark in self.bookmark_store.bookmarks_for_file(os.path.basename(source)):
+            if bookmark["file"] == source:
+                old_key = bookmark_sort_key(bookmark)
+                self.bookmark_store.update(
+                    bookmark["id"], file=self.stored_bookmark_path(destination),
+                    filename=os.path.basename(destination)
+                )
+                self.bookmark_model.bookmark_changed(bookmark["id"], old_key)
+                self.bookmarks_changed([bookmark["id"]])
+                self.schedule_bookmark_save()
+        
+        if self.current_file != source:
+            return
+        self.current_file = destination
+        self.file_label.setText(os.path.basename(destination))
+        state = self.player.get_state()
+        if state in (vlc.State.Playing, vlc.State.Paused):
+            # Continue from the same position in the copy
+            options = (":start-paused",) if state == vlc.State.Paused else ()
+            position_ms = max(0, self.player.get_time())
+            media = self.media_pool.media_for(destination, position_ms, options)
+            self.player.set_media(media)
+            self.player.play()
+            self.playback.adopt(destination, position_ms, started=True)
+            self.media_has_start_options = True
+        else:
+            self.player.set_media(self.media_pool.media_for(destination))
+            self.playback.adopt(destination)
+            self.media_has_start_options = False
+            
+    def on_import_failed(self, source, message):
+        """Keep playing from the original location when a copy fails"""
+        self.end_import_progress()
+        QMessageBox.warning(
+            self, 
+            "Copy Failed", 
+            f"Could not copy file to project folder:\n{message}\n"
+            f"Will use original file location instead."
+        )
+        
+    def on_waveform_ready(self, path, peaks):
+        """Peaks of a file are available"""
+        if path == self.current_file:
+            self.waveform_view.set_peaks(peaks)
+            
+    def on_waveform_failed(self, path, message):
+        print(f"Could not compute waveform of {path}: {message}")
+        
+    def update_waveform_markers(self):
+        """Show the bookmarks of the current file on the waveform"""
+        if not self.current_file:
+            self.waveform_view.set_markers([])
+            return
+        filename = os.path.basename(self.current_file)
+        self.waveform_view.set_markers(
+            self.bookmark_store.bookmarks_for_file(filename),
+            self.segment_index().segments_for_file(filename)
+        )
+        
     def update_total_time(self):
         """Update the total time display"""
-        if self.player.get_media():
-            length_ms = self.player.get_length()
-            if length_ms > 0:
-                seconds = length_ms // 1000
-                self.total_time_label.setText(f"{seconds // 60:02d}:{seconds % 60:02d}")
+        if self.media_length_ms <= 0 and self.has_media():
+            self.media_length_ms = max(0, self.player.get_length())
+        self.waveform_view.set_duration(self.media_length_ms)
+        seconds = self.media_length_ms // 1000
+        if seconds != self._displayed_total_seconds:
+            self._displayed_total_seconds = seconds
+            self.total_time_label.setText(f"{seconds // 60:02d}:{seconds % 60:02d}")
+            
+    def update_position_display(self):
+        """Show current_time_ms in the time label and progress slider, skipping unchanged values"""
+        seconds = self.current_time_ms // 1000
+        if seconds != self._displayed_seconds:
+            self._displayed_seconds = seconds
+            self.current_time_label.setText(f"{seconds // 60:02d}:{seconds % 60:02d}")
+        self.waveform_view.set_position(self.current_time_ms)
+        
+        # Only update the slider if user isn't dragging it
+        if self.progress_slider.isSliderDown():
+            return
+        progress = int((self.current_time_ms / self.media_length_ms) * 1000) if self.media_length_ms > 0 else 0
+        if progress != self._displayed_progress:
+            self._displayed_progress = progress
+            self.progress_slider.setValue(progress)
+            
+    def on_time_changed(self, ms):
+        """libvlc reported a new playback time"""
+        self._last_time_event = (ms, time.perf_counter())
+        self.seek_scheduler.on_time_changed(ms)
+        if not self.seek_scheduler.busy:
+            # While a seek is on its way, the target stays displayed
+            self.current_time_ms = ms
+            self.update_position_display()
+        
+        # The clock only advances once audio is playing: a bookmark jump is complete
+        if self.jump_started is not None:
+            latency_ms = (time.perf_counter() - self.jump_started) * 1000
+            self.jump_started = None
+            self.jump_latencies_ms.append(latency_ms)
+            if self._playlist_handoff_lead is not None:
+                # What the early start did not cover was silence
+                gap_ms = max(0.0, latency_ms - self._playlist_handoff_lead)
+                self._playlist_handoff_lead = None
+                self._handoff_latencies_ms.append(latency_ms)
+                self.playlist_gaps_ms.append(gap_ms)
+                self.statusBar().showMessage(
+                    f"Playing {self.jump_description} "
+                    f"({self.playlist_position + 1}/{len(self.playlist)}, gap {gap_ms:.0f} ms)", 3000
+                )
+            else:
+                self.statusBar().showMessage(
+                    f"Playing from {self.jump_description} (audio after {latency_ms:.0f} ms)", 3000
+                )
+        
+        if self.loop_segment is not None or self.playlist:
+            self.check_segment_end(ms)
+        
+    def on_length_changed(self, ms):
+        """libvlc reported the media length"""
+        if ms > 0:
+            self.media_length_ms = ms
+            self.update_total_time()
+            self.update_position_display()
+            
+    def on_media_parsed(self, path, media):
+        """Background parsing of a file finished: cache its metadata"""
+        if media.get_parsed_status() != vlc.MediaParsedStatus.done:
+            return
+        try:
+            info = media_info_from_vlc(media, os.path.getsize(path))
+        except OSError:
+            return
+        self.media_cache.put(path, info)
+        self.library.set_info(path, info)
+        try:
+            self.media_cache.flush()
+        except Exception as e:
+            print(f"Error saving media cache: {e}")
+        
+        if path == self.current_file and self.media_length_ms <= 0 and info["duration_ms"] > 0:
+            self.on_length_changed(info["duration_ms"])
+            
+    def on_playing(self):
+        """Playback started or resumed"""
+        self.play_pause_btn.setText("⏸ Pause")
+        
+    def on_paused(self):
+        """Playback paused"""
+        self.play_pause_btn.setText("▶ Play")
+        self.segment_end_timer.stop()
+        
+    def on_stopped(self):
+        """Playback stopped"""
+        self.play_pause_btn.setText("▶ Play")
+        self.segment_end_timer.stop()
+        
+    def on_end_reached(self):
+        """Playback reached the end of the media"""
+        if self.playlist:
+            self.advance_playlist()
+            return
+        self.on_stopped()
+        self.clear_start_options()
+        self.current_time_ms = self.media_length_ms
+        self.update_position_display()
                 
     def toggle_play_pause(self):
         """Toggle between play and pause"""
-        if self.player.is_playing():
-            self.player.pause()
+        if self.player is not None and self.player.is_playing():
+            self.playback.pause()
             self.play_pause_btn.setText("▶ Play")  # Change to Play icon
             self.statusBar().showMessage("Paused", 2000)
         else:
             if self.current_file:
-                self.player.play()
+                self.playback.play()
                 self.play_pause_btn.setText("⏸ Pause")  # Change to Pause icon
                 self.statusBar().showMessage("Playing", 2000)
             
     def stop_audio(self):
         """Stop audio playback"""
-        self.player.stop()
-        self.current_time_label.setText("00:00")
-        self.progress_slider.setValue(0)
+        if self.playlist:
+            self.stop_playlist()
+        self.seek_scheduler.cancel()
+        if self.player is not None:
+            self.playback.stop()
+            self.clear_start_options()
+        self.current_time_ms = 0
+        self.update_position_display()
         self.play_pause_btn.setText("▶ Play")  # Reset to Play when stopped
         self.statusBar().showMessage("Stopped", 2000)
         
-    def update_time(self):
-        """Update current time and progress slider"""
-        # Handle pending seeks from throttling
-        if self.pending_seek is not None and self.player.get_media():
-            current_time = QDateTime.currentMSecsSinceEpoch()
-            if current_time - self.last_seek_time >= self.seek_throttle_ms:
-                self._perform_seek(self.pending_seek)
-                self.last_seek_time = current_time
-                self.pending_seek = None
-        
-        # Rest of your existing update_time code...
-        if self.player.get_media():
-            ms = self.player.get_time()
-            length = self.player.get_length()
-            
-            if ms >= 0:
-                # Update time label
-                seconds = ms // 1000
-                self.current_time_label.setText(f"{seconds // 60:02d}:{seconds % 60:02d}")
-                
-                # Update progress slider
-                if length > 0:
-                    progress = int((ms / length) * 1000)
-                    if not self.progress_slider.isSliderDown():  # Only update if user isn't dragging
-                        self.progress_slider.setValue(progress)
-                
-    def seek_audio(self, position):
-        """Seek to specific position in audio with throttling"""
-        if not self.player.get_media():
+    def clear_start_options(self):
+        """
+        Give the stopped player a plain media of the current file, so the
+        next play() starts at 0, unpaused, rather than the way it was opened.
+        """
+        if not self.media_has_start_options or not self.current_file:
             return
+        self.player.set_media(self.media_pool.media_for(self.current_file))
+        self.media_has_start_options = False
         
-        current_time = QDateTime.currentMSecsSinceEpoch()
-        
-        # Throttle rapid seeks
-        if current_time - self.last_seek_time < self.seek_throttle_ms:
-            # Store the most recent position but don't seek yet
-            self.pending_seek = position
+    def seek_audio(self, position):
+        """The slider was dragged to position (0-1000)"""
+        if not self.has_media() or self.media_length_ms <= 0:
             return
+        time_ms = int((position / 1000) * self.media_length_ms)
+        self.seek_scheduler.request(time_ms)
+        self.current_time_ms = time_ms
+        self.update_position_display()
+        
+    def finish_slider_seek(self):
+        """The slider was released: seek to where it ended up right away"""
+        if not self.has_media() or self.media_length_ms <= 0:
+            return
+        time_ms = int((self.progress_slider.value() / 1000) * self.media_length_ms)
+        self.seek_scheduler.seek_now(time_ms)
+        self.current_time_ms = time_ms
+        self.update_position_display()
+        metrics = self.seek_scheduler.metrics()
+        latency = f", {metrics['p50_ms']:.0f} ms median to audio" if metrics["p50_ms"] is not None else ""
+        self.statusBar().showMessage(
+            f"Seeks: {metrics['issued']} issued, {metrics['dropped']} coalesced{latency}", 2000
+        )
         
-        # Perform the actual seek
-        self._perform_seek(position)
-        self.last_seek_time = current_time
-        
-        QTimer.singleShot(500, self._force_audio_resync)
-        
-    def _perform_seek(self, position):
-        """Actually perform the seek operation"""
-        length = self.player.get_length()
-        if length > 0:
-            new_time = int((position / 1000) * length)
-            
-            # Pause briefly before seeking for cleaner audio
-            was_playing = self.player.is_playing()
-            if was_playing:
-                self.player.pause()
-            
-            # Perform the seek
-            self.player.set_time(new_time)
-            
-            # Resume playback if it was playing
-            if was_playing:
-                QTimer.singleShot(10, self.player.play)  # Small delay before resuming
+    def issue_seek(self, time_ms):
+        """
+        Move the player; called by the seek scheduler. Every seek, jumps to
+        a bookmark and loop wraps within the file included, goes through
+        the scheduler, so a coalesced seek still pending cannot land after
+        (and override) one of them.
+        """
+        if self.has_media():
+            self.playback.seek(int(time_ms))
 
     def seek_relative(self, ms_offset):
         """Seek forward or backward by specified milliseconds"""
-        if self.player.get_media():
-            current_time = self.player.get_time()
+        if self.has_media():
+            # Relative to a seek still on its way, so repeated presses add up
+            current_time = self.seek_scheduler.target_ms
+            if current_time is None:
+                current_time = self.playback.position_ms
             new_time = max(0, current_time + ms_offset)
-            self.player.set_time(new_time)
+            if self.media_length_ms > 0:
+                new_time = min(new_time, self.media_length_ms)
+            self.seek_scheduler.request(new_time)
+            self.current_time_ms = new_time
+            self.update_position_display()
 
-    def _force_audio_resync(self):
-        """Force audio resynchronization"""
-        if not self.player or not self.player.is_playing():
+    def seek_to_time(self, time_ms):
+        """Seek to a time picked on the waveform"""
+        if not self.has_media():
             return
+        if self.media_length_ms > 0:
+            time_ms = min(time_ms, self.media_length_ms)
+        self.seek_scheduler.request(time_ms)
+        self.current_time_ms = time_ms
+        self.update_position_display()
+
+    def jump_to_adjacent_bookmark(self, forward):
+        """Seek to the next or previous bookmark of the current file"""
+        if not self.current_file or not self.has_media():
+            return
+        filename = os.path.basename(self.current_file)
+        if forward:
+            bookmark = self.bookmark_store.next_bookmark(filename, self.current_time_ms)
+        else:
+            bookmark = self.bookmark_store.previous_bookmark(
+                filename, max(0, self.current_time_ms - self.previous_bookmark_grace_ms)
+            )
+        if bookmark is None:
+            self.statusBar().showMessage("No next bookmark" if forward else "No previous bookmark", 2000)
+            return
+        self.seek_scheduler.request(bookmark["time_ms"])
+        self.current_time_ms = bookmark["time_ms"]
+        self.update_position_display()
+        row = self.bookmark_model.row_for_id(bookmark["id"])
+        if row >= 0:
+            self.bookmarks_list.setCurrentIndex(self.bookmark_model.index(row))
+        self.statusBar().showMessage(f"Bookmark: {bookmark['name']}", 2000)
+        
+    def selected_segment(self):
+        """
+        Return the (Start, End) bookmark pair of the selected bookmark's
+        segment, or None if it is not part of one.
+        """
+        index = self.bookmarks_list.currentIndex()
+        bookmark_id = index.data(BookmarkIdRole) if index.isValid() else None
+        if bookmark_id is None:
+            return None
+        segment = self.segment_index().segment_of(bookmark_id)
+        if segment is None:
+            return None
+        return self.bookmark_store.get(segment[2]), self.bookmark_store.get(segment[3])
+        
+    def toggle_loop(self):
+        """Start looping the selected Start/End segment, or stop looping"""
+        if self.loop_segment is not None:
+            self.stop_loop()
+            return
+        segment = self.selected_segment()
+        if segment is None:
+            self.statusBar().showMessage("Select a Start or End bookmark of a segment to loop", 3000)
+            return
+        if self.playlist:
+            self.stop_playlist()
+        start, end = segment
+        path = os.path.abspath(self.bookmark_file_path(start))
+        self.loop_segment = (path, start["time_ms"], end["time_ms"])
+        self.loop_overshoot_ms.clear()
+        description = f"loop: {start['name']} → {end['name']}"
+        if self.current_file and path == os.path.abspath(self.current_file):
+            self.seek_scheduler.seek_now(start["time_ms"])
+            self.current_time_ms = start["time_ms"]
+            self.update_position_display()
+            self.playback.play()
+            self.statusBar().showMessage(f"Playing {description}", 3000)
+        elif not self.open_at_offset(path, start["time_ms"], description):
+            self.loop_segment = None
+            
+    def stop_loop(self):
+        """Stop looping, reporting how precisely the loop end was hit"""
+        self.loop_segment = None
+        self.segment_end_timer.stop()
+        if self.loop_overshoot_ms:
+            overshoots = sorted(self.loop_overshoot_ms)
+            self.statusBar().showMessage(
+                f"Loop off ({len(overshoots)} wraps, past the end by "
+                f"{overshoots[len(overshoots) // 2]:.0f} ms median, {overshoots[-1]:.0f} ms max)",
+                5000
+            )
+        else:
+            self.statusBar().showMessage("Loop off", 2000)
+            
+    def segment_end_ms(self):
+        """(start_ms, end_ms) of the loop or playlist segment playing, or None"""
+        if self.loop_segment is not None:
+            return self.loop_segment[1], self.loop_segment[2]
+        if self.playlist:
+            entry = self.playlist[self.playlist_position]
+            # Hand off early by the recent gap, so the next segment's audio
+            # starts about when this one ends
+            return entry["start_ms"], entry["end_ms"] - self.playlist_handoff_lead_ms()
+        return None
+        
+    def check_segment_end(self, ms):
+        """Act on the end of the loop or playlist segment, or time it if it is near"""
+        # Time events queued before the last jump still carry old times
+        if time.perf_counter() - self._segment_jump_at < 0.2:
+            return
+        start_ms, end_ms = self.segment_end_ms()
+        if ms >= end_ms:
+            self.on_segment_end()
+        elif end_ms - ms <= self.segment_lookahead_ms and ms >= start_ms:
+            self.segment_end_timer.start(end_ms - ms)
+            
+    def on_segment_end(self):
+        """The loop or playlist segment playing reached its end"""
+        self.segment_end_timer.stop()
+        if self.loop_segment is not None:
+            self.wrap_loop()
+        elif self.playlist:
+            self.advance_playlist()
+            
+    def estimated_time_ms(self):
+        """Playback position now, extrapolated from the last time event"""
+        if self._last_time_event is None:
+            return self.current_time_ms
+        ms, at = self._last_time_event
+        return ms + (time.perf_counter() - at) * 1000 * (self.player.get_rate() or 1.0)
+        
+    def wrap_loop(self):
+        """Go back to the start of the A-B loop"""
+        if self.loop_segment is None or not self.player.is_playing():
+            return
+        _, start_ms, end_ms = self.loop_segment
+        self.loop_overshoot_ms.append(self.estimated_time_ms() - end_ms)
+        self.seek_scheduler.seek_now(start_ms)
+        self._segment_jump_at = time.perf_counter()
+        self._last_time_event = (start_ms, self._segment_jump_at)
+        self.current_time_ms = start_ms
+        self.update_position_display()
+        
+    def playlist_entries(self):
+        """
+        Playlist entries for the segments shown in the bookmark list, in
+        list order, skipping segments whose file is missing.
+        """
+        entries = []
+        for _, segment in self.segment_index().all_segments():
+            start_ms, end_ms, start_id, end_id = segment
+            if self.bookmark_model.row_for_id(start_id) < 0:
+                continue  # filtered out by the search
+            start = self.bookmark_store.get(start_id)
+            end = self.bookmark_store.get(end_id)
+            path = self.bookmark_file_path(start)
+            if not os.path.exists(path):
+                continue
+            entries.append({
+                "path": os.path.abspath(path),
+                "start_ms": start_ms,
+                "end_ms": end_ms,
+                "start_id": start_id,
+                "description": f"segment: {start['name']} → {end['name']}",
+            })
+        return entries
+        
+    def toggle_playlist(self):
+        """
+        Play the listed segments back to back, from the selected one if a
+        segment bookmark is selected, or stop the playlist.
+        """
+        if self.playlist:
+            self.stop_playlist()
+            return
+        entries = self.playlist_entries()
+        if not entries:
+            self.statusBar().showMessage("No Start/End segments to play", 3000)
+            return
+        first = 0
+        selected = self.selected_segment()
+        if selected is not None:
+            first = next((position for position, entry in enumerate(entries)
+                          if entry["start_id"] == selected[0]["id"]), 0)
+        if self.loop_segment is not None:
+            self.stop_loop()
+        self.playlist = entries
+        self.playlist_gaps_ms.clear()
+        self.play_playlist_entry(first, handoff=False)
+        
+    def playlist_handoff_lead_ms(self):
+        """How early to hand off to the next segment: the recent median handoff latency"""
+        if not self._handoff_latencies_ms:
+            return 0
+        recent = sorted(self._handoff_latencies_ms)
+        return min(recent[len(recent) // 2], self.playlist_max_lead_ms)
+        
+    def play_playlist_entry(self, position, handoff=True):
+        """
+        Start playing a playlist entry: by unpausing the standby player if it
+        was pre-rolled there, else by opening its file.
         
-        current_time = self.player.get_time()
-        current_volume = self.player.audio_get_volume()
-        
-        # Briefly mute and unmute to trigger resync
-        self.player.audio_set_volume(0)
-        QTimer.singleShot(50, lambda: self.player.audio_set_volume(current_volume))
+        Args:
+            position: Index of the entry in the playlist
+            handoff: Whether this follows the previous entry, so the gap is measured
+        """
+        entry = self.playlist[position]
+        lead_ms = self.playlist_handoff_lead_ms()
+        self.playlist_position = position
+        self._segment_jump_at = time.perf_counter()
+        self._last_time_event = (entry["start_ms"], self._segment_jump_at)
+        if self.standby_target == (entry["path"], entry["start_ms"]):
+            self.jump_started = time.perf_counter()
+            self.jump_description = entry["description"]
+            self.swap_to_standby(entry["start_ms"])
+        elif not self.open_at_offset(entry["path"], entry["start_ms"], entry["description"]):
+            self.stop_playlist()
+            return
+        self._playlist_handoff_lead = lead_ms if handoff else None
+        # After the old player was stopped (swap_to_standby defers that)
+        QTimer.singleShot(100, self.preroll_next_segment)
         
-        # Or briefly pause/resume
-        # self.player.pause()
-        # QTimer.singleShot(100, self.player.play)
-            
+    def preroll_next_segment(self):
+        """Pre-roll the next playlist entry in the standby player"""
+        if not self.playlist or self.playlist_position + 1 >= len(self.playlist):
+            return
+        entry = self.playlist[self.playlist_position + 1]
+        self.preroll_standby(entry["path"], entry["start_ms"])
+        
+    def advance_playlist(self):
+        """Hand off from the segment that just ended to the next one"""
+        if self.playlist_position + 1 >= len(self.playlist):
+            self.playback.pause()
+            self.stop_playlist()
+            return
+        self.play_playlist_entry(self.playlist_position + 1)
+        
+    def stop_playlist(self):
+        """Stop playing segments back to back, reporting the handoff gaps"""
+        played = self.playlist_position + 1
+        self.playlist = []
+        self.playlist_position = -1
+        self._playlist_handoff_lead = None
+        self.segment_end_timer.stop()
+        if self.playlist_gaps_ms:
+            gaps = sorted(self.playlist_gaps_ms)
+            over = sum(1 for gap in gaps if gap > self.playlist_gap_target_ms)
+            self.statusBar().showMessage(
+                f"Segments done ({played} played; gap {gaps[len(gaps) // 2]:.0f} ms median, "
+                f"{gaps[-1]:.0f} ms max, {over} over {self.playlist_gap_target_ms} ms)",
+                5000
+            )
+        else:
+            self.statusBar().showMessage("Segments done", 2000)
+
     def set_volume(self, value):
         """Set audio volume"""
-        self.player.audio_set_volume(value)
+        if self.player is not None:
+            self.player.audio_set_volume(value)
         self.statusBar().showMessage(f"Volume: {value}%", 1000)
         
     def add_bookmark(self):
         """Add bookmark at current position"""
+        if not self.bookmarks_loaded:
+            self.statusBar().showMessage("Bookmarks are still loading", 2000)
+            return
+            
         if not self.current_file:
             QMessageBox.warning(self, "No File", "Please load an audio file first.")
             return
             
-        if not self.player.get_media():
+        if not self.has_media():
             QMessageBox.warning(self, "No Media", "No audio file is loaded.")
             return
             
@@ -569,148 +1485,194 @@ class EnhancedAudioPlayer(QMainWindow):
         
         bookmark_type = type_combo.currentText()
         
-        # Convert to relative path if in audio folder
-        file_path = self.current_file
+        # Relative path if in audio folder, else full path
+        stored_path = self.stored_bookmark_path(self.current_file)
         filename = os.path.basename(self.current_file)
         
-        # Check if file is inside the audio folder
-        try:
-            audio_folder_abs = os.path.abspath(self.audio_folder)
-            file_path_abs = os.path.abspath(file_path)
-            
-            if file_path_abs.startswith(audio_folder_abs):
-                # File is in audio folder, use relative path
-                relative_path = os.path.relpath(file_path_abs, audio_folder_abs)
-                # For direct files in audio folder, we want just the filename
-                if os.path.dirname(relative_path) == ".":
-                    stored_path = relative_path  # Just the filename
-                else:
-                    stored_path = relative_path  # Relative path from audio folder
-            else:
-                # File is outside audio folder, use full path
-                stored_path = file_path
-        except:
-            # If there's any error, fall back to full path
-            stored_path = file_path
-        
         bookmark = {
             "file": stored_path,  # Use relative or full path
             "filename": filename,
             "time_ms": time_ms,
             "name": name,
             "type": bookmark_type,
-            "timestamp": QDateTime.currentDateTime().toString("yyyy-MM-dd HH:mm:ss")
+            "timestamp": QDateTime.currentDateTime().toString("yyyy-MM-dd HH:mm:ss"),
+            "fingerprint": self.library.fingerprint(self.current_file),
         }
         
-        # Load existing bookmarks
-        bookmarks = self.load_all_bookmarks()
-        bookmarks.append(bookmark)
-        
-        # Save back to file
-        try:
-            with open(self.bookmarks_file, "w") as f:
-                json.dump(bookmarks, f, indent=2)
-        except Exception as e:
-            QMessageBox.critical(self, "Error", f"Failed to save bookmark:\n{str(e)}")
-            return
+        bookmark_id = self.bookmark_store.add(bookmark)
+        self.schedule_bookmark_save()
             
-        # Refresh display
-        self.load_bookmarks()
+        # Insert the new row at its sorted position
+        with ScrollAnchor(self.bookmarks_list):
+            self.bookmark_model.bookmark_added(bookmark_id)
+        self.bookmarks_changed([bookmark_id])
         self.statusBar().showMessage(f"Bookmark '{name}' ({bookmark_type}) added", 3000)
     
+    def selected_bookmark_index(self):
+        """Return the model index of the selected row, or None"""
+        selected_indexes = self.bookmarks_list.selectionModel().selectedIndexes()
+        return selected_indexes[0] if selected_indexes else None
+    
     def update_bookmark_buttons_state(self):
         """Enable/disable bookmark buttons based on selection"""
-        selected_items = self.bookmarks_list.selectedItems()
-        has_selection = bool(selected_items)
+        index = self.selected_bookmark_index()
+        has_selection = index is not None
         
         if has_selection:
-            item = selected_items[0]
-            bookmark = item.data(Qt.UserRole)
+            bookmark_id = index.data(BookmarkIdRole)
             # Enable only if it's a real bookmark (not a header)
-            self.edit_bookmark_btn.setEnabled(bookmark is not None)
-            self.delete_bookmark_btn.setEnabled(bookmark is not None)
+            self.edit_bookmark_btn.setEnabled(bookmark_id is not None)
+            self.delete_bookmark_btn.setEnabled(bookmark_id is not None)
         else:
             self.edit_bookmark_btn.setEnabled(False)
             self.delete_bookmark_btn.setEnabled(False)
     
+    def create_bookmark_store(self):
+        """Create the bookmark store for the configured storage mode"""
+        if self.bookmark_storage_mode == "sqlite":
+            if not os.path.exists(self.bookmarks_db_file):
+                # First start in SQLite mode: migrate the existing bookmarks.json
+                try:
+                    migrate_json_to_sqlite(self.bookmarks_file, self.bookmarks_db_file)
+                except Exception as e:
+                    print(f"Error migrating bookmarks: {e}")
+            return SqliteBookmarkStore(self.bookmarks_db_file)
+        if self.bookmark_storage_mode == "journal":
+            return BookmarkStore(BookmarkJournal(
+                self.bookmarks_snapshot_file,
+                legacy_json_path=self.bookmarks_file
+            ))
+        return BookmarkStore(JsonArrayPersistence(self.bookmarks_file, background=True))
+    
+    def import_bookmarks(self):
+        """Merge bookmarks from a bookmarks.json file"""
+        file_path, _ = QFileDialog.getOpenFileName(
+            self, "Import Bookmarks", "", "Bookmark Files (*.json);;All Files (*.*)"
+        )
+        if not file_path:
+            return
+        try:
+            added = self.bookmark_store.import_json(file_path)
+        except Exception as e:
+            QMessageBox.critical(self, "Error", f"Failed to import bookmarks:\n{str(e)}")
+            return
+        self.schedule_bookmark_save()
+        self.load_bookmarks()
+        self.statusBar().showMessage(f"Imported {added} bookmarks", 3000)
+    
+    def export_bookmarks(self):
+        """Write all bookmarks to a bookmarks.json file"""
+        file_path, _ = QFileDialog.getSaveFileName(
+            self, "Export Bookmarks", "bookmarks.json", "Bookmark Files (*.json);;All Files (*.*)"
+        )
+        if not file_path:
+            return
+        try:
+            self.bookmark_store.export_json(file_path)
+        except Exception as e:
+            QMessageBox.critical(self, "Error", f"Failed to export bookmarks:\n{str(e)}")
+            return
+        self.statusBar().showMessage(f"Exported {len(self.bookmark_store)} bookmarks", 3000)
+        
     def load_all_bookmarks(self):
-        """Load all bookmarks from file"""
+        """Return all bookmarks, sorted by file and time"""
+        return self.bookmark_store.sorted_bookmarks()
+    
+    def schedule_bookmark_save(self):
+        """Save bookmark changes shortly, merging bursts of edits into one write"""
+        self.save_timer.start()
+        
+    def save_bookmarks(self):
+        """Write pending bookmark changes to disk"""
+        self.save_timer.stop()
         try:
-            if os.path.exists(self.bookmarks_file):
-                with open(self.bookmarks_file, "r") as f:
-                    bookmarks = json.load(f)
-                    # Ensure all bookmarks have a type field (for backward compatibility)
-                    for bookmark in bookmarks:
-                        if "type" not in bookmark:
-                            bookmark["type"] = "Regular"
-                    return bookmarks
+            self.bookmark_store.flush()
         except Exception as e:
-            print(f"Error loading bookmarks: {e}")
-        return []
+            QMessageBox.critical(self, "Error", f"Failed to save bookmarks:\n{str(e)}")
+            return False
+        return True
         
     def load_bookmarks(self):
-        """Load and display bookmarks in the list widget"""
-        self.bookmarks_list.clear()
-        bookmarks = self.load_all_bookmarks()
-        
-        # Sort bookmarks by file, then by time
-        bookmarks.sort(key=lambda x: (x["filename"], x["time_ms"]))
-        
-        # Group bookmarks by file
-        current_file = None
-        for i, bookmark in enumerate(bookmarks):
-            time_sec = bookmark["time_ms"] // 1000
-            time_str = f"{time_sec // 60:02d}:{time_sec % 60:02d}"
-            bookmark_type = bookmark.get("type", "Regular")
-            
-            # Add file header if it's a new file
-            if bookmark["filename"] != current_file:
-                current_file = bookmark["filename"]
-                header_item = QListWidgetItem(f"📁 {current_file}")
-                header_item.setBackground(QColor(70, 70, 70))
-                header_item.setFlags(header_item.flags() & ~Qt.ItemIsSelectable)
-                self.bookmarks_list.addItem(header_item)
-            
-            # Create icon based on type
-            if bookmark_type == "Start":
-                icon_text = "▶️"
-            elif bookmark_type == "End":
-                icon_text = "⏹️"
+        """Update the bookmarks list to match the store, keeping scroll position and selection"""
+        with ScrollAnchor(self.bookmarks_list):
+            self.bookmark_model.refresh()
+        self.bookmarks_changed()
+        
+    def bookmarks_changed(self, bookmark_ids=None):
+        """
+        Keep the search and segment indexes and the waveform markers current
+        after bookmarks were added, edited or removed, and search again if a
+        search is active.
+        
+        Args:
+            bookmark_ids: Ids of the changed bookmarks; None if any may have
+                changed, which rebuilds the search index in the background
+                and drops the segment index until it is needed again
+        """
+        if self._segment_index is not None:
+            if bookmark_ids is None:
+                self._segment_index = None
             else:
-                icon_text = "🔖"
-            
-            display_text = f"  {icon_text} {bookmark['name']} - {time_str} [{bookmark_type}]"
-            
-            item = QListWidgetItem(display_text)
-            item.setData(Qt.UserRole, bookmark)  # Store full bookmark data
+                self._segment_index.update(bookmark_ids, self.bookmark_store)
+        if bookmark_ids is None:
+            self.searcher.build(self.bookmark_store.sorted_bookmarks())
+        else:
+            for bookmark_id in bookmark_ids:
+                bookmark = self.bookmark_store.get(bookmark_id)
+                if bookmark is None:
+                    self.searcher.remove(bookmark_id)
+                else:
+                    self.searcher.update(bookmark)
+        self.update_waveform_markers()
+        if self.search_edit.text().strip() or not self.all_types_shown():
+            self.apply_search()
             
-            # Color code based on type
-            if bookmark_type == "Start":
-                item.setForeground(QColor(110, 240, 132))  # Green for start
-            elif bookmark_type == "End":
-                item.setForeground(QColor(232, 117, 104))  # Red for end
-                
-            self.bookmarks_list.addItem(item)
+    def segment_index(self):
+        """The SegmentIndex of all bookmarks, paired on first use"""
+        if self._segment_index is None:
+            self._segment_index = SegmentIndex()
+            self._segment_index.build(self.bookmark_store.sorted_bookmarks())
+        return self._segment_index
+        
+    def all_types_shown(self):
+        return all(checkbox.isChecked() for checkbox in self.type_filters.values())
+        
+    def apply_search(self):
+        """Filter the bookmark list by the search text and type checkboxes"""
+        self.search_timer.stop()
+        shown = [bookmark_type for bookmark_type, checkbox in self.type_filters.items() if checkbox.isChecked()]
+        self.searcher.search(self.search_edit.text(), shown, self.bookmark_model.row_snapshot())
+        
+    def on_search_finished(self, result):
+        """Show the rows of a finished search, unless a newer one is on its way"""
+        if not self.searcher.is_latest(result):
+            return
+        for bookmark_type, checkbox in self.type_filters.items():
+            checkbox.setText(f"{bookmark_type} ({result['counts'].get(bookmark_type, 0)})")
+        with ScrollAnchor(self.bookmarks_list):
+            self.bookmark_model.apply_filter(result["ids"], result["rows"], result["changes"], result["revision"])
+        self.update_bookmark_buttons_state()
             
-    def play_from_bookmark(self, item):
+    def play_from_bookmark(self, index):
         """Play audio from selected bookmark position"""
-        if not item:
+        if not index or not index.isValid():
             return
             
-        bookmark = item.data(Qt.UserRole)
+        bookmark = index.data(Qt.UserRole)
         
-        # Skip if it's a header item (no UserRole data)
+        # Skip if it's a header row (no UserRole data)
         if not bookmark:
             return
+        if self.playlist:
+            self.stop_playlist()
         
         # Resolve the path (could be relative or absolute)
-        bookmark_path = self.resolve_bookmark_path(bookmark["file"])
+        bookmark_path = self.bookmark_file_path(bookmark)
         
-        # Check if we need to load a new file
-        need_to_load_new_file = True
+        description = f"bookmark: {bookmark['name']} ({bookmark.get('type', 'Regular')})"
         
         # If we have a current file and it's the same as the bookmark file
-        if self.current_file and bookmark_path == self.current_file:
+        if self.current_file and os.path.abspath(bookmark_path) == os.path.abspath(self.current_file):
             # Ask user if they want to seek in current file or load from beginning
             reply = QMessageBox.question(
                 self,
@@ -724,61 +1686,123 @@ class EnhancedAudioPlayer(QMainWindow):
             
             if reply == QMessageBox.Yes:
                 # User chose to seek in current file
-                need_to_load_new_file = False
-                self.player.set_time(bookmark["time_ms"])
-                self.player.play()
-                self.play_pause_btn.setText("⏸ Pause")
-                self.statusBar().showMessage(f"Playing from bookmark: {bookmark['name']} ({bookmark.get('type', 'Regular')})", 3000)
+                self.jump_started = time.perf_counter()
+                self.jump_description = description
+                # Seek through the scheduler, which drops a coalesced seek
+                # still pending; a player that cannot seek yet is reopened
+                # at the bookmark
+                if self.playback.can_seek(self.current_file):
+                    self.seek_scheduler.seek_now(bookmark["time_ms"])
+                    self.playback.play()
+                else:
+                    self.seek_scheduler.cancel()
+                    self.playback.open(self.current_file, bookmark["time_ms"])
+                    self.media_has_start_options = True
+                self.current_time_ms = bookmark["time_ms"]
+                self.update_position_display()
+                self.statusBar().showMessage(f"Playing from {description}", 3000)
                 return
         
-        # If we need to load a new file (either no current file or different file)
-        if need_to_load_new_file:
-            # Stop current playback first
-            if self.player.is_playing():
-                self.player.stop()
-            
-            # Load the file
-            self.load_audio_file(bookmark_path)
-            
-            # Wait for media to be loaded before setting time
-            # Use a polling approach to ensure media is ready
-            def delayed_seek_and_play():
-                if self.player.get_media() and self.player.get_length() > 0:
-                    # Media is loaded, set time and play
-                    self.player.set_time(bookmark["time_ms"])
-                    self.player.play()
-                    self.play_pause_btn.setText("⏸ Pause")
-                    self.statusBar().showMessage(f"Playing from bookmark: {bookmark['name']} ({bookmark.get('type', 'Regular')})", 3000)
-                else:
-                    # Media not ready yet, try again in 50ms
-                    QTimer.singleShot(50, delayed_seek_and_play)
-            
-            # Start the polling
-            QTimer.singleShot(100, delayed_seek_and_play)
-            
-            # If we need to load a new file (either no current file or different file)
-            if need_to_load_new_file:
-                # Load the file
-                self.load_audio_file(bookmark_path)
-                
-                # Add small delay to ensure media is loaded before seeking and playing
-                QTimer.singleShot(300, lambda: self.player.set_time(bookmark["time_ms"]))
-                QTimer.singleShot(350, lambda: self.player.play())
-                QTimer.singleShot(350, lambda: self.play_pause_btn.setText("⏸ Pause"))
-                
-                self.statusBar().showMessage(f"Playing from bookmark: {bookmark['name']} ({bookmark.get('type', 'Regular')})", 3000)
+        # Otherwise open the file directly at the bookmark position
+        self.open_at_offset(bookmark_path, bookmark["time_ms"], description)
+        
+    def open_at_offset(self, file_path, time_ms, description=""):
+        """
+        Load a file and start playing it at the given offset.
+        
+        The playback controller opens the media once with a start-time
+        option, so audio begins at the offset without a seek after startup
+        (or swaps in the standby player pre-rolled there). The time until libvlc
+        reports the playback clock moving is recorded in jump_latencies_ms.
+        
+        Returns:
+            True if playback was started
+        """
+        self.jump_started = time.perf_counter()
+        self.jump_description = description or os.path.basename(file_path)
+        if self.standby_target == (os.path.abspath(file_path), time_ms):
+            self.swap_to_standby(time_ms)
+            return True
+        if not self.load_audio_file(file_path, start_ms=time_ms):
+            self.jump_started = None
+            return False
+        self.current_time_ms = time_ms
+        self.update_position_display()
+        self.statusBar().showMessage(f"Playing from {self.jump_description}", 3000)
+        return True
             
+    def prewarm_around_selection(self):
+        """
+        Pre-warm the media of the selected bookmark's file and of the files
+        next to it in the list, and pre-roll the standby player at the
+        selected bookmark if it is in another file.
+        """
+        index = self.bookmarks_list.currentIndex()
+        if not index.isValid() or index.data(BookmarkIdRole) is None:
+            return
+        if not self.vlc_runtime.is_ready:
+            # Pre-warming is not worth waiting for libvlc
+            return
+        bookmark_ids = [index.data(BookmarkIdRole)] + self.bookmark_model.adjacent_bookmark_ids(index.row())
+        for bookmark_id in bookmark_ids:
+            bookmark = self.bookmark_store.get(bookmark_id)
+            if bookmark is None:
+                continue
+            path = self.bookmark_file_path(bookmark)
+            info = self.media_cache.get(path)
+            self.media_pool.prewarm(path, bookmark["time_ms"], info["duration_ms"] if info else 0)
+        
+        # The standby player is kept for the playlist's next segment
+        if self.playlist:
+            return
+        bookmark = index.data(Qt.UserRole)
+        path = os.path.abspath(self.bookmark_file_path(bookmark))
+        if not os.path.exists(path) or path == os.path.abspath(self.current_file or ""):
+            return
+        self.preroll_standby(path, bookmark["time_ms"])
+        
+    def preroll_standby(self, path, time_ms):
+        """Open, demux and decode a file up to time_ms in the standby player, then stay paused"""
+        if self.standby_player is None or self.standby_target == (path, time_ms):
+            return
+        media = self.media_pool.media_for(path, time_ms, options=(":start-paused",))
+        self.standby_player.audio_set_volume(self.volume_slider.value())
+        self.standby_player.set_media(media)
+        self.standby_player.play()
+        self.standby_target = (path, time_ms)
+        
+    def swap_to_standby(self, time_ms):
+        """Make the pre-rolled standby player the current player and unpause it"""
+        old_player = self.player
+        self.player_events.detach()
+        self.player, self.standby_player = self.standby_player, old_player
+        self.current_file = self.standby_target[0]
+        self.standby_target = None
+        self.connect_player_events()
+        self.playback.adopt(self.current_file, time_ms, started=True)
+        self.player.audio_set_volume(self.volume_slider.value())
+        self.player.set_pause(0)
+        # The pre-rolled media starts paused at the offset on every play()
+        self.media_has_start_options = True
+        
+        # Stopping the old player blocks briefly, so do it once audio is going
+        QTimer.singleShot(0, old_player.stop)
+        
+        self.show_loaded_file(self.player.get_media())
+        self.current_time_ms = time_ms
+        self.update_position_display()
+        self.statusBar().showMessage(f"Playing from {self.jump_description}", 3000)
+        
     def delete_selected_bookmark(self):
         """Delete the selected bookmark"""
-        selected_items = self.bookmarks_list.selectedItems()
-        if not selected_items:
+        index = self.selected_bookmark_index()
+        if index is None:
             QMessageBox.warning(self, "No Selection", "Please select a bookmark to delete.")
             return
             
-        item = selected_items[0]
-        bookmark = item.data(Qt.UserRole)
+        bookmark = index.data(Qt.UserRole)
         
-        # Skip if it's a header item
+        # Skip if it's a header row
         if not bookmark:
             return
         
@@ -790,27 +1814,15 @@ class EnhancedAudioPlayer(QMainWindow):
         )
         
         if reply == QMessageBox.Yes:
-            # Load all bookmarks
-            bookmarks = self.load_all_bookmarks()
-            
-            # Find and remove the bookmark
-            for i, b in enumerate(bookmarks):
-                if (b["file"] == bookmark["file"] and  # Compare stored paths
-                    b["time_ms"] == bookmark["time_ms"] and 
-                    b["name"] == bookmark["name"]):
-                    del bookmarks[i]
-                    break
-                    
-            # Save updated list
-            try:
-                with open(self.bookmarks_file, "w") as f:
-                    json.dump(bookmarks, f, indent=2)
-            except Exception as e:
-                QMessageBox.critical(self, "Error", f"Failed to delete bookmark:\n{str(e)}")
-                return
+            # Remove the bookmark by id
+            if bookmark["id"] in self.bookmark_store:
+                self.bookmark_store.remove(bookmark["id"])
+                self.schedule_bookmark_save()
                 
-            # Refresh display
-            self.load_bookmarks()
+                # Remove the row
+                with ScrollAnchor(self.bookmarks_list):
+                    self.bookmark_model.bookmark_removed(bookmark)
+                self.bookmarks_changed([bookmark["id"]])
             self.statusBar().showMessage("Bookmark deleted", 3000)
             
     def clear_bookmarks(self):
@@ -824,30 +1836,30 @@ class EnhancedAudioPlayer(QMainWindow):
         
         if reply == QMessageBox.Yes:
             try:
-                if os.path.exists(self.bookmarks_file):
-                    os.remove(self.bookmarks_file)
-                self.bookmarks_list.clear()
+                self.save_timer.stop()
+                self.bookmark_store.clear()
+                self.bookmark_store.flush()
+                self.load_bookmarks()
                 self.statusBar().showMessage("All bookmarks cleared", 3000)
             except Exception as e:
                 QMessageBox.critical(self, "Error", f"Failed to clear bookmarks:\n{str(e)}")
                 
     def edit_selected_bookmark(self):
         """Edit the selected bookmark"""
-        selected_items = self.bookmarks_list.selectedItems()
-        if not selected_items:
+        index = self.selected_bookmark_index()
+        if index is None:
             QMessageBox.warning(self, "No Selection", "Please select a bookmark to edit.")
             return
             
-        item = selected_items[0]
-        bookmark = item.data(Qt.UserRole)
+        bookmark = index.data(Qt.UserRole)
         
-        # Skip if it's a header item
+        # Skip if it's a header row
         if not bookmark:
             QMessageBox.warning(self, "Invalid Selection", "Please select a valid bookmark to edit.")
             return
         
         # Resolve the path for display purposes
-        bookmark_path = self.resolve_bookmark_path(bookmark["file"])
+        bookmark_path = self.bookmark_file_path(bookmark)
         
         # Create edit dialog
         dialog = QDialog(self)
@@ -912,7 +1924,7 @@ class EnhancedAudioPlayer(QMainWindow):
         
         # Use current player time button (only if same file is loaded)
         use_current_time_btn = QPushButton("Use Current Time")
-        use_current_time_btn.setEnabled(self.current_file == bookmark_path)
+        use_current_time_btn.setEnabled(os.path.abspath(self.current_file or "") == os.path.abspath(bookmark_path))
         
         def update_time_display():
             new_time_ms = bookmark['time_ms'] + (time_spinbox.value() * 1000)
@@ -920,7 +1932,7 @@ class EnhancedAudioPlayer(QMainWindow):
             current_time_label.setText(f"New: {new_time_ms // 1000}:{(new_time_ms % 1000):03d}")
         
         def use_current_time():
-            if self.player.get_media():
+            if self.has_media():
                 current_ms = self.player.get_time()
                 if current_ms >= 0:
                     time_spinbox.setValue((current_ms - bookmark['time_ms']) // 1000)
@@ -973,49 +1985,31 @@ class EnhancedAudioPlayer(QMainWindow):
         new_time_ms = bookmark['time_ms'] + (time_adjustment_seconds * 1000)
         new_time_ms = max(0, new_time_ms)  # Ensure non-negative
         
-        # Load all bookmarks
-        bookmarks = self.load_all_bookmarks()
-        
         # Find the bookmark to edit
-        bookmark_index = -1
-        for i, b in enumerate(bookmarks):
-            if (b["file"] == bookmark["file"] and  # Compare stored paths
-                b["time_ms"] == bookmark["time_ms"] and 
-                b["name"] == bookmark["name"]):
-                bookmark_index = i
-                break
-        
-        if bookmark_index == -1:
+        if bookmark["id"] not in self.bookmark_store:
             QMessageBox.warning(self, "Bookmark Not Found", "The bookmark could not be found in the database.")
             return
         
         # Update the bookmark
-        bookmarks[bookmark_index]["name"] = new_name
-        bookmarks[bookmark_index]["type"] = new_type
-        bookmarks[bookmark_index]["time_ms"] = new_time_ms
-        bookmarks[bookmark_index]["timestamp"] = QDateTime.currentDateTime().toString("yyyy-MM-dd HH:mm:ss")
-        
-        # Save back to file
-        try:
-            with open(self.bookmarks_file, "w") as f:
-                json.dump(bookmarks, f, indent=2)
-        except Exception as e:
-            QMessageBox.critical(self, "Error", f"Failed to save bookmark changes:\n{str(e)}")
-            return
+        old_key = bookmark_sort_key(self.bookmark_store.get(bookmark["id"]))
+        self.bookmark_store.update(
+            bookmark["id"],
+            name=new_name,
+            type=new_type,
+            time_ms=new_time_ms,
+            timestamp=QDateTime.currentDateTime().toString("yyyy-MM-dd HH:mm:ss")
+        )
+        self.schedule_bookmark_save()
         
-        # Refresh display
-        self.load_bookmarks()
+        # Update or move its row; the selection moves along with it
+        with ScrollAnchor(self.bookmarks_list):
+            self.bookmark_model.bookmark_changed(bookmark["id"], old_key)
+        self.bookmarks_changed([bookmark["id"]])
         
-        # Reselect the edited bookmark
-        for i in range(self.bookmarks_list.count()):
-            item = self.bookmarks_list.item(i)
-            if item:
-                bm = item.data(Qt.UserRole)
-                if bm and (bm["file"] == bookmark["file"] and 
-                          bm["name"] == new_name and 
-                          bm["time_ms"] == new_time_ms):
-                    self.bookmarks_list.setCurrentItem(item)
-                    break
+        # Make sure the edited bookmark is current
+        row = self.bookmark_model.row_for_id(bookmark["id"])
+        if row >= 0:
+            self.bookmarks_list.setCurrentIndex(self.bookmark_model.index(row))
         
         self.statusBar().showMessage(f"Bookmark updated to '{new_name}' ({new_type})", 3000)
                 
@@ -1028,23 +2022,65 @@ class EnhancedAudioPlayer(QMainWindow):
         self.stop_btn.setEnabled(False)
         self.bookmark_btn.setEnabled(False)
         self.progress_slider.setEnabled(False)
-        self.current_time_label.setText("00:00")
-        self.total_time_label.setText("00:00")
-        self.progress_slider.setValue(0)
+        self.waveform_view.clear()
+        self.current_time_ms = 0
+        self.media_length_ms = 0
+        self.update_position_display()
+        self.update_total_time()
         
     def closeEvent(self, event):
         """Handle window close event"""
-        self.player.stop()
+        self.save_timer.stop()
+        self.bookmark_loader.wait()
+        try:
+            self.bookmark_store.close()
+        except Exception as e:
+            print(f"Error saving bookmarks: {e}")
+        try:
+            self.media_cache.flush()
+        except Exception as e:
+            print(f"Error saving media cache: {e}")
+        if self.player_events is not None:
+            self.player_events.detach()
+        self.waveform_loader.cancel()
+        if self.standby_player is not None:
+            self.standby_player.stop()
+        self.media_pool.close()
+        self.importer.close()
+        self.folder_importer.close()
+        self.library_scanner.close()
+        self.searcher.close()
+        try:
+            self.library.flush()
+        except Exception as e:
+            print(f"Error saving library index: {e}")
+        try:
+            self.content_index.flush()
+        except Exception as e:
+            print(f"Error saving content index: {e}")
+        if self.player is not None:
+            self.player.stop()
         event.accept()
 
 if __name__ == "__main__":
-    app = QApplication(sys.argv)
+    parser = argparse.ArgumentParser(description="Audio player with bookmarks")
+    add_player_arguments(parser)
+    add_storage_argument(parser)
+    parser.add_argument("--trace-startup", action="store_true", help="print where the startup time goes")
+    # Anything else is left to Qt
+    args, qt_args = parser.parse_known_args()
+    try:
+        player_config = config_from_args(args)
+    except (OSError, ValueError) as e:
+        parser.error(f"player settings: {e}")
+    app = QApplication(sys.argv[:1] + qt_args)
     
     # Set application style
     app.setStyle("Fusion")
+    startup_trace.mark("QApplication")
     
     # Create and show main window
-    player = EnhancedAudioPlayer()
+    player = EnhancedAudioPlayer(player_config)
     player.setWindowTitle("Enhanced Audio Player with Bookmarks")
     player.setGeometry(100, 100, 800, 600)
     player.show()
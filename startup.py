@@ -0,0 +1,106 @@
+import threading
+import time
+
+from PySide6.QtCore import QObject, Signal
+
+
+class StartupTrace:
+    """
+    Where the milliseconds of a start go.
+
+    ``mark(name)`` ends a phase of the start that ran on the GUI thread
+    since the previous mark. ``event(name)`` records background work
+    finishing (libvlc, bookmarks) at its time since the start, without
+    ending a phase. When enabled, the trace is printed once all the
+    expected events happened.
+
+    Args:
+        enabled: Whether to print the trace
+        expected: Names of the events that complete the start
+    """
+
+    def __init__(self, enabled=False, expected=()):
+        self.enabled = enabled
+        self.started = time.perf_counter()
+        self.phases = []  # (name, duration_ms, at_ms)
+        self.events = []  # (name, duration_ms or None, at_ms)
+        self.expected = set(expected)
+        self._last = self.started
+
+    def _at_ms(self, now):
+        return (now - self.started) * 1000
+
+    def mark(self, name):
+        now = time.perf_counter()
+        self.phases.append((name, (now - self._last) * 1000, self._at_ms(now)))
+        self._last = now
+
+    def event(self, name, duration_ms=None):
+        """
+        Record background work that finished.
+
+        Args:
+            name: Name of the event
+            duration_ms: Time the work itself took, if known
+        """
+        self.events.append((name, duration_ms, self._at_ms(time.perf_counter())))
+        if name in self.expected:
+            self.expected.discard(name)
+            if not self.expected and self.enabled:
+                print(self.report())
+
+    def report(self):
+        lines = ["Startup trace (ms):"]
+        for name, duration_ms, at_ms in self.phases:
+            lines.append(f"  {name:<24}{duration_ms:>9.1f}   at {at_ms:>8.1f}")
+        for name, duration_ms, at_ms in self.events:
+            took = f"{duration_ms:>9.1f}" if duration_ms is not None else f"{'':>9}"
+            lines.append(f"  {name + ' (background)':<24}{took}   at {at_ms:>8.1f}")
+        return "\n".join(lines)
+
+
+class BookmarkLoader(QObject):
+    """
+    Loads a bookmark store on a worker thread, so a large bookmarks.json is
+    parsed and sorted while the window is already up.
+
+    ``loaded`` is emitted on the GUI thread when the store is ready, with
+    the time loading took in ms (``failed`` with the error message). The
+    store must not be used until then.
+    """
+
+    loaded = Signal(float)
+    failed = Signal(str)
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self._thread = None
+
+    def load(self, store, background=True):
+        """
+        Load a store.
+
+        Args:
+            store: BookmarkStore or SqliteBookmarkStore
+            background: False to load right away on this thread (SQLite
+                connections can only be used by the thread that opened them)
+        """
+        if not background:
+            self._run(store)
+            return
+        self._thread = threading.Thread(target=self._run, args=(store,), name="bookmark-load", daemon=True)
+        self._thread.start()
+
+    def _run(self, store):
+        started = time.perf_counter()
+        try:
+            store.load()
+        except Exception as e:
+            self.failed.emit(str(e))
+            return
+        self.loaded.emit((time.perf_counter() - started) * 1000)
+
+    def wait(self, timeout=None):
+        """Wait for a load in progress"""
+        if self._thread is not None:
+            self._thread.join(timeout)
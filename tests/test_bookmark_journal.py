@@ -0,0 +1,114 @@
+import json
+import os
+import shutil
+import tempfile
+import unittest
+from unittest import mock
+
+from bookmark_journal import BookmarkJournal
+from bookmark_store import BookmarkStore, read_bookmarks_json
+
+
+class BookmarkJournalTest(unittest.TestCase):
+    """Replay of the journal after crashes at any point"""
+
+    def setUp(self):
+        self.folder = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.folder)
+        self.snapshot_path = os.path.join(self.folder, "bookmarks.snapshot.json")
+        self.journal_path = self.snapshot_path + ".journal"
+
+    def open_store(self, **kwargs):
+        store = BookmarkStore(BookmarkJournal(self.snapshot_path, **kwargs))
+        store.load()
+        return store
+
+    def fill(self, store):
+        """Add, edit and remove some bookmarks. Returns the expected bookmarks"""
+        ids = [store.add({"file": f"{index % 3}.mp3", "time_ms": index * 1000, "name": f"b{index}"})
+               for index in range(10)]
+        store.update(ids[1], name="renamed")
+        store.update(ids[2], time_ms=99000)
+        store.remove(ids[3])
+        store.flush()
+        return store.sorted_bookmarks()
+
+    def reload(self, **kwargs):
+        store = self.open_store(**kwargs)
+        bookmarks = store.sorted_bookmarks()
+        store.close()
+        return bookmarks
+
+    def test_reload(self):
+        store = self.open_store()
+        expected = self.fill(store)
+        store.close()
+        self.assertEqual(self.reload(), expected)
+
+    def test_torn_last_line(self):
+        store = self.open_store()
+        expected = self.fill(store)
+        # A crash in the middle of appending a record
+        store.persistence._append({"op": "remove", "id": expected[0]["id"]})
+        store.close()
+        with open(self.journal_path, "rb+") as f:
+            f.truncate(os.path.getsize(self.journal_path) - 10)
+        with mock.patch("builtins.print"):
+            store = self.open_store()
+            self.assertEqual(store.sorted_bookmarks(), expected)
+            # The torn line must not swallow the next record
+            bookmark_id = store.add({"file": "new.mp3", "time_ms": 0, "name": "after"})
+            store.close()
+            bookmarks = self.reload()
+        after = [bookmark["id"] for bookmark in bookmarks if bookmark["name"] == "after"]
+        self.assertEqual(after, [bookmark_id])
+        self.assertEqual(len(bookmarks), len(expected) + 1)
+
+    def test_crash_before_snapshot_written(self):
+        store = self.open_store()
+        self.fill(store)
+        store.close()
+        # Sealed, but the new snapshot was never written
+        os.replace(self.journal_path, self.journal_path + ".old")
+        store = self.open_store()
+        store.add({"file": "new.mp3", "time_ms": 0, "name": "after"})
+        store.update(store.sorted_bookmarks()[0]["id"], name="edited")
+        expected = store.sorted_bookmarks()
+        store.close()
+        self.assertEqual(self.reload(), expected)
+
+    def test_crash_before_sealed_journal_removed(self):
+        store = self.open_store()
+        expected = self.fill(store)
+        store.close()
+        # Snapshot in place, sealed journal still there: replaying it again
+        # over the snapshot must change nothing
+        os.replace(self.journal_path, self.journal_path + ".old")
+        with open(self.snapshot_path, "w", encoding="utf-8") as f:
+            json.dump(expected, f)
+        self.assertEqual(self.reload(), expected)
+
+    def test_compaction(self):
+        store = self.open_store(compact_threshold=1)
+        expected = self.fill(store)
+        store.persistence.wait_for_compaction()
+        self.assertFalse(os.path.exists(self.journal_path + ".old"))
+        self.assertEqual(read_bookmarks_json(self.snapshot_path), expected)
+        store.close()
+        self.assertEqual(self.reload(), expected)
+
+    def test_legacy_import(self):
+        legacy_path = os.path.join(self.folder, "bookmarks.json")
+        with open(legacy_path, "w", encoding="utf-8") as f:
+            json.dump([{"file": "a.mp3", "time_ms": 1000, "name": "old"},
+                       {"file": "b.mp3", "time_ms": 2000, "name": "older", "type": "Start"}], f)
+        first = self.reload(legacy_json_path=legacy_path)
+        self.assertEqual([bookmark["name"] for bookmark in first], ["old", "older"])
+        self.assertTrue(os.path.exists(self.snapshot_path))
+        # Later starts read the snapshot; the ids stay the same
+        os.remove(legacy_path)
+        self.assertEqual(self.reload(legacy_json_path=legacy_path), first)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,144 @@
+import os
+import random
+import unittest
+
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+
+from PySide6.QtCore import QCoreApplication, QDeadlineTimer, QPersistentModelIndex
+
+from bookmark_model import (MAX_ROW_RUNS, BookmarkIdRole, BookmarkListModel, BookmarkSearcher, diff_rows,
+                            rows_with_headers)
+from bookmark_store import BookmarkStore, JsonArrayPersistence, bookmark_sort_key
+
+
+def apply_changes(old, changes):
+    removals, insertions = changes
+    rows = list(old)
+    for first, last in reversed(removals):
+        del rows[first:last + 1]
+    for row, keys in insertions:
+        rows[row:row] = keys
+    return rows
+
+
+def random_rows(rng, universe):
+    keep = rng.random()
+    return rows_with_headers(key for key in universe if rng.random() < keep)
+
+
+class DiffRowsTest(unittest.TestCase):
+    """Applying the runs of diff_rows() to old must give new"""
+
+    def test_random_rows(self):
+        for seed in range(500):
+            rng = random.Random(seed)
+            size = rng.choice((5, 50, 600, 3000))
+            universe = sorted({(f"f{rng.randrange(8)}", rng.randrange(100), str(rng.randrange(10 ** 6)))
+                               for _ in range(size)})
+            old = random_rows(rng, universe)
+            new = random_rows(rng, universe)
+            changes = diff_rows(old, new, max_runs=float("inf"))
+            self.assertEqual(apply_changes(old, changes), new, f"seed {seed}")
+            runs = len(changes[0]) + len(changes[1])
+            limited = diff_rows(old, new)
+            if runs > MAX_ROW_RUNS:
+                self.assertIsNone(limited, f"seed {seed}")
+            else:
+                self.assertEqual(limited, changes, f"seed {seed}")
+
+    def test_edges(self):
+        rows = rows_with_headers([("a", 1, "x"), ("a", 2, "y"), ("b", 1, "z")])
+        self.assertEqual(diff_rows(rows, list(rows)), ([], []))
+        self.assertEqual(diff_rows([], rows), ([], [(0, rows)]))
+        self.assertEqual(diff_rows(rows, []), ([(0, len(rows) - 1)], []))
+
+
+class ModelFilterTest(unittest.TestCase):
+    """set_filter() moves rows run by run, or past MAX_ROW_RUNS in one layout change"""
+
+    @classmethod
+    def setUpClass(cls):
+        cls.app = QCoreApplication.instance() or QCoreApplication([])
+
+    def setUp(self):
+        rng = random.Random(0)
+        self.store = BookmarkStore(JsonArrayPersistence("unused.json"))
+        for index in range(1000):
+            filename = f"f{rng.randrange(20)}.mp3"
+            self.store.add({"file": filename, "time_ms": rng.randrange(600000), "name": f"b{index}"})
+        self.model = BookmarkListModel(self.store)
+        self.model.reload()
+        self.signals = []
+        for name in ("rowsInserted", "rowsRemoved", "layoutChanged", "modelReset"):
+            getattr(self.model, name).connect(lambda *args, name=name: self.signals.append(name))
+
+    def set_filter(self, ids):
+        keys = sorted(bookmark_sort_key(self.store.get(bookmark_id)) for bookmark_id in ids)
+        self.model.set_filter(ids, keys)
+        expected = rows_with_headers(keys)
+        self.assertEqual([self.model.index(row).data(BookmarkIdRole) for row in range(self.model.rowCount())],
+                         [key[2] if len(key) == 3 else None for key in expected])
+
+    def test_few_changes(self):
+        bookmarks = self.store.sorted_bookmarks()
+        kept = bookmarks[500]
+        persistent = QPersistentModelIndex(self.model.index(self.model.row_for_id(kept["id"])))
+        ids = {bookmark["id"] for bookmark in bookmarks[:-10]}
+        ids -= {bookmark["id"] for bookmark in bookmarks[100:110]}
+        self.set_filter(ids)
+        self.assertNotIn("layoutChanged", self.signals)
+        self.assertNotIn("modelReset", self.signals)
+        self.assertIn("rowsRemoved", self.signals)
+        self.assertEqual(persistent.data(BookmarkIdRole), kept["id"])
+
+    def test_scattered_changes(self):
+        bookmarks = self.store.sorted_bookmarks()
+        kept = bookmarks[500]
+        persistent = QPersistentModelIndex(self.model.index(self.model.row_for_id(kept["id"])))
+        self.set_filter({bookmark["id"] for bookmark in bookmarks[::2]})
+        self.assertEqual(self.signals, ["layoutChanged"])
+        self.assertEqual(persistent.data(BookmarkIdRole), kept["id"])
+        self.assertEqual(persistent.row(), self.model.row_for_id(kept["id"]))
+        dropped = QPersistentModelIndex(self.model.index(self.model.row_for_id(bookmarks[2]["id"])))
+        self.set_filter({bookmark["id"] for bookmark in bookmarks[1::2]})
+        self.assertFalse(dropped.isValid())
+
+
+class BookmarkSearcherTest(unittest.TestCase):
+    """Searching on the worker thread and stopping it"""
+
+    @classmethod
+    def setUpClass(cls):
+        cls.app = QCoreApplication.instance() or QCoreApplication([])
+
+    def test_search_and_close(self):
+        store = BookmarkStore(JsonArrayPersistence("unused.json"))
+        for index in range(100):
+            store.add({"file": f"f{index % 5}.mp3", "time_ms": index * 1000, "name": f"take {index}"})
+        model = BookmarkListModel(store)
+        model.reload()
+        searcher = BookmarkSearcher()
+        results = []
+        searcher.finished.connect(results.append)
+        searcher.build(store.sorted_bookmarks())
+        searcher.search("take 1", ["Regular"], model.row_snapshot())
+        deadline = QDeadlineTimer(5000)
+        while not results and not deadline.hasExpired():
+            self.app.processEvents()
+        self.assertEqual(len(results), 1)
+        result = results[0]
+        self.assertTrue(searcher.is_latest(result))
+        model.apply_filter(result["ids"], result["rows"], result["changes"], result["revision"])
+        self.assertEqual(len(result["ids"]), 11)
+        self.assertEqual(model.rowCount(), len(result["rows"]))
+
+        searcher.close()
+        self.assertFalse(searcher._thread.is_alive())
+        self.assertFalse(searcher.is_latest(result))
+        searcher.search("take", ["Regular"], model.row_snapshot())
+        self.app.processEvents()
+        self.assertEqual(len(results), 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,111 @@
+import random
+import unittest
+
+from bookmark_search import MIN_QUERY_LENGTH, BookmarkSearchIndex, parse_query, tokenize
+from bookmark_store import BOOKMARK_TYPES, bookmark_sort_key, new_bookmark_id
+
+WORDS = ["intro", "interlude", "verse", "chorus", "chord", "solo", "bridge", "outro"]
+
+
+def random_bookmark(rng):
+    filename = f"{rng.choice(WORDS)} {rng.randrange(5)}.mp3"
+    return {"id": new_bookmark_id(), "file": filename, "filename": filename,
+            "time_ms": rng.randrange(0, 600000, 250), "name": " ".join(rng.sample(WORDS, 2)),
+            "type": rng.choice(BOOKMARK_TYPES), "timestamp": f"2024-01-{rng.randrange(1, 29):02d} 12:00:00"}
+
+
+def matches(bookmark, terms):
+    """Plain scan version of a search"""
+    words = set(tokenize(bookmark["name"]) + tokenize(bookmark["filename"]) + tokenize(bookmark["type"]))
+    for term in terms:
+        if term[0] == "text" and not any(word.startswith(term[1]) for word in words):
+            return False
+        if term[0] == "time" and not term[1] <= bookmark["time_ms"] <= term[2]:
+            return False
+        if term[0] == "date" and not term[1] <= bookmark["timestamp"][:10] <= term[2]:
+            return False
+    return True
+
+
+class BookmarkSearchIndexTest(unittest.TestCase):
+
+    def setUp(self):
+        self.rng = random.Random(0)
+        self.bookmarks = {}
+        for _ in range(500):
+            bookmark = random_bookmark(self.rng)
+            self.bookmarks[bookmark["id"]] = bookmark
+        self.index = BookmarkSearchIndex()
+        self.index.build(self.bookmarks.values())
+
+    def expected(self, query):
+        terms = parse_query(query)
+        if not terms or all(term[0] == "text" for term in terms) and len(query.strip()) < MIN_QUERY_LENGTH:
+            return None
+        return {bookmark_id for bookmark_id, bookmark in self.bookmarks.items() if matches(bookmark, terms)}
+
+    def check(self, query):
+        self.assertEqual(self.index.search(query), self.expected(query), query)
+
+    def test_prefix_terms(self):
+        for query in ("ch", "chor", "chord", "CHORUS", "in", "intro 3", "solo start", "ver out", "xyz"):
+            self.check(query)
+
+    def test_range_terms(self):
+        for query in ("03:00", "03:00-04:30", "0:00-10:00", "09:59-10:00", "2024-01-05",
+                      "2024-01-03..2024-01-09", "2024-01-03..2024-01-09 05:00-07:00 chorus"):
+            self.check(query)
+        self.assertEqual(parse_query("03:00-04:30"), [("time", 180000, 270999)])
+        self.assertEqual(parse_query("2024-01-03..2024-01-09"), [("date", "2024-01-03", "2024-01-09")])
+
+    def test_short_query(self):
+        self.assertIsNone(self.index.search(""))
+        self.assertIsNone(self.index.search("c" * (MIN_QUERY_LENGTH - 1)))
+
+    def test_facets(self):
+        ids = self.index.search("chorus")
+        counts = self.index.facet_counts(ids)
+        for bookmark_type in BOOKMARK_TYPES:
+            typed = {bookmark_id for bookmark_id in ids if self.bookmarks[bookmark_id]["type"] == bookmark_type}
+            self.assertEqual(counts[bookmark_type], len(typed))
+            self.assertEqual(self.index.of_types(ids, [bookmark_type]), typed)
+        self.assertEqual(sum(self.index.facet_counts().values()), len(self.bookmarks))
+        self.assertIs(self.index.of_types(ids, BOOKMARK_TYPES), ids)
+        self.assertEqual(self.index.of_types(None, ["Start"]),
+                         {bookmark_id for bookmark_id, bookmark in self.bookmarks.items()
+                          if bookmark["type"] == "Start"})
+
+    def test_typing_narrows_like_a_fresh_search(self):
+        for text in ("chorus intro", "interlude 03:00-06:00", "ch ve so", "bridge 2024-01-10"):
+            for length in range(1, len(text) + 1):
+                self.check(text[:length])
+            for length in range(len(text), 0, -1):
+                self.check(text[:length])
+
+    def test_changes(self):
+        for step in range(300):
+            action = self.rng.choice(("add", "update", "remove"))
+            if action == "add":
+                bookmark = random_bookmark(self.rng)
+                self.bookmarks[bookmark["id"]] = bookmark
+                self.index.add(bookmark)
+            else:
+                bookmark_id = self.rng.choice(list(self.bookmarks))
+                if action == "update":
+                    bookmark = dict(random_bookmark(self.rng), id=bookmark_id)
+                    self.bookmarks[bookmark_id] = bookmark
+                    self.index.update(bookmark)
+                else:
+                    del self.bookmarks[bookmark_id]
+                    self.index.remove(bookmark_id)
+            if step % 25 == 0:
+                self.check(self.rng.choice(("ch", "chorus", "intro 2", "03:00-05:00", "verse start")))
+        self.assertEqual(len(self.index), len(self.bookmarks))
+        self.assertEqual(self.index.all_keys(), sorted(map(bookmark_sort_key, self.bookmarks.values())))
+        ids = self.index.search("chorus")
+        self.assertEqual(self.index.sorted_keys(ids),
+                         sorted(bookmark_sort_key(self.bookmarks[bookmark_id]) for bookmark_id in ids))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,71 @@
+import random
+import unittest
+
+from bookmark_segments import SegmentIndex
+from bookmark_store import BookmarkStore, JsonArrayPersistence
+
+FILES = ["a.mp3", "b.mp3", "c.mp3", "d.mp3"]
+
+
+def random_bookmark(rng):
+    filename = rng.choice(FILES)
+    return {"file": filename, "filename": filename, "time_ms": rng.randrange(0, 60000, 250),
+            "type": rng.choice(("Start", "End", "Regular"))}
+
+
+def snapshot(index):
+    return index.all_segments(), dict(index._file_of), dict(index._by_bookmark)
+
+
+class SegmentIndexUpdateTest(unittest.TestCase):
+    """update() after random edits must give the same index as build()"""
+
+    def check_seed(self, seed, steps=300):
+        rng = random.Random(seed)
+        store = BookmarkStore(JsonArrayPersistence("unused.json"))
+        for _ in range(20):
+            store.add(random_bookmark(rng))
+        index = SegmentIndex()
+        index.build(store.sorted_bookmarks())
+        for step in range(steps):
+            ids = [bookmark["id"] for bookmark in store.sorted_bookmarks()]
+            action = rng.choice(("add", "move", "refile", "retype", "remove"))
+            if action == "add" or not ids:
+                changed = [store.add(random_bookmark(rng))]
+            else:
+                changed = rng.sample(ids, min(len(ids), rng.randint(1, 3)))
+                for bookmark_id in changed:
+                    if action == "move":
+                        store.update(bookmark_id, time_ms=rng.randrange(0, 60000, 250))
+                    elif action == "refile":
+                        filename = rng.choice(FILES)
+                        store.update(bookmark_id, file=filename, filename=filename)
+                    elif action == "retype":
+                        store.update(bookmark_id, type=rng.choice(("Start", "End", "Regular")))
+                    else:
+                        store.remove(bookmark_id)
+            index.update(changed, store)
+            expected = SegmentIndex()
+            expected.build(store.sorted_bookmarks())
+            self.assertEqual(snapshot(index), snapshot(expected), f"seed {seed}, step {step}: {action}")
+
+    def test_update_matches_build(self):
+        for seed in range(20):
+            self.check_seed(seed)
+
+    def test_move_to_other_file(self):
+        store = BookmarkStore(JsonArrayPersistence("unused.json"))
+        start_id = store.add({"file": "b.mp3", "time_ms": 1000, "name": "s", "type": "Start"})
+        end_id = store.add({"file": "b.mp3", "time_ms": 4000, "name": "e", "type": "End"})
+        index = SegmentIndex()
+        index.build(store.sorted_bookmarks())
+        for bookmark_id in (start_id, end_id):
+            store.update(bookmark_id, file="a.mp3", filename="a.mp3")
+            index.update([bookmark_id], store)
+        self.assertEqual(index.all_segments(), [("a.mp3", (1000, 4000, start_id, end_id))])
+        self.assertEqual(index.segments_for_file("b.mp3"), [])
+        self.assertEqual(index.segment_of(start_id), (1000, 4000, start_id, end_id))
+
+
+if __name__ == "__main__":
+    unittest.main()
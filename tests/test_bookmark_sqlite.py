@@ -0,0 +1,126 @@
+import json
+import os
+import random
+import shutil
+import tempfile
+import unittest
+
+from bookmark_sqlite import SqliteBookmarkStore, migrate_json_to_sqlite
+from bookmark_store import BookmarkStore, JsonArrayPersistence, new_bookmark_id, read_bookmarks_json
+
+FILES = ["a.mp3", "b.mp3", "c.mp3"]
+
+
+def random_bookmark(rng):
+    filename = rng.choice(FILES)
+    bookmark = {"id": new_bookmark_id(), "file": "music/" + filename, "filename": filename,
+                "time_ms": rng.randrange(0, 10000, 500), "name": f"n{rng.randrange(100)}",
+                "type": rng.choice(("Start", "End", "Regular")), "timestamp": "2024-01-01 12:00:00"}
+    if rng.random() < 0.2:
+        # Fields outside the table columns are kept too
+        bookmark["note"] = "extra"
+    return bookmark
+
+
+class SqliteParityTest(unittest.TestCase):
+    """SqliteBookmarkStore must answer like the in-memory BookmarkStore"""
+
+    def setUp(self):
+        self.folder = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.folder)
+
+    def open_sqlite(self):
+        store = SqliteBookmarkStore(os.path.join(self.folder, "bookmarks.db"))
+        store.load()
+        self.addCleanup(store.close)
+        return store
+
+    def check_same(self, memory, sqlite, rng):
+        self.assertEqual(sqlite.sorted_bookmarks(), memory.sorted_bookmarks())
+        self.assertEqual(len(sqlite), len(memory))
+        for bookmark in memory.sorted_bookmarks():
+            self.assertIn(bookmark["id"], sqlite)
+            self.assertEqual(sqlite.get(bookmark["id"]), bookmark)
+            self.assertEqual(sqlite.index_of(bookmark["id"]), memory.index_of(bookmark["id"]))
+        for _ in range(20):
+            filename = rng.choice(FILES)
+            time_ms = rng.randrange(-500, 10500, 250)
+            end_ms = time_ms + rng.randrange(0, 3000)
+            self.assertEqual(sqlite.bookmarks_for_file(filename), memory.bookmarks_for_file(filename))
+            self.assertEqual(sqlite.next_bookmark(filename, time_ms), memory.next_bookmark(filename, time_ms))
+            self.assertEqual(sqlite.previous_bookmark(filename, time_ms),
+                             memory.previous_bookmark(filename, time_ms))
+            self.assertEqual(sqlite.bookmarks_in_range(filename, time_ms, end_ms),
+                             memory.bookmarks_in_range(filename, time_ms, end_ms))
+        for bookmark_type in ("Start", "End", "Regular"):
+            self.assertEqual(sqlite.bookmarks_of_type(bookmark_type), memory.bookmarks_of_type(bookmark_type))
+
+    def test_same_operations(self):
+        rng = random.Random(0)
+        memory = BookmarkStore(JsonArrayPersistence(os.path.join(self.folder, "unused.json")))
+        sqlite = self.open_sqlite()
+        for step in range(200):
+            ids = [bookmark["id"] for bookmark in memory.sorted_bookmarks()]
+            action = rng.choice(("add", "add", "move", "rename", "remove"))
+            if action == "add" or not ids:
+                bookmark = random_bookmark(rng)
+                self.assertEqual(sqlite.add(bookmark), memory.add(bookmark))
+                continue
+            bookmark_id = rng.choice(ids)
+            if action == "move":
+                filename = rng.choice(FILES)
+                changes = {"file": "music/" + filename, "filename": filename,
+                           "time_ms": rng.randrange(0, 10000, 500)}
+            elif action == "rename":
+                changes = {"name": f"renamed {step}", "type": rng.choice(("Start", "End", "Regular"))}
+            else:
+                self.assertEqual(sqlite.remove(bookmark_id), memory.remove(bookmark_id))
+                continue
+            self.assertEqual(sqlite.update(bookmark_id, **changes), memory.update(bookmark_id, **changes))
+            if step % 20 == 0:
+                self.check_same(memory, sqlite, rng)
+        self.check_same(memory, sqlite, rng)
+        sqlite.flush()
+        # Still the same after reopening the database
+        sqlite.load()
+        self.check_same(memory, sqlite, rng)
+        sqlite.clear()
+        memory.clear()
+        self.check_same(memory, sqlite, rng)
+
+    def test_errors(self):
+        sqlite = self.open_sqlite()
+        bookmark_id = sqlite.add({"file": "a.mp3", "time_ms": 0, "name": "x"})
+        with self.assertRaises(KeyError):
+            sqlite.add({"id": bookmark_id, "file": "b.mp3", "time_ms": 0, "name": "y"})
+        with self.assertRaises(ValueError):
+            sqlite.update(bookmark_id, id="other")
+        with self.assertRaises(KeyError):
+            sqlite.update("missing", name="y")
+        with self.assertRaises(KeyError):
+            sqlite.remove("missing")
+
+    def test_migrate_twice(self):
+        json_path = os.path.join(self.folder, "bookmarks.json")
+        db_path = os.path.join(self.folder, "bookmarks.db")
+        with open(json_path, "w", encoding="utf-8") as f:
+            # Old bookmarks without ids, one of them twice
+            json.dump([{"file": "a.mp3", "time_ms": 1000, "name": "old"},
+                       {"file": "b.mp3", "time_ms": 2000, "name": "older", "type": "End"},
+                       {"file": "b.mp3", "time_ms": 2000, "name": "older", "type": "End"}], f)
+        self.assertEqual(migrate_json_to_sqlite(json_path, db_path), 3)
+        store = SqliteBookmarkStore(db_path)
+        store.load()
+        first = store.sorted_bookmarks()
+        store.close()
+        self.assertEqual(migrate_json_to_sqlite(json_path, db_path), 0)
+        store.load()
+        self.assertEqual(store.sorted_bookmarks(), first)
+        store.close()
+        self.assertEqual([bookmark["name"] for bookmark in first], ["old", "older", "older"])
+        self.assertEqual(first[0]["id"], read_bookmarks_json(json_path)[0]["id"])
+        self.assertEqual(migrate_json_to_sqlite(os.path.join(self.folder, "missing.json"), db_path), 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
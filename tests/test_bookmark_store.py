@@ -0,0 +1,158 @@
+import os
+import random
+import tempfile
+import threading
+import unittest
+from unittest import mock
+
+import bookmark_store
+from bookmark_store import BookmarkStore, JsonArrayPersistence, bookmark_sort_key, read_bookmarks_json
+
+FILES = ["a.mp3", "b.mp3", "c.mp3"]
+
+
+def random_bookmark(rng):
+    filename = rng.choice(FILES)
+    return {"file": filename, "filename": filename, "time_ms": rng.randrange(0, 10000, 500),
+            "name": f"n{rng.randrange(100)}", "type": rng.choice(("Start", "End", "Regular"))}
+
+
+class BookmarkStoreQueryTest(unittest.TestCase):
+    """The id index and the bisect helpers must agree with a plain scan"""
+
+    def check_queries(self, store, rng):
+        bookmarks = sorted(store.sorted_bookmarks(), key=bookmark_sort_key)
+        self.assertEqual(store.sorted_bookmarks(), bookmarks)
+        self.assertEqual(len(store), len(bookmarks))
+        for position, bookmark in enumerate(bookmarks):
+            self.assertIs(store.get(bookmark["id"]), bookmark)
+            self.assertEqual(store.index_of(bookmark["id"]), position)
+        for _ in range(20):
+            filename = rng.choice(FILES)
+            time_ms = rng.randrange(-500, 10500, 250)
+            of_file = [bookmark for bookmark in bookmarks if bookmark["filename"] == filename]
+            self.assertEqual(store.bookmarks_for_file(filename), of_file)
+            after = [bookmark for bookmark in of_file if bookmark["time_ms"] > time_ms]
+            self.assertEqual(store.next_bookmark(filename, time_ms), after[0] if after else None)
+            before = [bookmark for bookmark in of_file if bookmark["time_ms"] < time_ms]
+            self.assertEqual(store.previous_bookmark(filename, time_ms), before[-1] if before else None)
+            end_ms = time_ms + rng.randrange(0, 3000)
+            self.assertEqual(store.bookmarks_in_range(filename, time_ms, end_ms),
+                             [bookmark for bookmark in of_file if time_ms <= bookmark["time_ms"] <= end_ms])
+        for bookmark_type in ("Start", "End", "Regular"):
+            self.assertEqual(store.bookmarks_of_type(bookmark_type),
+                             [bookmark for bookmark in bookmarks if bookmark["type"] == bookmark_type])
+
+    def test_random_changes(self):
+        for seed in range(10):
+            rng = random.Random(seed)
+            store = BookmarkStore(JsonArrayPersistence("unused.json"))
+            for step in range(150):
+                ids = [bookmark["id"] for bookmark in store.sorted_bookmarks()]
+                action = rng.choice(("add", "add", "move", "rename", "remove"))
+                if action == "add" or not ids:
+                    store.add(random_bookmark(rng))
+                elif action == "move":
+                    filename = rng.choice(FILES)
+                    store.update(rng.choice(ids), file=filename, filename=filename,
+                                 time_ms=rng.randrange(0, 10000, 500))
+                elif action == "rename":
+                    store.update(rng.choice(ids), name="renamed")
+                else:
+                    store.remove(rng.choice(ids))
+                if step % 10 == 0:
+                    self.check_queries(store, rng)
+            self.check_queries(store, rng)
+
+    def test_update_replaces_the_dict(self):
+        store = BookmarkStore(JsonArrayPersistence("unused.json"))
+        bookmark_id = store.add({"file": "a.mp3", "time_ms": 1000, "name": "x"})
+        old = store.get(bookmark_id)
+        snapshot = store.snapshot()
+        store.update(bookmark_id, time_ms=5000)
+        self.assertEqual(old["time_ms"], 1000)
+        self.assertEqual(snapshot.get(bookmark_id)["time_ms"], 1000)
+        self.assertEqual(store.get(bookmark_id)["time_ms"], 5000)
+        self.assertEqual(store.next_bookmark("a.mp3", 2000)["id"], bookmark_id)
+        with self.assertRaises(ValueError):
+            store.update(bookmark_id, id="other")
+
+    def test_duplicate_id(self):
+        store = BookmarkStore(JsonArrayPersistence("unused.json"))
+        bookmark_id = store.add({"file": "a.mp3", "time_ms": 0, "name": "x"})
+        with self.assertRaises(KeyError):
+            store.add({"id": bookmark_id, "file": "b.mp3", "time_ms": 0, "name": "y"})
+
+
+class BackgroundWriteTest(unittest.TestCase):
+    """The writer thread of JsonArrayPersistence"""
+
+    def setUp(self):
+        self.folder = tempfile.TemporaryDirectory()
+        self.addCleanup(self.folder.cleanup)
+
+    def test_flush_and_reload(self):
+        path = os.path.join(self.folder.name, "bookmarks.json")
+        store = BookmarkStore(JsonArrayPersistence(path, background=True))
+        rng = random.Random(0)
+        for _ in range(50):
+            store.add(random_bookmark(rng))
+        self.assertTrue(store.flush())
+        self.assertFalse(store.flush())
+        store.close()
+        loaded = BookmarkStore(JsonArrayPersistence(path))
+        loaded.load()
+        self.assertEqual(loaded.sorted_bookmarks(), store.sorted_bookmarks())
+
+    def test_failed_write_is_raised_and_retried(self):
+        folder = os.path.join(self.folder.name, "missing")
+        path = os.path.join(folder, "bookmarks.json")
+        persistence = JsonArrayPersistence(path, background=True)
+        store = BookmarkStore(persistence)
+        store.add({"file": "a.mp3", "time_ms": 0, "name": "x"})
+        with mock.patch("builtins.print"):
+            store.flush()
+            persistence.wait_for_writes()
+        self.assertIsNotNone(persistence.write_error)
+        self.assertTrue(persistence.dirty)
+        os.makedirs(folder)
+        # The next flush retries the write, then reports the failed one
+        with self.assertRaises(OSError):
+            store.flush()
+        persistence.wait_for_writes()
+        self.assertIsNone(persistence.write_error)
+        self.assertEqual(len(read_bookmarks_json(path)), 1)
+        store.close()
+
+    def test_close_raises_the_error(self):
+        path = os.path.join(self.folder.name, "missing", "bookmarks.json")
+        store = BookmarkStore(JsonArrayPersistence(path, background=True))
+        store.add({"file": "a.mp3", "time_ms": 0, "name": "x"})
+        with mock.patch("builtins.print"), self.assertRaises(OSError):
+            store.close()
+
+    def test_flushes_during_a_write_are_merged(self):
+        path = os.path.join(self.folder.name, "bookmarks.json")
+        store = BookmarkStore(JsonArrayPersistence(path, background=True))
+        release = threading.Event()
+        written = []
+        write = bookmark_store.write_bookmarks_json
+
+        def slow_write(target, bookmarks):
+            release.wait(5)
+            written.append(len(bookmarks))
+            write(target, bookmarks)
+
+        with mock.patch("bookmark_store.write_bookmarks_json", slow_write):
+            for count in range(4):
+                store.add({"file": "a.mp3", "time_ms": count, "name": "x"})
+                store.flush()
+            release.set()
+            store.close()
+        # The first write, then one of the latest snapshot
+        self.assertEqual(written, [1, 4])
+        self.assertEqual(len(read_bookmarks_json(path)), 4)
+
+
+if __name__ == "__main__":
+    unittest.main()
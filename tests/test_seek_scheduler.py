@@ -0,0 +1,59 @@
+import unittest
+
+from core.fake_player import FakeClock, FakePlayer
+from core.playback import PlaybackController
+from core.seek_scheduler import SeekScheduler
+
+
+class SeekArrivalTest(unittest.TestCase):
+    """Time events from before a seek must not complete it"""
+
+    def setUp(self):
+        self.clock = FakeClock()
+        self.seeks = []
+        self.scheduler = SeekScheduler(self.seeks.append, clock=self.clock.time)
+
+    def test_short_backward_seek(self):
+        self.scheduler.on_time_changed(10500)
+        self.scheduler.request(10000)
+        self.clock.advance(10)
+        # Still playing on from the old position
+        self.scheduler.on_time_changed(10550)
+        self.assertTrue(self.scheduler.busy)
+        self.scheduler.request(20000)
+        self.assertEqual(self.seeks, [10000])
+        self.clock.advance(20)
+        self.scheduler.on_time_changed(10000)
+        self.assertEqual(self.seeks, [10000, 20000])
+        self.assertEqual(list(self.scheduler.latencies_ms), [30.0])
+
+    def test_forward_seek(self):
+        self.scheduler.on_time_changed(10500)
+        self.scheduler.request(12000)
+        self.scheduler.on_time_changed(10550)
+        self.assertTrue(self.scheduler.busy)
+        self.clock.advance(15)
+        self.scheduler.on_time_changed(12000)
+        self.assertFalse(self.scheduler.busy)
+        self.assertEqual(list(self.scheduler.latencies_ms), [15.0])
+
+    def test_position_unknown(self):
+        self.scheduler.request(10000)
+        self.scheduler.on_time_changed(10400)
+        self.assertFalse(self.scheduler.busy)
+
+    def test_controller_short_backward_seek(self):
+        player = FakePlayer(self.clock, seek_delay_ms=(20, 20))
+        controller = PlaybackController(player, clock=self.clock.time)
+        controller.open("a.mp3", 10500)
+        self.assertTrue(self.clock.run_until(lambda: not controller.busy))
+        controller.seek(10000)
+        controller.on_time_changed(10550)
+        self.assertTrue(controller.busy)
+        self.assertTrue(self.clock.run_until(lambda: not controller.busy))
+        self.assertEqual(len(controller.seek_latencies_ms), 1)
+        self.assertAlmostEqual(controller.seek_latencies_ms[0], 20.0)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,88 @@
+import threading
+import time
+
+import vlc
+from PySide6.QtCore import QObject, Signal
+
+from player_config import PlayerConfig
+
+
+class VlcRuntime(QObject):
+    """
+    Creates the application's one libvlc instance on a worker thread.
+
+    Creating an instance loads libvlc's plugins, which can take a good part
+    of a second on a cold start, so it is not done before the window is up.
+    ``start()`` begins it in the background; ``ready`` is emitted on the GUI
+    thread once it is done (``failed`` with the error message). Anything
+    that needs libvlc earlier calls ``instance()``, which waits for the
+    worker, starting it first if needed. Players and media of the whole
+    application come from this instance, so they all share its settings.
+
+    Args:
+        config: PlayerConfig with the instance options and the options of
+            every media
+    """
+
+    ready = Signal()
+    failed = Signal(str)
+
+    def __init__(self, config=None, parent=None):
+        super().__init__(parent)
+        self.config = config or PlayerConfig()
+        self.args = self.config.instance_args()
+        self.media_options = list(self.config.media_options)
+        self.startup_ms = None  # time libvlc took to start
+        self._instance = None
+        self._error = None
+        self._thread = None
+        self._done = threading.Event()
+        self._lock = threading.Lock()
+
+    @property
+    def is_ready(self):
+        return self._instance is not None
+
+    def start(self):
+        """Start creating the instance in the background, unless already started"""
+        with self._lock:
+            if self._thread is not None:
+                return
+            self._thread = threading.Thread(target=self._run, name="libvlc-init", daemon=True)
+            self._thread.start()
+
+    def _run(self):
+        """Runs on the worker thread"""
+        started = time.perf_counter()
+        try:
+            instance = vlc.Instance(self.args)
+            if instance is None:
+                raise RuntimeError("libvlc could not be initialized")
+        except Exception as e:
+            self._error = str(e)
+            self._done.set()
+            self.failed.emit(self._error)
+            return
+        self.startup_ms = (time.perf_counter() - started) * 1000
+        self._instance = instance
+        self._done.set()
+        self.ready.emit()
+
+    def instance(self):
+        """
+        The libvlc instance, waiting for it to be created if needed.
+
+        Raises:
+            RuntimeError: libvlc failed to start
+        """
+        self.start()
+        self._done.wait()
+        if self._instance is None:
+            raise RuntimeError(f"libvlc failed to start: {self._error}")
+        return self._instance
+
+    def media_player(self):
+        return self.instance().media_player_new()
+
+    def media(self, path):
+        return self.instance().media_new(path, *self.media_options)
@@ -0,0 +1,289 @@
+import json
+import os
+import shutil
+import subprocess
+import threading
+import wave
+
+from PySide6.QtCore import QObject, Signal
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+# Waveforms need NumPy; without it the waveform view stays empty
+WAVEFORM_AVAILABLE = np is not None
+
+# Rate files are decoded at (mono) when ffmpeg does the decoding
+DECODE_RATE = 11025
+
+# Duration covered by one peak of the finest level
+PEAK_MS = 5
+
+# Levels stop once they are shorter than this many peaks
+MIN_LEVEL_PEAKS = 256
+
+# Samples read per block while decoding
+DECODE_BLOCK_SAMPLES = 1 << 16
+
+
+def iter_pcm_blocks(path):
+    """
+    Decode a file to mono 16-bit samples, block by block.
+
+    WAV files are read with the wave module; everything else goes through
+    an ffmpeg subprocess, so no file is ever decoded into memory at once.
+
+    Yields:
+        (sample_rate, int16 array) tuples
+    """
+    if path.lower().endswith(".wav"):
+        with wave.open(path, "rb") as wav:
+            if wav.getsampwidth() != 2:
+                raise ValueError("Only 16-bit WAV files are supported")
+            channels = wav.getnchannels()
+            rate = wav.getframerate()
+            while True:
+                data = wav.readframes(DECODE_BLOCK_SAMPLES)
+                if not data:
+                    break
+                samples = np.frombuffer(data, dtype="<i2")
+                if channels > 1:
+                    samples = samples.reshape(-1, channels).mean(axis=1).astype(np.int16)
+                yield rate, samples
+        return
+
+    ffmpeg = shutil.which("ffmpeg")
+    if ffmpeg is None:
+        raise RuntimeError("ffmpeg is needed to decode this file")
+    process = subprocess.Popen(
+        [ffmpeg, "-v", "error", "-i", path, "-ac", "1", "-ar", str(DECODE_RATE), "-f", "s16le", "-"],
+        stdout=subprocess.PIPE, stderr=subprocess.DEVNULL
+    )
+    try:
+        while True:
+            data = process.stdout.read(DECODE_BLOCK_SAMPLES * 2)
+            if not data:
+                break
+            if len(data) % 2:
+                data += process.stdout.read(1)
+            yield DECODE_RATE, np.frombuffer(data, dtype="<i2")
+    finally:
+        process.stdout.close()
+        process.kill()
+        process.wait()
+
+
+def compute_peaks(blocks, cancel_event=None):
+    """
+    Reduce decoded blocks to the finest peak level.
+
+    Each peak is the (min, max) of PEAK_MS worth of samples, scaled to int8.
+    Samples left over at the end of a block are carried to the next one, so
+    the reduction is a reshape plus min/max per block.
+
+    Returns:
+        (int8 array of shape (n, 2), sample rate, number of samples),
+        or None if canceled
+    """
+    chunks = []
+    carry = None
+    rate = None
+    samples_per_peak = None
+    total = 0
+    for rate, samples in blocks:
+        if cancel_event is not None and cancel_event.is_set():
+            return None
+        if samples_per_peak is None:
+            samples_per_peak = max(1, rate * PEAK_MS // 1000)
+        total += len(samples)
+        if carry is not None and len(carry):
+            samples = np.concatenate((carry, samples))
+        usable = len(samples) - len(samples) % samples_per_peak
+        carry = samples[usable:]
+        if usable:
+            frames = samples[:usable].reshape(-1, samples_per_peak)
+            chunks.append(np.stack((frames.min(axis=1), frames.max(axis=1)), axis=1))
+    if carry is not None and len(carry):
+        chunks.append(np.array([[carry.min(), carry.max()]], dtype=np.int16))
+    if not chunks:
+        return np.zeros((0, 2), dtype=np.int8), rate or DECODE_RATE, 0
+    peaks = np.concatenate(chunks)
+    return (peaks >> 8).astype(np.int8), rate, total
+
+
+def build_levels(peaks):
+    """
+    Build the mipmap pyramid: each level merges pairs of peaks of the
+    previous one (min of mins, max of maxes), down to MIN_LEVEL_PEAKS.
+    """
+    levels = [peaks]
+    while len(levels[-1]) > MIN_LEVEL_PEAKS:
+        level = levels[-1]
+        if len(level) % 2:
+            level = np.concatenate((level, level[-1:]))
+        pairs = level.reshape(-1, 2, 2)
+        levels.append(np.stack((pairs[:, :, 0].min(axis=1), pairs[:, :, 1].max(axis=1)), axis=1))
+    return levels
+
+
+class Peaks:
+    """
+    Peak pyramid of one file, backed by a memory-mapped cache file.
+
+    ``columns()`` answers "min and max per pixel column between two times"
+    from the coarsest level that still has at least one peak per column,
+    so a redraw or zoom only touches a small slice of the data.
+    """
+
+    def __init__(self, data, meta):
+        self.meta = meta
+        self.duration_ms = meta["duration_ms"]
+        self.peak_ms = meta["peak_ms"]
+        self.levels = [data[start:end] for start, end in meta["levels"]]
+
+    def columns(self, start_ms, end_ms, width):
+        """
+        Min/max peaks for width pixel columns covering start_ms..end_ms.
+
+        Returns:
+            (mins, maxs) int8 arrays of length width (empty if no data)
+        """
+        if width <= 0 or end_ms <= start_ms or not self.levels or not len(self.levels[0]):
+            return np.zeros(0, dtype=np.int8), np.zeros(0, dtype=np.int8)
+        ms_per_column = (end_ms - start_ms) / width
+        level_index = 0
+        while (level_index + 1 < len(self.levels) and
+               self.peak_ms * (2 ** (level_index + 1)) <= ms_per_column):
+            level_index += 1
+        level = self.levels[level_index]
+        level_ms = self.peak_ms * (2 ** level_index)
+        first = int(start_ms / level_ms)
+        last = min(len(level), max(first + 1, int(end_ms / level_ms) + 1))
+        if first >= len(level):
+            return np.zeros(0, dtype=np.int8), np.zeros(0, dtype=np.int8)
+        segment = np.asarray(level[first:last])
+        # First peak of each column, then reduce every column's run of peaks
+        bounds = np.linspace(0, len(segment), width, endpoint=False).astype(np.intp)
+        mins = np.minimum.reduceat(segment[:, 0], bounds)
+        maxs = np.maximum.reduceat(segment[:, 1], bounds)
+        return mins, maxs
+
+
+class PeakCache:
+    """
+    On-disk cache of peak pyramids, keyed by content hash.
+
+    Each entry is a raw int8 file holding all levels back to back, plus a
+    small JSON file with the level offsets and timing; entries are opened
+    as read-only memory maps.
+    """
+
+    def __init__(self, folder):
+        self.folder = folder
+
+    def _paths(self, key):
+        return os.path.join(self.folder, key + ".peaks"), os.path.join(self.folder, key + ".json")
+
+    def load(self, key):
+        """Return the cached Peaks of a content hash, or None"""
+        data_path, meta_path = self._paths(key)
+        try:
+            with open(meta_path, "r", encoding="utf-8") as f:
+                meta = json.load(f)
+            rows = meta["levels"][-1][1]
+            if rows * 2 != os.path.getsize(data_path):
+                return None
+            if rows == 0:
+                # Silent or empty file; np.memmap refuses empty files
+                return Peaks(np.zeros((0, 2), dtype=np.int8), meta)
+            data = np.memmap(data_path, dtype=np.int8, mode="r").reshape(-1, 2)
+        except (OSError, ValueError, KeyError, IndexError):
+            return None
+        return Peaks(data, meta)
+
+    def store(self, key, levels, rate, samples):
+        """Write a peak pyramid and return it as memory-mapped Peaks"""
+        os.makedirs(self.folder, exist_ok=True)
+        data_path, meta_path = self._paths(key)
+        meta = levels_meta(levels, rate, samples)
+        tmp_path = data_path + ".tmp"
+        with open(tmp_path, "wb") as f:
+            for level in levels:
+                f.write(np.ascontiguousarray(level, dtype=np.int8).tobytes())
+        os.replace(tmp_path, data_path)
+        # The metadata goes last: an entry without it is not used
+        tmp_path = meta_path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(meta, f)
+        os.replace(tmp_path, meta_path)
+        return self.load(key)
+
+
+def levels_meta(levels, rate, samples):
+    """Timing and level offsets (in peaks) of a peak pyramid"""
+    offsets = []
+    position = 0
+    for level in levels:
+        offsets.append((position, position + len(level)))
+        position += len(level)
+    samples_per_peak = max(1, rate * PEAK_MS // 1000)
+    return {
+        "duration_ms": int(samples * 1000 / rate) if rate else 0,
+        "peak_ms": samples_per_peak * 1000 / rate,
+        "levels": offsets,
+    }
+
+
+class WaveformLoader(QObject):
+    """
+    Produces Peaks for files on a worker thread: from the PeakCache when
+    the content hash is known, else by decoding the file once and caching
+    the result. ``ready`` delivers (path, Peaks) on the GUI thread.
+    Requesting another file cancels the decoding of the previous one.
+    """
+
+    ready = Signal(str, object)
+    failed = Signal(str, str)
+
+    def __init__(self, cache, parent=None):
+        super().__init__(parent)
+        self.cache = cache
+        self._cancel_event = None
+
+    def load(self, path, key):
+        """Start loading the peaks of path, cached under the content hash key"""
+        self.cancel()
+        if not WAVEFORM_AVAILABLE:
+            self.failed.emit(path, "NumPy is not installed")
+            return
+        self._cancel_event = threading.Event()
+        threading.Thread(
+            target=self._run, args=(path, key, self._cancel_event), name="waveform", daemon=True
+        ).start()
+
+    def cancel(self):
+        if self._cancel_event is not None:
+            self._cancel_event.set()
+            self._cancel_event = None
+
+    def _run(self, path, key, cancel_event):
+        """Runs on the worker thread"""
+        try:
+            peaks = self.cache.load(key) if key else None
+            if peaks is None:
+                result = compute_peaks(iter_pcm_blocks(path), cancel_event)
+                if result is None:
+                    return
+                peaks_array, rate, samples = result
+                levels = build_levels(peaks_array)
+                if key:
+                    peaks = self.cache.store(key, levels, rate, samples)
+                else:
+                    peaks = Peaks(np.concatenate(levels), levels_meta(levels, rate, samples))
+        except Exception as e:
+            self.failed.emit(path, str(e))
+            return
+        if peaks is not None and not cancel_event.is_set():
+            self.ready.emit(path, peaks)
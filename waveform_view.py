@@ -0,0 +1,320 @@
+from bisect import bisect_left, bisect_right
+
+from PySide6.QtCore import QEvent, QLineF, QRect, Qt, Signal
+from PySide6.QtGui import QColor, QPainter, QPen, QPixmap
+from PySide6.QtWidgets import QSizePolicy, QToolTip, QWidget
+
+# Shared colors and pens, so paintEvent() never allocates them
+BACKGROUND_COLOR = QColor(40, 40, 40)
+WAVEFORM_COLOR = QColor(90, 160, 220)
+PLAYHEAD_PEN = QPen(QColor(255, 255, 255), 1)
+MARKER_PENS = {
+    "Start": QPen(QColor(110, 240, 132), 1),  # Green for start
+    "End": QPen(QColor(232, 117, 104), 1),  # Red for end
+}
+DEFAULT_MARKER_PEN = QPen(QColor(240, 200, 80), 1)
+SPAN_COLOR = QColor(110, 240, 132, 45)
+
+# Distance in pixels within which the mouse is on a marker
+MARKER_HIT_PX = 4
+
+# Narrowest view, in milliseconds, the wheel zooms in to
+MIN_VIEW_MS = 1000
+
+
+def merge_spans(segments):
+    """
+    Union of (start_ms, end_ms, ...) segments as disjoint spans, which
+    come out ordered by both start and end.
+
+    Returns:
+        (starts, ends) lists of span times
+    """
+    starts = []
+    ends = []
+    for segment in sorted(segments):
+        if starts and segment[0] <= ends[-1]:
+            ends[-1] = max(ends[-1], segment[1])
+        else:
+            starts.append(segment[0])
+            ends.append(segment[1])
+    return starts, ends
+
+
+class WaveformView(QWidget):
+    """
+    Waveform overview of the current file with bookmark markers, Start→End
+    spans and a playhead.
+
+    The waveform comes from waveform.Peaks: each repaint asks it for one
+    min/max pair per pixel column of the visible range, which is a slice of
+    one pyramid level, and keeps the drawn waveform in a pixmap until the
+    size, range or peaks change. Playhead moves only repaint the two
+    columns involved. The wheel zooms around the mouse position and a
+    double click shows the whole file again; clicking or dragging asks for
+    a seek through ``seek_requested`` (milliseconds).
+
+    Markers are kept as parallel arrays ordered by time, so painting,
+    hit-testing and tooltips bisect to the visible range, and painting
+    draws at most one tick per pixel column however many markers share it.
+    Clicking next to a marker seeks to the marker itself.
+    """
+
+    seek_requested = Signal(int)
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.setSizePolicy(QSizePolicy.Expanding, QSizePolicy.Fixed)
+        self.setFixedHeight(60)
+        self._peaks = None
+        self._duration_ms = 0
+        self._position_ms = 0
+        self._marker_times = []  # ascending
+        self._marker_types = []
+        self._marker_names = []
+        self._span_starts = []  # covered by Start→End segments, see merge_spans()
+        self._span_ends = []
+        self._view = None  # (start_ms, end_ms) when zoomed in, else None
+        self._pixmap = None
+        self._pixmap_key = None
+
+    def set_peaks(self, peaks):
+        """Show the waveform of a waveform.Peaks (None for none)"""
+        self._peaks = peaks
+        if peaks is not None and self._duration_ms <= 0:
+            self._duration_ms = peaks.duration_ms
+        self._invalidate()
+
+    def set_duration(self, duration_ms):
+        """Set the length of the file, which the full view spans"""
+        if duration_ms != self._duration_ms:
+            self._duration_ms = duration_ms
+            self._view = None
+            self._invalidate()
+
+    def set_markers(self, bookmarks, segments=()):
+        """
+        Show bookmarks of the current file as markers, and its Start→End
+        segments (bookmark_segments.SegmentIndex segments) as spans.
+        """
+        bookmarks = sorted(bookmarks, key=lambda bookmark: bookmark["time_ms"])
+        self._marker_times = [bookmark["time_ms"] for bookmark in bookmarks]
+        self._marker_types = [bookmark.get("type", "Regular") for bookmark in bookmarks]
+        self._marker_names = [bookmark["name"] for bookmark in bookmarks]
+        self._span_starts, self._span_ends = merge_spans(segments)
+        self.update()
+
+    def marker_count(self):
+        return len(self._marker_times)
+
+    def nearest_marker(self, time_ms, max_distance_ms=None):
+        """
+        Index of the marker closest to a time, or None if there is none
+        within max_distance_ms.
+        """
+        times = self._marker_times
+        index = bisect_left(times, time_ms)
+        best = None
+        for candidate in (index - 1, index):
+            if 0 <= candidate < len(times):
+                if best is None or abs(times[candidate] - time_ms) < abs(times[best] - time_ms):
+                    best = candidate
+        if best is None or (max_distance_ms is not None and abs(times[best] - time_ms) > max_distance_ms):
+            return None
+        return best
+
+    def marker_at(self, x):
+        """Index of the marker within MARKER_HIT_PX of a pixel column, or None"""
+        if self._duration_ms <= 0 or not self._marker_times:
+            return None
+        start_ms, end_ms = self.view_range()
+        ms_per_px = (end_ms - start_ms) / max(self.width() - 1, 1)
+        return self.nearest_marker(self._time_at(x), MARKER_HIT_PX * ms_per_px)
+
+    def set_position(self, position_ms):
+        """Move the playhead, repainting only if it moves to another column"""
+        old_x = self._x_of(self._position_ms)
+        self._position_ms = position_ms
+        new_x = self._x_of(position_ms)
+        if new_x != old_x:
+            for x in (old_x, new_x):
+                if x is not None:
+                    self.update(QRect(x - 1, 0, 3, self.height()))
+
+    def clear(self):
+        """Forget the file: no waveform, markers or playhead"""
+        self._peaks = None
+        self._duration_ms = 0
+        self._position_ms = 0
+        self._marker_times = []
+        self._marker_types = []
+        self._marker_names = []
+        self._span_starts = []
+        self._span_ends = []
+        self._view = None
+        self._invalidate()
+
+    def view_range(self):
+        """Visible (start_ms, end_ms)"""
+        if self._view is not None:
+            return self._view
+        return 0, max(self._duration_ms, 1)
+
+    def _invalidate(self):
+        self._pixmap = None
+        self.update()
+
+    def _x_of(self, time_ms):
+        """Pixel column of a time, or None outside the visible range"""
+        if self._duration_ms <= 0:
+            return None
+        start_ms, end_ms = self.view_range()
+        if not start_ms <= time_ms <= end_ms:
+            return None
+        return int((time_ms - start_ms) * (self.width() - 1) / (end_ms - start_ms))
+
+    def _time_at(self, x):
+        start_ms, end_ms = self.view_range()
+        x = min(max(x, 0), self.width() - 1)
+        return int(start_ms + x * (end_ms - start_ms) / max(self.width() - 1, 1))
+
+    def _waveform_pixmap(self):
+        """The waveform of the visible range, drawn once per size and range"""
+        key = (self.width(), self.height(), self.view_range())
+        if self._pixmap is not None and self._pixmap_key == key:
+            return self._pixmap
+        pixmap = QPixmap(self.size())
+        pixmap.fill(BACKGROUND_COLOR)
+        if self._peaks is not None and self._duration_ms > 0:
+            start_ms, end_ms = self.view_range()
+            mins, maxs = self._peaks.columns(start_ms, end_ms, self.width())
+            middle = self.height() / 2
+            scale = middle / 128
+            lines = [QLineF(x, middle - int(top) * scale, x, middle - int(bottom) * scale)
+                     for x, (bottom, top) in enumerate(zip(mins.tolist(), maxs.tolist()))]
+            painter = QPainter(pixmap)
+            painter.setPen(QPen(WAVEFORM_COLOR, 1))
+            painter.drawLines(lines)
+            painter.end()
+        self._pixmap = pixmap
+        self._pixmap_key = key
+        return pixmap
+
+    def paintEvent(self, event):
+        painter = QPainter(self)
+        rect = event.rect()
+        painter.drawPixmap(rect, self._waveform_pixmap(), rect)
+        if self._duration_ms > 0:
+            # Only what falls into the repainted columns
+            start_ms = self._time_at(rect.left() - 1)
+            end_ms = self._time_at(rect.right() + 1)
+            self._paint_spans(painter, start_ms, end_ms)
+            self._paint_markers(painter, start_ms, end_ms)
+        x = self._x_of(self._position_ms)
+        if x is not None:
+            painter.setPen(PLAYHEAD_PEN)
+            painter.drawLine(x, 0, x, self.height())
+
+    def _paint_spans(self, painter, start_ms, end_ms):
+        # Spans are ordered by both start and end: the visible ones are
+        # those ending after start_ms and starting before end_ms
+        index = bisect_left(self._span_ends, start_ms)
+        last = bisect_right(self._span_starts, end_ms)
+        view_start, view_end = self.view_range()
+        ms_per_px = (view_end - view_start) / max(self.width() - 1, 1)
+        height = self.height()
+        run = None  # [left, right] of the columns being covered
+        while index < last:
+            # Inlined _x_of(), as this loop runs up to once per column
+            left = int((max(self._span_starts[index], view_start) - view_start) / ms_per_px)
+            right = int((min(self._span_ends[index], view_end) - view_start) / ms_per_px)
+            if run is not None and left <= run[1] + 1:
+                run[1] = max(run[1], right)
+            else:
+                if run is not None:
+                    painter.fillRect(run[0], 0, run[1] - run[0] + 1, height, SPAN_COLOR)
+                run = [left, right]
+            # Skip the spans ending inside the columns covered so far
+            next_column_ms = view_start + (run[1] + 1) * ms_per_px
+            index = max(index + 1, bisect_left(self._span_ends, next_column_ms, index, last))
+        if run is not None:
+            painter.fillRect(run[0], 0, run[1] - run[0] + 1, height, SPAN_COLOR)
+
+    def _paint_markers(self, painter, start_ms, end_ms):
+        times = self._marker_times
+        index = bisect_left(times, start_ms)
+        last = bisect_right(times, end_ms)
+        view_start, view_end = self.view_range()
+        ms_per_px = (view_end - view_start) / max(self.width() - 1, 1)
+        height = self.height()
+        lines = {}  # type -> ticks, drawn with one call per pen
+        while index < last:
+            x = int((times[index] - view_start) / ms_per_px)
+            lines.setdefault(self._marker_types[index], []).append(QLineF(x, 0, x, height))
+            # Skip the other markers of this column
+            next_column_ms = view_start + (x + 1) * ms_per_px
+            index = max(index + 1, bisect_left(times, next_column_ms, index, last))
+        for bookmark_type, type_lines in lines.items():
+            painter.setPen(MARKER_PENS.get(bookmark_type, DEFAULT_MARKER_PEN))
+            painter.drawLines(type_lines)
+
+    def event(self, event):
+        if event.type() == QEvent.ToolTip:
+            index = self.marker_at(event.pos().x())
+            if index is None:
+                QToolTip.hideText()
+                event.ignore()
+            else:
+                seconds = self._marker_times[index] // 1000
+                QToolTip.showText(
+                    event.globalPos(),
+                    f"{self._marker_names[index]} - {seconds // 60:02d}:{seconds % 60:02d} "
+                    f"[{self._marker_types[index]}]",
+                    self,
+                )
+            return True
+        return super().event(event)
+
+    def resizeEvent(self, event):
+        self._pixmap = None
+        super().resizeEvent(event)
+
+    def mousePressEvent(self, event):
+        if event.button() == Qt.LeftButton and self._duration_ms > 0:
+            x = event.position().x()
+            index = self.marker_at(x)
+            if index is not None:
+                self.seek_requested.emit(self._marker_times[index])
+            else:
+                self.seek_requested.emit(self._time_at(x))
+
+    def mouseMoveEvent(self, event):
+        if event.buttons() & Qt.LeftButton and self._duration_ms > 0:
+            time_ms = self._time_at(event.position().x())
+            if self._x_of(time_ms) != self._x_of(self._position_ms):
+                self.seek_requested.emit(time_ms)
+
+    def mouseDoubleClickEvent(self, event):
+        if self._view is not None:
+            self._view = None
+            self._invalidate()
+
+    def wheelEvent(self, event):
+        """Zoom in or out around the mouse position"""
+        if self._duration_ms <= 0:
+            return
+        steps = event.angleDelta().y() / 120
+        if not steps:
+            return
+        start_ms, end_ms = self.view_range()
+        anchor_ms = self._time_at(event.position().x())
+        span = (end_ms - start_ms) * (0.8 ** steps)
+        span = min(max(span, MIN_VIEW_MS), self._duration_ms)
+        if span >= self._duration_ms:
+            self._view = None
+        else:
+            ratio = (anchor_ms - start_ms) / (end_ms - start_ms)
+            start_ms = min(max(anchor_ms - span * ratio, 0), self._duration_ms - span)
+            self._view = (int(start_ms), int(start_ms + span))
+        self._invalidate()
+        event.accept()